@@ -2,8 +2,6 @@
 Application entry point containing the main application loop.
 """
 import os
-from re import Pattern
-import re
 import signal
 import threading
 import logging
@@ -11,7 +9,6 @@ from typing import Any
 
 import customtkinter
 #from tktooltip import ToolTip
-import psutil
 from PIL import Image
 from pystray import Icon
 from pystray import MenuItem as item
@@ -19,7 +16,9 @@ from win10toast_click import ToastNotifier
 
 from app.common_view.popups import Popups
 from app.preference_view.pref_page import PrefPage
+from backend.client_manager import ClientManager
 from backend.common.config import Client_Status, GameConfig, AppConfig
+from database.db_conn import DBConnection, UploadQueue
 
 class App(customtkinter.CTk):
     """
@@ -49,6 +48,10 @@ class App(customtkinter.CTk):
         self.__debug = self.__app_config.get_config('debug') # Set the debug mode
         self.__game_config: GameConfig = GameConfig(self.__app_config, self.__debug) # Create the game config
         self.__sync_thread_event = threading.Event() # Create a thread event
+        # The characters are uploaded unless syncing to the database was disabled (no .env file)
+        self.__upload_queue: UploadQueue = UploadQueue(DBConnection()) if self.__app_config.get_config('sync').get('enabled', True) else None
+        self.__client_manager: ClientManager = ClientManager(self.__app_config, self.__debug, upload_queue=self.__upload_queue) # Sync every running client
+        self.__syncing: bool = False # Whether the user started the sync, the clients found later are synced too
 
         # =============== Define the main window and appearance ===============
         customtkinter.set_appearance_mode(self.__app_config.get_config('theme'))  # Modes: system (default), light, dark
@@ -217,7 +220,7 @@ class App(customtkinter.CTk):
 
     def __monitor_process(self, game_config: GameConfig, app_config: AppConfig, event: threading.Event, sync_button: customtkinter.CTkButton, client_status_label: customtkinter.CTkLabel) -> None:
         """
-        Check if the client is still running with given pid.
+        Attach to the new clients and detach from the exited ones at every check.
 
         Parameters
         ----------
@@ -227,45 +230,59 @@ class App(customtkinter.CTk):
             The event to stop the thread.
         sync_button : customtkinter.CTkButton
             The sync button to enable/disable.
+        client_status_label : customtkinter.CTkLabel
+            The label showing the client status.
 
         Returns
         -------
         None
         """
-        # Constantly monitor the process
-        bit_match: Pattern = re.compile("lotroclient(64)*.exe") # Regex to match the game client exe.
+        sync_button.configure(
+            text="Sync Data",
+            fg_color="#03a56a",
+            state="disabled", require_redraw=False)
+        # Constantly monitor the processes
         while not event.is_set():
-            if game_config.client_status == Client_Status.NOT_FOUND:
-                # If the process is not running, disable the sync button
-                sync_button.configure(
-                    text="Sync Data",
-                    fg_color="#03a56a",
-                    state="disabled", require_redraw=False)
-                for proc in psutil.process_iter(): # Iterate over all the processes
-                    name_match = bit_match.search(proc.name().lower()) # Check if the process name matches the regex
-                    if bool(name_match):
-                        game_config.set_address(name_match, proc.pid) # Set the address of the client
-                    if game_config.client_status == Client_Status.RUNNING:
-                        client_status_label.configure(text="Running", text_color=("#4DB6AC", "#00695C")) # (Light=#4DB6AC, Dark=#00695C)
-                        # If the process is running, enable the sync button
-                        sync_button.configure(
-                            text="Sync Data",
-                            fg_color="#03a56a",
-                            state="normal", require_redraw=False)
-                        break
-                    elif game_config.client_status == Client_Status.MISSING_ADMIN:
-                        client_status_label.configure(text="Missing Admin", text_color=("#FFA726", "#E65100")) # (Light=#FFA726, Dark=#E65100)
-                    elif game_config.client_status == Client_Status.UNKNOWN_ERROR:
-                        client_status_label.configure(text="Unknown", text_color=("#B00020", "#CF6679")) # (Light=#B00020, Dark=#CF6679)
-            if not psutil.pid_exists(game_config.pid):
-                # If the process is not running anymore, disable the sync button
-                game_config.client_status = Client_Status.NOT_FOUND
-                client_status_label.configure(text="Not Running", text_color=("#B00020", "#CF6679")) # (Light=#B00020, Dark=#CF6679)
-                sync_button.configure(
-                    text="Sync Data",
-                    fg_color="#03a56a",
-                    state="disabled", require_redraw=False)
-            event.wait(app_config.get_config('lotro', 'client_check_interval')) # Wait 3 seconds before checking again
+            attached, detached = self.__client_manager.discover()
+            if self.__debug:
+                for pid in detached:
+                    logging.info("Client %d is not running anymore.", pid)
+            if attached and self.__syncing:
+                self.__client_manager.sync_all() # The new clients join the running sync
+            self.__update_client_status(sync_button, client_status_label)
+            event.wait(app_config.get_config('lotro', 'client_check_interval')) # Wait before checking again
+
+    def __update_client_status(self, sync_button: customtkinter.CTkButton, client_status_label: customtkinter.CTkLabel) -> None:
+        """
+        Show the status of the clients and enable the sync button while a client is attached.
+
+        Parameters
+        ----------
+        sync_button : customtkinter.CTkButton
+            The sync button to enable/disable.
+        client_status_label : customtkinter.CTkLabel
+            The label showing the client status.
+        """
+        client_status = self.__client_manager.client_status
+        if client_status == Client_Status.RUNNING:
+            nb_clients = len(self.__client_manager.pids)
+            client_status_label.configure(text="Running" if nb_clients == 1 else f"Running ({nb_clients})", text_color=("#4DB6AC", "#00695C")) # (Light=#4DB6AC, Dark=#00695C)
+            # If a client is running, enable the sync button
+            sync_button.configure(state="normal", require_redraw=False)
+            return
+        if client_status == Client_Status.MISSING_ADMIN:
+            client_status_label.configure(text="Missing Admin", text_color=("#FFA726", "#E65100")) # (Light=#FFA726, Dark=#E65100)
+        elif client_status == Client_Status.UNKNOWN_ERROR:
+            client_status_label.configure(text="Unknown", text_color=("#B00020", "#CF6679")) # (Light=#B00020, Dark=#CF6679)
+        else:
+            client_status_label.configure(text="Not Running", text_color=("#B00020", "#CF6679")) # (Light=#B00020, Dark=#CF6679)
+        # If no client is running anymore, disable the sync button
+        self.__syncing = False
+        sync_button.configure(
+            text="Sync Data",
+            fg_color="#03a56a",
+            hover_color="#037f51",
+            state="disabled", require_redraw=False)
 
     def __create_home_page(self) -> None:
         """
@@ -327,7 +344,10 @@ class App(customtkinter.CTk):
         if self.__debug:
             logging.info("Creating preference page.")
         # create the preference page frame
-        self.pref_page = PrefPage(self.frame_right, self.__game_config, self.__app_config, self.main_x, self.main_y)
+        # The preferences path is read from a running client, the default one is used without client
+        pids = self.__client_manager.pids
+        game_config = self.__client_manager.get_config(pids[0]) if pids else None
+        self.pref_page = PrefPage(self.frame_right, game_config or self.__game_config, self.__app_config, self.main_x, self.main_y)
 
     def __display_pref_page(self) -> None:
         """
@@ -381,17 +401,19 @@ class App(customtkinter.CTk):
         print('Hiding settings page')
 
     def __sync_data(self):
-        """ Enable or disable the syncing of the data. """
-        if self.__data_extractor.sync_enabled(): # if the data syncing is enabled
+        """ Enable or disable the syncing of the data of every client. """
+        if self.__syncing: # if the data syncing is enabled
             if self.__debug:
                 logging.info("Stopping syncing data...")
-            self.__data_extractor.stop_sync() # stop syncing the data
+            self.__syncing = False
+            self.__client_manager.stop_all() # stop syncing the data
             # change the button text and color
             self.sync_button.configure(require_redraw=True, text = "Sync Data", fg_color="#03a56a", hover_color="#037f51")
         else: # if the data syncing is disabled
             if self.__debug:
                 logging.info("Starting syncing data...")
-            self.__data_extractor.sync() # start syncing the data
+            self.__syncing = True
+            self.__client_manager.sync_all() # start syncing the data
             # change the button text and color
             self.sync_button.configure(require_redraw=True, text = "Stop Syncing", fg_color="#A52A2A", hover_color="#731d1d")
 
@@ -420,9 +442,7 @@ class App(customtkinter.CTk):
         if self.__game_config.mem:
             self.__game_config.close_mem() # close the memory
         self.__sync_thread_event.set() # set the event to stop the thread
-        # TODO - fix this
-        # if self.__data_extractor.sync_enabled(): # if the data syncing is enabled
-        #     self.__data_extractor.stop_sync() # stop syncing the data
+        self.__client_manager.close() # stop syncing the clients and close their memory
         os.kill(os.getpid(), signal.SIGTERM) # kill the process
 
     def __show_app(self, icon, _) -> None:
@@ -7,6 +7,7 @@ import logging
 import customtkinter
 from customtkinter import CTkCanvas
 
+from app.preference_view.pref_search import PrefSearchEntry, PrefSearchIndex
 from app.preference_view.pref_view import PreferenceView
 from app.common_view.popups import Popups
 from app.common_view.widget_utils import init_placeholder
@@ -42,10 +43,10 @@ class PrefPage():
         self.__preferences_path: str = game_config.lotro_pref_path # path to the preferences file
 
         self.__search_string = '' # search string for searching through config file
-        self.__search_locs = [] # list of found locations of search string
-        self.__temp_search_locs = [] # copy of search_locs
+        self.__search_locs: list[PrefSearchEntry] = [] # list of found locations of search string
+        self.__found_item: PrefSearchEntry = None # currently highlighted location
+        self.__search_index = PrefSearchIndex() # index of the preferences, built with the preference list
 
-        self.__current_frame_height = 0 # current height of the canvas
         self.__pref_view_list = [] # list of preference views (each preference view is a setting type)
 
         self.__create_search_bar() # create the search bar (search box, label and button)
@@ -131,9 +132,11 @@ class PrefPage():
         row_num = 0
         for key, value in self.__preferences_ini.items():
             if list(value.keys()): # if the setting type has settings
-                pref_view = PreferenceView(parent=self.list_frame, save_button=self.save_button, name=key, items=value, config_changes=self.config_changes)
+                pref_view = PreferenceView(parent=self.list_frame, save_button=self.save_button, name=key, items=value, config_changes=self.config_changes,
+                                           on_change=self.__on_pref_change)
                 pref_view.grid(row=row_num, column=0, columnspan=2, rowspan=1, sticky='nw')
                 self.__pref_view_list.append(pref_view)
+                self.__search_index.add_view(pref_view) # index the preference view for the search bar
                 row_num += 1
 
         # resize the canvas to fit the preference list (IMPORTANT)
@@ -200,41 +203,42 @@ class PrefPage():
         """
         # check if the search string is not the same as the last search string
         if self.search_str.get().lower() != self.__search_string:
-            self.__search_locs = [] # reset the search locations
             self.__search_string = self.search_str.get().lower() # retrieve the search string
-            
-            self.__current_frame_height = 0 # reset the current frame height
-            # for each preference view, search for the search string
-            for pref_view in self.__pref_view_list:
-                item_num = 0 # reset the item number
-                for item_id in pref_view.find_all():
-                    tag_name = pref_view.itemcget(item_id, "tags") # get the tag name of the item
-                    if self.__search_string in tag_name and tag_name.endswith("_left"): # if the search string is in the tag name and the tag name ends with _left
-                        location = self.__current_frame_height+34+(30*item_num)
-                        item = (pref_view, item_id, location) # create a tuple of the preference view, item id, and location
-                        self.__search_locs.append(item) # add the current frame height to the search locations
-                    elif tag_name.endswith("_left"): # if the tag name ends with _left but the search string is not in the tag name
-                        item_num += 1 # increment the item number
-                self.__current_frame_height += pref_view.winfo_reqheight() # add the preference view height to the current frame height
-
-        # if search_string is empty, reset the view
+            self.__search_locs = self.__search_index.search(self.__search_string) # look up the search string in the index
+
+        # set the color of the previously found item back to white
+        if self.__found_item is not None:
+            self.__found_item.view.itemconfigure(self.__found_item.item_id, fill="#ffffff")
+            self.__found_item = None
+
+        # if search_string is empty or not found, reset the view
         if not self.__search_string or not self.__search_locs:
-            if self.__search_locs:
-                prev_item = self.__search_locs[-1] # get the last item in the search locations
-                prev_item[0].itemconfigure(prev_item[1], fill="#ffffff") # set the item color to yellow
             self.canvas.yview_moveto(self.origY) # move the canvas to the original y position
         else:
             current_item = self.__search_locs[0] # get the first item in the search locations
-            current_item[0].itemconfigure(current_item[1], fill="yellow") # set the item color to yellow
-            
-            # if there is a previous item, set the color back to white
-            if len(self.__search_locs) > 1:
-                prev_item = self.__search_locs[-1] # get the last item in the search locations
-                prev_item[0].itemconfigure(prev_item[1], fill="#ffffff") # set the item color to yellow
-
-            self.canvas.yview_moveto(current_item[2]/self.__current_frame_height if self.__current_frame_height else 0) # move the canvas to the next found location
+            current_item.view.itemconfigure(current_item.item_id, fill="yellow") # set the item color to yellow
+            self.__found_item = current_item
+
+            list_height = self.__search_index.height
+            self.canvas.yview_moveto(current_item.location/list_height if list_height else 0) # move the canvas to the next found location
             self.__search_locs.append(self.__search_locs.pop(0)) # move the first search location to the end of the list
 
+    def __on_pref_change(self, section: str, key: str, value: str):
+        """
+        Update the search index after a preference is edited.
+
+        Parameters
+        ----------
+        section : str
+            The section of the preference.
+        key : str
+            The name of the preference.
+        value : str
+            The new value of the preference.
+        """
+        self.__search_index.update_value(section, key, value)
+        self.__search_string = '' # the next search is looked up again
+
     def __unbound_to_mousewheel(self, _):
         """ Unbind the mousewheel to the canvas """
         self.canvas.unbind_all("<MouseWheel>")
@@ -0,0 +1,147 @@
+""" Search index of the preference page. """
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from app.preference_view.pref_view import PreferenceView
+
+class PrefSearchEntry():
+    """ Searchable row of a preference view: a setting, or the title of its section. """
+
+    def __init__(self, view: PreferenceView, item_id: int, section: str, key: str, value: str, location: int):
+        """
+        Initialize the search entry.
+
+        Parameters
+        ----------
+        view : PreferenceView
+            The preference view holding the row.
+        item_id : int
+            The canvas id of the label of the row.
+        section : str
+            The name of the section.
+        key : str
+            The name of the setting, None for the title of the section.
+        value : str
+            The value of the setting, None for the title of the section.
+        location : int
+            The y offset of the row in the preference list.
+        """
+        self.view = view # preference view holding the row
+        self.item_id = item_id # canvas id of the label
+        self.section = section # name of the section
+        self.key = key # name of the setting
+        self.location = location # y offset in the preference list
+        self.section_text = section.lower() if key is None else '' # searched section name, on the title only
+        self.key_text = key.lower() if key is not None else '' # searched setting name
+        self.value_text = '' # searched value
+        self.set_value(value)
+
+    def set_value(self, value: str):
+        """
+        Update the value of the setting.
+
+        Parameters
+        ----------
+        value : str
+            The new value.
+        """
+        self.value_text = value.lower() if value is not None else ''
+
+class PrefSearchIndex():
+    """
+    Index of the preference views for the search bar, built once with the page.
+    Results are ordered by relevance: setting names starting with the searched text,
+    then setting names, section names and values containing it, each group in page order.
+    """
+
+    def __init__(self):
+        """ Initialize an empty search index. """
+        self.__entries: list[PrefSearchEntry] = [] # entries in page order
+        self.__settings: dict[tuple[str, str], PrefSearchEntry] = {} # setting entries by (section, key)
+        self.__sorted_keys: list[tuple[str, int]] = [] # (setting name, entry index) sorted for prefix lookups
+        self.__height = 0 # total height of the indexed views
+
+    @property
+    def height(self) -> int:
+        """ Total height of the indexed preference views. """
+        return self.__height
+
+    def add_view(self, view: PreferenceView):
+        """
+        Index the section title and the settings of a preference view, placed after the previous views.
+
+        Parameters
+        ----------
+        view : PreferenceView
+            The preference view to index.
+        """
+        offset = self.__height
+        self.__append(PrefSearchEntry(view, view.title_id, view.name, None, None, offset))
+        for key, item_id, row_y in view.rows:
+            entry = PrefSearchEntry(view, item_id, view.name, key, view.get_value(key), offset+row_y)
+            self.__settings[(view.name, key)] = entry
+            self.__append(entry)
+        self.__sorted_keys.sort()
+        self.__height += view.winfo_reqheight()
+
+    def update_value(self, section: str, key: str, value: str):
+        """
+        Update the indexed value of a setting after an edit.
+
+        Parameters
+        ----------
+        section : str
+            The name of the section.
+        key : str
+            The name of the setting.
+        value : str
+            The new value.
+        """
+        entry = self.__settings.get((section, key))
+        if entry is not None:
+            entry.set_value(value)
+
+    def search(self, text: str) -> list[PrefSearchEntry]:
+        """
+        Find the rows matching the searched text.
+
+        Parameters
+        ----------
+        text : str
+            The searched text.
+
+        Returns
+        -------
+        list[PrefSearchEntry]
+            The matching rows, by relevance.
+        """
+        text = text.lower()
+        if not text:
+            return []
+        # setting names starting with the text are a contiguous range of the sorted names
+        prefix_ids: list[int] = []
+        pos = bisect_left(self.__sorted_keys, (text, -1))
+        while pos < len(self.__sorted_keys) and self.__sorted_keys[pos][0].startswith(text):
+            prefix_ids.append(self.__sorted_keys[pos][1])
+            pos += 1
+        prefix_ids.sort()
+        found = set(prefix_ids)
+        key_matches: list[PrefSearchEntry] = []
+        other_matches: list[PrefSearchEntry] = []
+        for idx, entry in enumerate(self.__entries):
+            if idx in found:
+                continue
+            if text in entry.key_text:
+                key_matches.append(entry)
+            elif text in entry.section_text or text in entry.value_text:
+                other_matches.append(entry)
+        return [self.__entries[idx] for idx in prefix_ids] + key_matches + other_matches
+
+    def __append(self, entry: PrefSearchEntry):
+        """ Add an entry at the end of the page order. """
+        if entry.key is not None:
+            self.__sorted_keys.append((entry.key_text, len(self.__entries)))
+        self.__entries.append(entry)
@@ -1,7 +1,7 @@
 """ Individual section of the config file. """
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable
 import customtkinter
 from settings import ConstSettings
 from app.common_view.widget_utils import init_placeholder
@@ -13,7 +13,8 @@ class PreferenceView(customtkinter.CTkCanvas):
     """ Preference view displaying individual sections of the config file. """
     WINDOW_WIDTH = 780 # width of the window
 
-    def __init__(self, parent: customtkinter.CTkFrame, save_button: customtkinter.CTkButton, name: str, items: SectionProxy, config_changes: dict):
+    def __init__(self, parent: customtkinter.CTkFrame, save_button: customtkinter.CTkButton, name: str, items: SectionProxy, config_changes: dict,
+                 on_change: Callable[[str, str, str], None] = None):
         """
         Initialize the preference view.
 
@@ -29,6 +30,8 @@ class PreferenceView(customtkinter.CTkCanvas):
             The items in the section.
         config_changes : dict
             The changes to the config file.
+        on_change : Callable[[str, str, str], None], optional
+            Called with the section, the setting and its new value when a setting is edited, by default None
 
         Returns
         -------
@@ -39,6 +42,8 @@ class PreferenceView(customtkinter.CTkCanvas):
         self.__items = items # the items in the section
         self.__name = name # the name of the section
         self.__var_info = {} # the variable info
+        self.__rows: list[tuple[str, int, int]] = [] # the label id and y offset of each setting
+        self.__on_change = on_change # the listener of the edits
 
         self.save_button = save_button # the save button
         self.config_changes = config_changes # the changes to the config file
@@ -49,7 +54,7 @@ class PreferenceView(customtkinter.CTkCanvas):
         self.grid_propagate(True)
         
         # write the section name as a text
-        self.create_text(560//2, 16, anchor="center", text=f"{name} Preference", font=("Roboto Medium", 16), fill="#ffffff", tags=name)
+        self.__title_id = self.create_text(560//2, 16, anchor="center", text=f"{name} Preference", font=("Roboto Medium", 16), fill="#ffffff", tags=name)
         _, title_y0, _, title_y1 = self.bbox(name) # get the y coordinates of the title text
         margin_title = 5 # the margin between the title and the rectangle
         # create a rectangle around the title
@@ -61,7 +66,8 @@ class PreferenceView(customtkinter.CTkCanvas):
         retrieve_changes_func = parent.register(self.__retrieve_changes) # register the function to retrieve the changes
         for idx, item in enumerate(self.__items.keys()):
             # create a label for the item
-            self.create_text(560//3.5, rect_y1+margin_item+idx*30, anchor="center", text=item, font=("Roboto Medium", 10), fill="#ffffff", tags=f'{item}_left')
+            label_id = self.create_text(560//3.5, rect_y1+margin_item+idx*30, anchor="center", text=item, font=("Roboto Medium", 10), fill="#ffffff", tags=f'{item}_left')
+            self.__rows.append((item, label_id, rect_y1+margin_item+idx*30))
 
             # create an entry box for the item
             self.__var_info[item] = {} # initialize the variable info
@@ -79,6 +85,37 @@ class PreferenceView(customtkinter.CTkCanvas):
         # set the canvas's height to the items within it
         self.configure(height=len(self.__items.keys())*30+rect_y1)
 
+    @property
+    def name(self) -> str:
+        """ The name of the section. """
+        return self.__name
+
+    @property
+    def title_id(self) -> int:
+        """ The canvas id of the section title. """
+        return self.__title_id
+
+    @property
+    def rows(self) -> list[tuple[str, int, int]]:
+        """ The name, label id and y offset of each setting. """
+        return self.__rows
+
+    def get_value(self, sub_key: str) -> str:
+        """
+        Get the value of a setting, with its pending change if any.
+
+        Parameters
+        ----------
+        sub_key : str
+            The name of the setting.
+
+        Returns
+        -------
+        str
+            The value of the setting.
+        """
+        return self.config_changes.get(self.__name, {}).get(sub_key, self.__items[sub_key])
+
     def __retrieve_changes(self, changed_val: str, main_key: str, sub_key: str) -> bool:
         """
         Retrieve the changes made to the entry box.
@@ -131,6 +168,8 @@ class PreferenceView(customtkinter.CTkCanvas):
             if not list(self.config_changes.keys()): # if the config changes is empty
                 if self.save_button.cget('state') == customtkinter.NORMAL: # if the save button is enabled, disable it
                     self.save_button.configure(state=customtkinter.DISABLED)
+        if self.__on_change: # notify the listener with the current value of the setting
+            self.__on_change(main_key, sub_key, self.get_value(sub_key))
         return True
 
     def clear_fields(self):
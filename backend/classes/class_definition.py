@@ -91,8 +91,12 @@ class ClassInstance():
         index = self.__class_def.sorted_attributes.index(attribute)
         self.__values[index] = value
 
+    def set_attr_vals(self, values: list[object]) -> None:
+        assert len(values) == len(self.__values)
+        self.__values[:] = values
+
     def get_attr_val(self, attribute: AttributeDefinition = None, attr_name: str = None, index: int = None) -> object:
-        if index >= 0:
+        if index is not None and index >= 0:
             return self.__values[index]
         if attribute:
             index = self.__class_def.sorted_attributes.index(attribute)
@@ -12,7 +12,6 @@ from backend.classes.geo_data import (AchievableGeoData, AchievableGeoDataItem,
 from backend.common.data_types import BitSet, Position
 from backend.common.vault_data import VaultDescriptor, VaultItemDescriptor
 from backend.managers.strings_manager import StringsManager
-from backend.properties.dbprops_loader import DBPropertiesLoader
 from backend.properties.properties_set import Properties
 from backend.properties.properties_val import PropertyValue
 from backend.reference.data_ref import DataIdentification, DataReference
@@ -29,6 +28,22 @@ class WStateClassLoader(Generic[RESULT]):
     def decode_data(self, ins: io.BytesIO):
         pass
 
+    def skip_data(self, ins: io.BytesIO) -> None:
+        # Moves the stream past a value without keeping it, loaders of sized data skip without decoding
+        self.decode_data(ins)
+
+def skip_table(ins: io.BytesIO, entry_size: int) -> None:
+    count = Utils.read_tsize(ins)
+    Utils.skip(ins, count * entry_size)
+
+def skip_hash_set(ins: io.BytesIO, entry_size: int) -> None:
+    count, _ = struct.unpack('<2H', ins.read(4))
+    Utils.skip(ins, count * entry_size)
+
+def skip_prefixed_array(ins: io.BytesIO, entry_size: int) -> None:
+    count = Utils.read_uint32(ins)
+    Utils.skip(ins, count * entry_size)
+
 
 class AAHashLoader(WStateClassLoader):
     def __init__(self, use_ref: bool = False) -> None:
@@ -45,6 +60,9 @@ class AAHashLoader(WStateClassLoader):
             result[key] = map_val
         return result
 
+    def skip_data(self, ins: io.BytesIO) -> None:
+        skip_table(ins, 8)
+
 
 class AAMultiHashLoader(WStateClassLoader):
     def __init__(self, use_ref: bool = False) -> None:
@@ -61,6 +79,9 @@ class AAMultiHashLoader(WStateClassLoader):
             result[key].append(map_val)
         return result
 
+    def skip_data(self, ins: io.BytesIO) -> None:
+        skip_table(ins, 8)
+
 
 class AArrayLoader(WStateClassLoader):
     def __init__(self, use_ref: bool = False) -> None:
@@ -75,6 +96,9 @@ class AArrayLoader(WStateClassLoader):
             result.append(map_val)
         return result
 
+    def skip_data(self, ins: io.BytesIO) -> None:
+        skip_prefixed_array(ins, 4)
+
 
 class AHashSetLoader(WStateClassLoader):
     def decode_data(self, ins: io.BytesIO) -> set[object]:
@@ -85,6 +109,9 @@ class AHashSetLoader(WStateClassLoader):
             result.add(value)
         return result
 
+    def skip_data(self, ins: io.BytesIO) -> None:
+        skip_hash_set(ins, 4)
+
 
 class ALHashLoader(WStateClassLoader):
     def decode_data(self, ins: io.BytesIO) -> dict[int, int]:
@@ -96,6 +123,9 @@ class ALHashLoader(WStateClassLoader):
             result[key] = val
         return result
 
+    def skip_data(self, ins: io.BytesIO) -> None:
+        skip_table(ins, 12)
+
 
 class AListLoader(WStateClassLoader):
     def __init__(self, use_ref: bool = False) -> None:
@@ -110,6 +140,9 @@ class AListLoader(WStateClassLoader):
             result.append(map_val)
         return result
 
+    def skip_data(self, ins: io.BytesIO) -> None:
+        skip_prefixed_array(ins, 4)
+
 
 class ARHashLoader(WStateClassLoader):
     def __init__(self, use_ref: bool = False) -> None:
@@ -126,6 +159,9 @@ class ARHashLoader(WStateClassLoader):
             result[key] = map_val
         return result
 
+    def skip_data(self, ins: io.BytesIO) -> None:
+        skip_table(ins, 8)
+
 
 class ARMultiHashLoader(WStateClassLoader):
     def __init__(self, use_ref: bool = False) -> None:
@@ -142,6 +178,9 @@ class ARMultiHashLoader(WStateClassLoader):
             result[key].append(map_val)
         return result
 
+    def skip_data(self, ins: io.BytesIO) -> None:
+        skip_table(ins, 8)
+
 
 class LAHashLoader(WStateClassLoader):
     def decode_data(self, ins: io.BytesIO) -> dict[int, int]:
@@ -153,6 +192,9 @@ class LAHashLoader(WStateClassLoader):
             result[key] = val
         return result
 
+    def skip_data(self, ins: io.BytesIO) -> None:
+        skip_table(ins, 12)
+
 
 class LArrayLoader(WStateClassLoader):
     def decode_data(self, ins: io.BytesIO) -> list[int]:
@@ -160,6 +202,9 @@ class LArrayLoader(WStateClassLoader):
         return [struct.unpack('<q', ins.read(8))[0]
                       for _ in range(count)]
 
+    def skip_data(self, ins: io.BytesIO) -> None:
+        skip_prefixed_array(ins, 8)
+
 
 class LHashSetLoader(WStateClassLoader):
     def decode_data(self, ins: io.BytesIO) -> list[int]:
@@ -167,11 +212,17 @@ class LHashSetLoader(WStateClassLoader):
         return [struct.unpack('<q', ins.read(8))[0]
                       for _ in range(count)]
 
+    def skip_data(self, ins: io.BytesIO) -> None:
+        skip_hash_set(ins, 8)
+
 
 class LListLoader(WStateClassLoader):
     def decode_data(self, ins: io.BytesIO) -> list[int]:
         return list(Utils.read_prefixed_array(ins, 'L', 'L'))
 
+    def skip_data(self, ins: io.BytesIO) -> None:
+        skip_prefixed_array(ins, 4)
+
 
 class LRHashLoader(WStateClassLoader):
     def __init__(self, use_ref: bool = False) -> None:
@@ -188,6 +239,9 @@ class LRHashLoader(WStateClassLoader):
             result[key] = map_val
         return result
 
+    def skip_data(self, ins: io.BytesIO) -> None:
+        skip_table(ins, 12)
+
 
 class NAHashLoader(WStateClassLoader):
     def decode_data(self, ins: io.BytesIO) -> list[list[object]]:
@@ -204,6 +258,9 @@ class NAHashLoader(WStateClassLoader):
             result.append(item)
         return result
 
+    def skip_data(self, ins: io.BytesIO) -> None:
+        skip_table(ins, 12)
+
 
 class NHashSetLoader(WStateClassLoader):
     def decode_data(self, ins: io.BytesIO) -> str:
@@ -212,6 +269,9 @@ class NHashSetLoader(WStateClassLoader):
                       for _ in range(count)]
         return 'NHashSet: size='+count
 
+    def skip_data(self, ins: io.BytesIO) -> None:
+        skip_hash_set(ins, 9)
+
 
 class NRHashLoader(WStateClassLoader):
     def decode_data(self, ins: io.BytesIO) -> list[list[object]]:
@@ -228,24 +288,32 @@ class NRHashLoader(WStateClassLoader):
             result.append(item)
         return result
 
+    def skip_data(self, ins: io.BytesIO) -> None:
+        skip_table(ins, 12)
+
 
 class RArrayLoader(WStateClassLoader):
     def decode_data(self, ins: io.BytesIO) -> list[int]:
         return list(Utils.read_prefixed_array(ins, 'L', 'l'))
 
+    def skip_data(self, ins: io.BytesIO) -> None:
+        skip_prefixed_array(ins, 4)
+
 
 class RListLoader(WStateClassLoader):
     def decode_data(self, ins: io.BytesIO) -> list[int]:
         return list(Utils.read_prefixed_array(ins, 'L', 'l'))
 
+    def skip_data(self, ins: io.BytesIO) -> None:
+        skip_prefixed_array(ins, 4)
+
 class BasePropertyLoader(WStateClassLoader):
     def __init__(self, facade: DataFacade) -> None:
         super().__init__()
         self.__facade = facade
 
     def decode_data(self, ins: io.BytesIO) -> PropertyValue:
-        loader: DBPropertiesLoader = DBPropertiesLoader(self.__facade)
-        return loader.decode_property(ins, True)
+        return self.__facade.get_properties_loader().decode_property(ins, True)
 
 class DynamicBitsetLoader(WStateClassLoader):
     def decode_data(self, ins: io.BytesIO) -> BitSet:
@@ -255,6 +323,9 @@ class PositionLoader(WStateClassLoader):
     def decode_data(self, ins: io.BytesIO) -> Position:
         return Position.from_dat(ins)
 
+    def skip_data(self, ins: io.BytesIO) -> None:
+        Position.skip_dat(ins)
+
 class PropertiesLoader(WStateClassLoader):
     def __init__(self, facade: DataFacade) -> None:
         super().__init__()
@@ -262,8 +333,7 @@ class PropertiesLoader(WStateClassLoader):
 
     def decode_data(self, ins: io.BytesIO) -> Properties:
         result: Properties = Properties()
-        loader: DBPropertiesLoader = DBPropertiesLoader(self.__facade)
-        loader.decode_properties(ins, result)
+        self.__facade.get_properties_loader().decode_properties(ins, result)
         return result
 
 class RandomSelectionTableLoader(WStateClassLoader):
@@ -278,6 +348,10 @@ class RandomSelectionTableLoader(WStateClassLoader):
         assert Utils.read_uint32(ins) == 0
         return result
 
+    def skip_data(self, ins: io.BytesIO) -> None:
+        count = Utils.read_uint32(ins)
+        Utils.skip(ins, count * 12 + 4)
+
 class StringInfoLoader(WStateClassLoader):
     def __init__(self, facade: DataFacade) -> None:
         super().__init__()
@@ -288,10 +362,17 @@ class StringInfoLoader(WStateClassLoader):
         str_manager: StringsManager = self.__facade.get_strings_manager()
         return StringInfoUtils.render_string_info(str_manager, str_info)
 
+    def skip_data(self, ins: io.BytesIO) -> None:
+        # Rendering is the costly part, the string info itself is cheap to read
+        PropertiesUtils.read_string_info(ins)
+
 class StringLoader(WStateClassLoader):
     def decode_data(self, ins: io.BytesIO) -> str:
         return Utils.read_prefixed_utf16(ins)
 
+    def skip_data(self, ins: io.BytesIO) -> None:
+        Utils.skip(ins, Utils.read_vle(ins) * 2)
+
 class DiscoveredMapNoteDataLoader(WStateClassLoader):
     def decode_data(self, ins: io.BytesIO) -> BitSet:
         buffer_size = Utils.read_uint32(ins)
@@ -306,8 +387,11 @@ class DiscoveredMapNoteDataLoader(WStateClassLoader):
                                    zlib.Z_DEFAULT_STRATEGY,
                                    packed_size))
         assert len(decompressed_buffer) == unpacked_size
-        nb_bits = packed_size * 8
-        return BitSet.from_stream(ins, nb_bits)
+        return BitSet.from_bytes(decompressed_buffer)
+
+    def skip_data(self, ins: io.BytesIO) -> None:
+        buffer_size = Utils.read_uint32(ins)
+        Utils.skip(ins, buffer_size)
 
 class GameplayOptionsProfileLoader(WStateClassLoader):
     def decode_data(self, ins: io.BytesIO) -> None:
@@ -380,6 +464,39 @@ class QuestEventTargetLocationLoader(WStateClassLoader):
         self.__decode_quest_entries(data, ins)
         return data
 
+    def skip_data(self, ins: io.BytesIO) -> None:
+        # Walks the geo data layout without building positions nor identifying DIDs
+        count = Utils.read_tsize(ins)
+        for _ in range(count):
+            _, num_positions = struct.unpack('<2L', ins.read(8))
+            for _ in range(num_positions):
+                Position.skip_dat(ins)
+                Utils.skip(ins, 5)
+        assert Utils.read_uint32(ins) == 7
+        for _ in range(7):
+            nb_arrays = Utils.read_tsize(ins)
+            for _ in range(nb_arrays):
+                Utils.skip(ins, 4)
+                skip_prefixed_array(ins, 4)
+        count = Utils.read_tsize(ins)
+        for _ in range(count):
+            _, num_positions = struct.unpack('<2L', ins.read(8))
+            for _ in range(num_positions):
+                Position.skip_dat(ins)
+                Utils.skip(ins, 5)
+                skip_prefixed_array(ins, 4)
+        count = Utils.read_tsize(ins)
+        for _ in range(count):
+            Utils.skip(ins, 4)
+            nb_objectives = Utils.read_tsize(ins)
+            for _ in range(nb_objectives):
+                Utils.skip(ins, 4)
+                conditions_count = Utils.read_uint32(ins)
+                for _ in range(conditions_count):
+                    entries_count = Utils.read_uint32(ins)
+                    for _ in range(entries_count):
+                        self.__skip_quest_entry(ins)
+
     def __decode_content_layer_position_map(self, data: GeoData, ins: io.BytesIO) -> None:
         count = Utils.read_tsize(ins)
         for _ in range(count):
@@ -453,6 +570,18 @@ class QuestEventTargetLocationLoader(WStateClassLoader):
             result = AchievableGeoDataItem(str1, str2, did, position)
         return result
 
+    def __skip_quest_entry(self, ins: io.BytesIO) -> None:
+        Utils.skip(ins, 4)
+        Position.skip_dat(ins)
+        Utils.skip(ins, 4)
+        Utils.skip(ins, Utils.read_vle(ins))
+        count = Utils.read_uint32(ins)
+        for _ in range(count):
+            # One uint32 follows for each of the 7 genus flags
+            flags = ord(ins.read(1)) & 0x7F
+            Utils.skip(ins, 4 * bin(flags).count('1'))
+        Utils.skip(ins, Utils.read_vle(ins))
+
     def __read_quest_genus_struct(self, ins: io.BytesIO) -> None:
         flags = ord(ins.read(1))
         if flags & 0x01: m_eGenusType, = struct.unpack('<L', ins.read(4))
@@ -511,6 +640,13 @@ class BankRepositoryDataLoader(WStateClassLoader):
         result.set_state(current_quantity, total_capacity)
         return result
 
+    def skip_data(self, ins: io.BytesIO) -> None:
+        size = Utils.read_tsize(ins)
+        for _ in range(size):
+            Utils.skip(ins, 4)
+            Utils.skip(ins, Utils.read_vle(ins) * 2)
+        Utils.skip(ins, 8)
+
 class GenericLoader(WStateClassLoader):
     def __init__(self, code: str) -> None:
         super().__init__()
@@ -520,6 +656,12 @@ class GenericLoader(WStateClassLoader):
         size = struct.calcsize(self.__code)
         return list(struct.unpack('<{}'.format(self.__code), ins.read(size)))
 
+    def skip_data(self, ins: io.BytesIO) -> None:
+        Utils.skip(ins, struct.calcsize(self.__code))
+
 class BankTypeLoader(WStateClassLoader):
     def decode_data(self, ins: io.BytesIO) -> int:
-        return Utils.read_uint32(ins)
\ No newline at end of file
+        return Utils.read_uint32(ins)
+
+    def skip_data(self, ins: io.BytesIO) -> None:
+        Utils.skip(ins, 4)
\ No newline at end of file
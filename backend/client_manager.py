@@ -0,0 +1,237 @@
+"""
+ClientManager class used to sync every running game client at once.
+"""
+from __future__ import annotations
+
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import os
+from typing import TYPE_CHECKING
+
+import psutil
+
+from backend.char_data import CharData
+from backend.client_watcher import ClientWatcher
+from backend.common.config import AppConfig, Client_Status, GameConfig
+from backend.data_extractor import DataExtractor
+from backend.data_facade import DataFacade
+
+if TYPE_CHECKING:
+    from database.db_conn import UploadQueue
+
+class ClientManager():
+    """
+    Discovers the running game clients and keeps one GameConfig and one DataExtractor per process id.
+    The clients of an install share one DataFacade, the DAT files being the same for all of them.
+    """
+    def __init__(self, app_config: AppConfig, debug: bool = False, upload_queue: UploadQueue = None) -> None:
+        """
+        Initialize the ClientManager class.
+        :param app_config: The application config.
+        :type app_config: AppConfig
+        :param debug: Whether to enable debug mode or not.
+        :type debug: bool
+        :param upload_queue: The queue uploading the characters of every client, None to not upload them.
+        :type upload_queue: UploadQueue
+        :returns: None
+        """
+        self.__app_config: AppConfig = app_config
+        self.__debug: bool = debug
+        self.__configs: dict[int, GameConfig] = {} # The attached clients, by process id.
+        self.__extractors: dict[int, DataExtractor] = {} # The extractor of each attached client.
+        self.__data_facades: dict[str, DataFacade] = {} # The facade shared by the clients of an install, by install directory.
+        self.__upload_queue: UploadQueue = upload_queue # The uploads of all the clients share one queue and session.
+        self.__failed: dict[int, Client_Status] = {} # The clients which could not be attached, not retried while running.
+        self.__lock = threading.RLock()
+
+    @property
+    def pids(self) -> list[int]:
+        """
+        Get the process ids of the attached clients.
+        :returns: The process ids.
+        :rtype: list[int]
+        """
+        with self.__lock:
+            return sorted(self.__configs)
+
+    @property
+    def client_status(self) -> Client_Status:
+        """
+        Get the status of the clients: running once a client is attached, else the error of the last failed client.
+        :returns: The client status.
+        :rtype: Client_Status
+        """
+        with self.__lock:
+            if self.__configs:
+                return Client_Status.RUNNING
+            if self.__failed:
+                return next(reversed(self.__failed.values()))
+            return Client_Status.NOT_FOUND
+
+    def get_config(self, pid: int) -> GameConfig:
+        with self.__lock:
+            return self.__configs.get(pid)
+
+    def get_extractor(self, pid: int) -> DataExtractor:
+        with self.__lock:
+            return self.__extractors.get(pid)
+
+    def discover(self) -> tuple[list[int], list[int]]:
+        """
+        Attach to the new clients and detach from the ones which are not running anymore.
+        :returns: The process ids of the attached and detached clients.
+        :rtype: tuple[list[int], list[int]]
+        """
+        running: dict[int, re.Match] = {proc.pid: name_match for proc, name_match in ClientWatcher.iter_clients()}
+        # The memory scans and the sync threads joins are done outside of the lock
+        with self.__lock:
+            detached: list[int] = [pid for pid in self.__configs if pid not in running]
+            for pid in [pid for pid in self.__failed if pid not in running]:
+                del self.__failed[pid]
+            new_clients: list[tuple[int, re.Match]] = [(pid, name_match) for pid, name_match in running.items()
+                                                       if pid not in self.__configs and pid not in self.__failed]
+        for pid in detached:
+            self.detach(pid)
+        attached: list[int] = [pid for pid, name_match in new_clients if self.attach(pid, name_match)]
+        return attached, detached
+
+    def attach(self, pid: int, name_match: re.Match) -> bool:
+        """
+        Attach to a client process.
+        :param pid: The process id of the client.
+        :type pid: int
+        :param name_match: The match of the client name.
+        :type name_match: re.Match
+        :returns: Whether the client could be attached.
+        :rtype: bool
+        """
+        config: GameConfig = GameConfig(self.__app_config, self.__debug)
+        try:
+            config.set_address(name_match, pid)
+        except Exception: # pylint: disable=broad-except
+            # Already logged by the config
+            pass
+        if config.client_status != Client_Status.RUNNING:
+            # Reading the memory of this process would fail again (e.g. missing admin rights)
+            with self.__lock:
+                self.__failed[pid] = config.client_status
+            return False
+        install_dir = self.__get_install_dir(pid, config)
+        with self.__lock:
+            if pid in self.__configs:
+                # Attached meanwhile by another discovery
+                config.close_mem()
+                return False
+            data_facade = self.__data_facades.get(install_dir)
+            if data_facade is None:
+                data_facade = DataFacade(config, client_dir=install_dir)
+                self.__data_facades[install_dir] = data_facade
+            self.__configs[pid] = config
+            sync_time = self.__app_config.get_config('sync', 'interval')
+            self.__extractors[pid] = DataExtractor(config, sync_time, upload_queue=self.__upload_queue, data_facade=data_facade)
+        if self.__debug:
+            logging.info('Attached to client %d', pid)
+        return True
+
+    def detach(self, pid: int) -> None:
+        """
+        Stop syncing a client and release its process.
+        :param pid: The process id of the client.
+        :type pid: int
+        :returns: None
+        """
+        with self.__lock:
+            config: GameConfig = self.__configs.pop(pid, None)
+            extractor: DataExtractor = self.__extractors.pop(pid, None)
+        if extractor and extractor.sync_enabled():
+            extractor.stop_sync()
+        if config:
+            try:
+                config.close_mem()
+            except Exception: # pylint: disable=broad-except
+                pass
+        if self.__debug:
+            logging.info('Detached from client %d', pid)
+
+    def close(self) -> None:
+        """
+        Detach from every client.
+        :returns: None
+        """
+        for pid in self.pids:
+            self.detach(pid)
+
+    def sync_enabled(self) -> bool:
+        """
+        Check whether a client is being synced.
+        :returns: Whether a sync is running.
+        :rtype: bool
+        """
+        with self.__lock:
+            extractors = list(self.__extractors.values())
+        return any(extractor.sync_enabled() for extractor in extractors)
+
+    def sync_all(self) -> None:
+        """
+        Start the periodic sync of every attached client, each one on its own threads.
+        :returns: None
+        """
+        with self.__lock:
+            extractors = list(self.__extractors.values())
+        for extractor in extractors:
+            if not extractor.sync_enabled():
+                extractor.sync()
+
+    def stop_all(self) -> None:
+        """
+        Stop the periodic sync of every attached client.
+        :returns: None
+        """
+        with self.__lock:
+            extractors = list(self.__extractors.values())
+        for extractor in extractors:
+            if extractor.sync_enabled():
+                extractor.stop_sync()
+
+    def extract_all(self) -> dict[int, CharData]:
+        """
+        Extract the current character of every attached client, in parallel.
+        :returns: The character data of each client, by process id.
+        :rtype: dict[int, CharData]
+        """
+        with self.__lock:
+            configs = dict(self.__configs)
+            data_facades = {pid: extractor.get_data_facade() for pid, extractor in self.__extractors.items()}
+        if not configs:
+            return {}
+        with ThreadPoolExecutor(max_workers=len(configs), thread_name_prefix="Client Extract") as executor:
+            futures = {pid: executor.submit(CharData(config, data_facades[pid]).parse_char) for pid, config in configs.items()}
+        result: dict[int, CharData] = {}
+        for pid, future in futures.items():
+            try:
+                result[pid] = future.result()
+            except Exception as exp: # pylint: disable=broad-except
+                logging.error('Could not extract client %d: %s', pid, exp)
+        return result
+
+    @staticmethod
+    def __get_install_dir(pid: int, config: GameConfig) -> str:
+        """
+        Get the install directory of a client, from its executable.
+        :param pid: The process id of the client.
+        :type pid: int
+        :param config: The config of the client, its directory is used if the executable cannot be read.
+        :type config: GameConfig
+        :returns: The install directory.
+        :rtype: str
+        """
+        try:
+            exe_dir = os.path.dirname(psutil.Process(pid).exe())
+        except (psutil.Error, OSError):
+            return os.path.normcase(os.path.abspath(config.lotro_client_dir))
+        # The 64 bits client is in the x64 folder of the install
+        if os.path.basename(exe_dir).lower() == 'x64':
+            exe_dir = os.path.dirname(exe_dir)
+        return os.path.normcase(exe_dir)
@@ -0,0 +1,98 @@
+"""
+ClientWatcher class used to follow the game client process.
+"""
+from __future__ import annotations
+
+import logging
+import re
+from typing import Callable, Iterator
+
+import psutil
+
+class ClientWatcher():
+    """
+    Follows one game client process. Once a client is found, only that process is checked,
+    the processes are scanned again when it exits. Listeners are called on attach and detach.
+    """
+    CLIENT_PREFIX = "lotroclient" # Cheap filter on the process names before the regex.
+    CLIENT_PATTERN = re.compile("lotroclient(64)*.exe") # Regex to match the game client exe.
+
+    def __init__(self, debug: bool = False) -> None:
+        """
+        Initialize the ClientWatcher class.
+        :param debug: Whether to enable debug mode or not.
+        :type debug: bool
+        :returns: None
+        """
+        self.__debug: bool = debug
+        self.__process: psutil.Process = None # The followed client process.
+        self.__attach_listeners: list[Callable[[int, re.Match], None]] = []
+        self.__detach_listeners: list[Callable[[int], None]] = []
+
+    @property
+    def pid(self) -> int:
+        """
+        Get the process id of the followed client.
+        :returns: The process id, None if no client is followed.
+        :rtype: int
+        """
+        return self.__process.pid if self.__process else None
+
+    def add_attach_listener(self, listener: Callable[[int, re.Match], None]) -> None:
+        """
+        Add a listener called with the process id and the name match of a new client.
+        :param listener: The listener.
+        :type listener: Callable[[int, re.Match], None]
+        :returns: None
+        """
+        self.__attach_listeners.append(listener)
+
+    def add_detach_listener(self, listener: Callable[[int], None]) -> None:
+        """
+        Add a listener called with the process id of a client which exited.
+        :param listener: The listener.
+        :type listener: Callable[[int], None]
+        :returns: None
+        """
+        self.__detach_listeners.append(listener)
+
+    def poll(self) -> int:
+        """
+        Check the followed client, or look for one if there is none.
+        :returns: The process id of the followed client, None if no client is running.
+        :rtype: int
+        """
+        if self.__process is not None:
+            # is_running also detects a process id reused by another process
+            if self.__process.is_running():
+                return self.__process.pid
+            pid = self.__process.pid
+            self.__process = None
+            if self.__debug:
+                logging.info('Client %d exited', pid)
+            for listener in self.__detach_listeners:
+                listener(pid)
+        for proc, name_match in ClientWatcher.iter_clients():
+            self.__process = proc
+            if self.__debug:
+                logging.info('Found client %d', proc.pid)
+            for listener in self.__attach_listeners:
+                listener(proc.pid, name_match)
+            return proc.pid
+        return None
+
+    @staticmethod
+    def iter_clients() -> Iterator[tuple[psutil.Process, re.Match]]:
+        """
+        Scan the processes for game clients.
+        :returns: The client processes with the match of their name.
+        :rtype: Iterator[tuple[psutil.Process, re.Match]]
+        """
+        # Only the names are fetched, the other process infos are never read
+        for proc in psutil.process_iter(attrs=['name']):
+            name = proc.info['name']
+            if not name: continue
+            name = name.lower()
+            if not name.startswith(ClientWatcher.CLIENT_PREFIX): continue
+            name_match = ClientWatcher.CLIENT_PATTERN.search(name)
+            if name_match: yield proc, name_match
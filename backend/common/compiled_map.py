@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import bisect
+import json
+import mmap
+import os
+import struct
+from typing import Callable, Iterable, Iterator
+
+from backend.paths import CACHE_PATH
+
+
+class CompiledStringMap():
+    """
+    Read-only int -> str map stored as sorted keys, string offsets and a UTF-8 blob.
+    The binary form is compiled once from a JSON file of the data folder, memory-mapped
+    when loaded and rebuilt automatically when the JSON file changes.
+    """
+    MAGIC = b'LCSM'
+    VERSION = 1
+    HEADER = struct.Struct('<4sLqqL4x') # magic, version, source mtime, source size, count
+
+    def __init__(self, buffer: bytes) -> None:
+        self.__buffer = memoryview(buffer)
+        magic, version, _, _, count = CompiledStringMap.HEADER.unpack_from(self.__buffer)
+        if magic != CompiledStringMap.MAGIC or version != CompiledStringMap.VERSION:
+            raise ValueError('Bad compiled map header')
+        keys_start = CompiledStringMap.HEADER.size
+        offsets_start = keys_start + 8 * count
+        blob_start = offsets_start + 4 * (count + 1)
+        self.__keys = self.__buffer[keys_start:offsets_start].cast('q')
+        self.__offsets = self.__buffer[offsets_start:blob_start].cast('I')
+        self.__blob = self.__buffer[blob_start:]
+
+    @classmethod
+    def load(cls, source_path: str, items_builder: Callable[[object], Iterable[tuple[int, str]]]) -> CompiledStringMap:
+        """
+        Load the compiled form of a JSON file, compiling it first if needed.
+        param source_path: path of the JSON file
+        type source_path: str
+        param items_builder: function turning the parsed JSON into (key, string) pairs
+        type items_builder: Callable
+        returns: the compiled map
+        rtype: CompiledStringMap
+        """
+        stat = os.stat(source_path)
+        name = os.path.splitext(os.path.basename(source_path))[0]
+        cache_file = os.path.join(CACHE_PATH, f'{name}.bin')
+        if not cls.__is_fresh(cache_file, stat):
+            buffer = cls.compile(source_path, items_builder, stat)
+            try:
+                os.makedirs(CACHE_PATH, exist_ok=True)
+                tmp_file = cache_file + '.tmp'
+                with open(tmp_file, 'wb') as outf:
+                    outf.write(buffer)
+                os.replace(tmp_file, cache_file)
+            except OSError as os_error:
+                print('Could not write compiled map:', cache_file, os_error)
+                return cls(buffer)
+        with open(cache_file, 'rb') as inf:
+            return cls(mmap.mmap(inf.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @classmethod
+    def compile(cls, source_path: str, items_builder: Callable[[object], Iterable[tuple[int, str]]], stat: os.stat_result = None) -> bytes:
+        stat = stat if stat else os.stat(source_path)
+        with open(source_path, 'r', encoding='utf-8') as json_file:
+            items: dict[int, str] = {}
+            for key, value in items_builder(json.load(json_file)):
+                if key in items and items[key] != value:
+                    print('WARNING: Duplicate key', key, 'in', source_path, ', the last value is kept')
+                items[key] = value
+        keys: list[int] = sorted(items.keys())
+        offsets: list[int] = [0]
+        blob = bytearray()
+        for key in keys:
+            blob.extend(items[key].encode('utf-8'))
+            offsets.append(len(blob))
+        count = len(keys)
+        header = cls.HEADER.pack(cls.MAGIC, cls.VERSION, stat.st_mtime_ns, stat.st_size, count)
+        return b''.join((header, struct.pack(f'<{count}q', *keys), struct.pack(f'<{count+1}L', *offsets), blob))
+
+    @classmethod
+    def __is_fresh(cls, cache_file: str, stat: os.stat_result) -> bool:
+        if not os.path.exists(cache_file): return False
+        with open(cache_file, 'rb') as inf:
+            header = inf.read(cls.HEADER.size)
+        if len(header) != cls.HEADER.size: return False
+        magic, version, mtime, size, _ = cls.HEADER.unpack(header)
+        return magic == cls.MAGIC and version == cls.VERSION and mtime == stat.st_mtime_ns and size == stat.st_size
+
+    def __len__(self) -> int:
+        return len(self.__keys)
+
+    def __contains__(self, key: int) -> bool:
+        return self.__index(key) >= 0
+
+    def __index(self, key: int) -> int:
+        index = bisect.bisect_left(self.__keys, key)
+        if index < len(self.__keys) and self.__keys[index] == key: return index
+        return -1
+
+    def __string_at(self, index: int) -> str:
+        return str(self.__blob[self.__offsets[index]:self.__offsets[index+1]], 'utf-8')
+
+    def get(self, key: int, default: str = None) -> str:
+        index = self.__index(key)
+        return self.__string_at(index) if index >= 0 else default
+
+    def keys(self) -> Iterator[int]:
+        return iter(self.__keys)
+
+    def items(self) -> Iterator[tuple[int, str]]:
+        for index, key in enumerate(self.__keys):
+            yield key, self.__string_at(index)
@@ -92,7 +92,7 @@ class GameConfig():
             self.__client_account_data_pattern = "48893d?3b201b900010000" if self.__is_64bits else "85C974078B018B5030FFE2B801000000C3"
             self.__storage_data_pattern = "4883EC28BA02000000488D0D?3" if self.__is_64bits else "6a016a02b9?3e8"
 
-            self.__mem = pymem.Pymem(name_match.group(0)) # Create a pymem object to read the game client memory.
+            self.__mem = pymem.Pymem(pid) # Create a pymem object to read the memory of this game client process.
             self.__base_address = self.__mem.base_address + (4096 - 1024) if self.__is_64bits else 0 # Get the base address of the game client.
             if self.__debug: # If debug mode is enabled, print some useful info.
                 logging.info('Lotro Client: %s}', self.__lotro_client)
@@ -1,24 +1,38 @@
 from __future__ import annotations
 
 import io
+import os
 import struct
+import threading
 import zlib
+from typing import Iterator
 
 from backend.common.file_entry import DirectoryEntry, FileEntry
 
 
+DIRECTORY_LINK = struct.Struct('<2L')
+FILE_RECORD = struct.Struct('<2h3L3L4x')
+HEADER_OFFSET = 0x140 # Beginning of the header (should always begin with BT)
+
 class DATArchive():
     # Fp denotes the filepath to the dat file
     def __init__(self, fp: str, debug: bool = False) -> None:
+        self.__path = fp
         self.__file = open(fp, 'rb')
-        self.__file.seek(0x140) # Seek to the beginning of the header (should always begin with BT)
+        # Reads are positional so that threads can share the archive, seek+read under a lock where pread is missing (Windows)
+        self.__pread = hasattr(os, 'pread')
+        self.__read_lock = threading.Lock()
         self.__dirs: dict[int, DirectoryEntry] = {}
+        self.__dirs_lock = threading.Lock()
         self.__root_entry = None
         self.__block_size = 0
         self.__dat_pack_version = 0
         self.__debug = debug
 
     @property
+    def path(self) -> str:
+        return self.__path
+    @property
     def file_input(self) -> io.FileIO:
         return self.__file
     @property
@@ -31,29 +45,29 @@ class DATArchive():
 
     def close(self) -> None:
         self.__file.close()
+
+    def __read_at(self, offset: int, size: int) -> bytes:
+        if self.__pread:
+            return os.pread(self.__file.fileno(), size, offset)
+        with self.__read_lock:
+            self.__file.seek(offset)
+            return self.__file.read(size)
     
     def read_directory(self, dir_entry: DirectoryEntry) -> None:
         offset = dir_entry.offset
         if self.__debug: print(f'Reading directory at offset: {offset}')
-        self.__file.seek(offset)
-        num_extra_blocks, legacy = struct.unpack('<2L', self.__file.read(8))
-        self.__file.seek(offset + 0x1f8)
-        files_count, = struct.unpack('<L', self.__file.read(4))
-        self.__file.seek(offset + 0x8)
-        for i in range(files_count+1):
-            block_size, dir_offset = struct.unpack('<2L', self.__file.read(8))
+        files_count, = struct.unpack('<L', self.__read_at(offset + 0x1f8, 4))
+        links = self.__read_at(offset + 0x8, (files_count+1) * DIRECTORY_LINK.size)
+        for i, (block_size, dir_offset) in enumerate(DIRECTORY_LINK.iter_unpack(links)):
             if block_size:
                 if self.__debug: print(f'Dir entry #{i}: got block_size = {block_size}, offset = {dir_offset}')
                 d_entry = DirectoryEntry(dir_entry, dir_offset)
                 dir_entry.add_dir(d_entry)
         if self.__debug: print(f'Got {len(dir_entry.dirs)} directories!')
         if self.__debug: print(f'Expect {files_count} files!')
-        self.__file.seek(offset + 0x1f8 + 0x4)
-        for j in range(files_count):
-            flags, policy = struct.unpack('<2h', self.__file.read(4))
-            file_id, file_offset, size = struct.unpack('<3L', self.__file.read(12))
-            timestamp, version, file_block_size = struct.unpack('<3L', self.__file.read(12))
-            self.__file.read(4)
+        records = self.__read_at(offset + 0x1f8 + 0x4, files_count * FILE_RECORD.size)
+        for j, record in enumerate(FILE_RECORD.iter_unpack(records)):
+            flags, policy, file_id, file_offset, size, timestamp, version, file_block_size = record
             entry = FileEntry(j, file_id, file_offset, version, timestamp, size, file_block_size, flags, policy)
             if self.__debug: print(f'File entry: Index = {entry.index}, file_id = {hex(entry.file_id)}, file_offset = {entry.file_offset},', 
             f'version = {entry.version}, timestamp = {entry.timestamp}, size = {entry.size}, block_size = {entry.block_size}, flags = {entry.flags}, policy = {entry.policy}'
@@ -62,7 +76,7 @@ class DATArchive():
 
 
     def read_super_block(self) -> int:
-        header_bytes = self.__file.read(0x68) # Read the next 68 bytes of header information
+        header_bytes = self.__read_at(HEADER_OFFSET, 0x68) # Read the next 68 bytes of header information
 
         ins = io.BytesIO(header_bytes) # Read the whole header as bytes for IO
         magic, = struct.unpack('<L', ins.read(4)) # Get the first 4 bytes of type "<L" (long = 4 bytes and "<" represents little endian the order to read the bytes)
@@ -81,16 +95,14 @@ class DATArchive():
 
     def load_entry(self, file_entry: FileEntry) -> bytearray:
         offset = file_entry.file_offset
-        self.__file.seek(offset)
-        num_extra_blocks, legacy = struct.unpack('<2L', self.__file.read(8))
+        num_extra_blocks, legacy = DIRECTORY_LINK.unpack(self.__read_at(offset, 8))
         first_chunk_size = file_entry.block_size - 8 - num_extra_blocks * 8
         first_chunk_size = first_chunk_size if first_chunk_size <= file_entry.size else file_entry.size
-        data = bytearray(self.__file.read(first_chunk_size))
-        block_links = [struct.unpack('<2L', self.__file.read(8))
-                    for _ in range(num_extra_blocks)]
-        for size, offset in block_links:
-            self.__file.seek(offset)
-            data.extend(self.__file.read(size))
+        # The first chunk and the links to the extra blocks follow the block header
+        chunk = self.__read_at(offset + 8, first_chunk_size + num_extra_blocks * 8)
+        data = bytearray(chunk[:first_chunk_size])
+        for size, offset in DIRECTORY_LINK.iter_unpack(chunk[first_chunk_size:]):
+            data.extend(self.__read_at(offset, size))
         total_size = file_entry.size
         if len(data) > total_size:
             data = data[:total_size]
@@ -109,11 +121,38 @@ class DATArchive():
         if entry:
             return self.load_entry(entry)
 
+    def get_file_entry(self, file_id: int) -> FileEntry:
+        return self.__find_file_by_id(self.__root_entry, file_id)
+
+    def iter_file_entries(self, min_id: int = 0, max_id: int = 0xFFFFFFFF) -> Iterator[FileEntry]:
+        """
+        Iterate, in ID order, over the entries of the files with an ID in [min_id, max_id].
+        Only the directories which can hold such IDs are loaded.
+        """
+        return self.__iter_dir(self.__root_entry, min_id, max_id)
+
+    def __iter_dir(self, dir: DirectoryEntry, min_id: int, max_id: int) -> Iterator[FileEntry]:
+        self.__ensure_loaded_dir(dir)
+        files: list[FileEntry] = dir.files
+        dirs: list[DirectoryEntry] = dir.dirs
+        for i in range(max(len(files), len(dirs))):
+            if i < len(dirs):
+                # Sub directory #i holds the IDs between the files #i-1 and #i
+                lower = files[i-1].file_id if 0 < i <= len(files) else -1
+                upper = files[i].file_id if i < len(files) else 1 << 32
+                if upper > min_id and lower < max_id:
+                    yield from self.__iter_dir(dirs[i], min_id, max_id)
+            if i < len(files) and min_id <= files[i].file_id <= max_id:
+                yield files[i]
+
     def __ensure_loaded_dir(self, dir_entry: DirectoryEntry):
         offset = dir_entry.offset
-        if offset not in self.__dirs:
-            self.read_directory(dir_entry)
-            self.__dirs[offset] = dir_entry
+        if offset in self.__dirs: return
+        # A directory is filled once, the other threads wait for it instead of adding its entries again
+        with self.__dirs_lock:
+            if offset not in self.__dirs:
+                self.read_directory(dir_entry)
+                self.__dirs[offset] = dir_entry
 
     def __find_file_by_id(self, dir: DirectoryEntry, fileId: int) -> FileEntry:
         if self.__debug: print('Dir entry for get file:', dir.offset)
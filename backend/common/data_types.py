@@ -3,7 +3,7 @@ from __future__ import annotations
 import io
 import math
 import struct
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterator
 
 from backend.managers.abstract_mappers import EnumMapper
 
@@ -34,6 +34,7 @@ class Position:
     ROT = 0x20
     INHIBIT_REGION = 0x40
     INHIBIT_CELL = 0x80
+    DAT_FIELD_SIZES = ((REGION, 1), (BLOCK, 2), (INSTANCE, 2), (CELL, 2), (POS, 12), (ROT, 16))
 
     def __init__(self, flags, r, bx, by, instance, cell, offset, rot):
         self.flags = flags
@@ -93,6 +94,11 @@ class Position:
             rot = Quaternion(*struct.unpack('<4f', ins.read(16)))
         return cls(flags, region, bx, by, instance, cell, pos, rot)
 
+    @staticmethod
+    def skip_dat(ins) -> None:
+        flags = ord(ins.read(1))
+        ins.seek(sum(size for flag, size in Position.DAT_FIELD_SIZES if flags & flag), io.SEEK_CUR)
+
     @classmethod
     def from_net(cls, ins) -> Position:
         flags = ord(ins.read(1))
@@ -202,57 +208,65 @@ class Quaternion:
 
 
 class BitSet():
-    ADDRESS_BITS_PER_WORD = 6
-    BITS_PER_WORD = 1 << ADDRESS_BITS_PER_WORD
-    BIT_INDEX_MASK = BITS_PER_WORD - 1
-    WORD_MASK = 0xffffffffffffffff
-
-    def __init__(self, words: list[int] = None, nbits: int = BITS_PER_WORD) -> None:
-        if words:
-            self.__words: list[int] = words
-            self.__words_in_use = len(words)
-            self.__check_invariants()
-        else:
-            self.__words_in_use = 0
-            self.__size_is_sticky = nbits != BitSet.BITS_PER_WORD
-            self.__words = [0] * (self.__word_index(nbits - 1) + 1)
+    """
+    Set of bits backed by a single int: bit i of the int is bit i of the set.
+    """
+    BYTE_BITS = tuple(tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256))
+    HAS_BIT_COUNT = hasattr(int, 'bit_count')
 
-    def __word_index(self, bit_index: int) -> int:
-        return bit_index >> BitSet.ADDRESS_BITS_PER_WORD
+    def __init__(self, bits: int = 0, nbits: int = 0) -> None:
+        self.__bits: int = bits
+        self.__nbits: int = max(nbits, bits.bit_length())
 
-    def __check_invariants(self) -> None:
-        assert(self.__words_in_use == 0 or self.__words[self.__words_in_use - 1] != 0)
-        assert(self.__words_in_use >= 0 and self.__words_in_use <= len(self.__words))
-        assert(self.__words_in_use == len(self.__words) or self.__words[self.__words_in_use] == 0)
+    @property
+    def bits(self) -> int:
+        return self.__bits
 
     def set(self, bit_index: int) -> None:
         assert bit_index >= 0
-        word_index = self.__word_index(bit_index)
-        if self.__words_in_use < word_index+1:
-            if len(self.__words) < word_index+1:
-                self.__words.extend(([0] * word_index+1))
-            self.__words_in_use = word_index+1
-        self.__words[word_index] = self.__words[word_index] | (1 << bit_index)
-        self.__check_invariants()
+        self.__bits |= 1 << bit_index
+        if bit_index >= self.__nbits:
+            self.__nbits = bit_index + 1
+
+    def clear(self, bit_index: int) -> None:
+        assert bit_index >= 0
+        self.__bits &= ~(1 << bit_index)
 
     def get(self, bit_index: int) -> bool:
         assert bit_index >= 0
-        self.__check_invariants()
-        word_index = self.__word_index(bit_index)
-        return (word_index < self.__words_in_use) and ((self.__words[word_index] & (1 << bit_index)) != 0)
+        return (self.__bits >> bit_index) & 1 == 1
+
+    def count(self) -> int:
+        # int.bit_count is only there from Python 3.10
+        if BitSet.HAS_BIT_COUNT: return self.__bits.bit_count()
+        return bin(self.__bits).count('1')
+
+    def iter_set_bits(self) -> Iterator[int]:
+        # Walks the bytes of the int, only the non zero bytes are expanded
+        buffer = self.__bits.to_bytes((self.__bits.bit_length() + 7) // 8, 'little')
+        for byte_index, value in enumerate(buffer):
+            if value:
+                base = byte_index << 3
+                for bit in BitSet.BYTE_BITS[value]:
+                    yield base + bit
 
     def get_string(self, enum_mapper: EnumMapper, seperator: str) -> str:
-        if self.__words_in_use > 0:
-            result_str = ''
-            for i in range(self.__words_in_use):
-                if self.get(i):
-                    item_str = enum_mapper.get_string(i + 1)
-                    if item_str is not None:
-                        if len(result_str) > 0: 
-                            result_str += seperator
-                        result_str += item_str
-            return result_str
-        return None
+        if self.__bits == 0: return None
+        # Bit i stands for the enum value i+1
+        labels = (enum_mapper.get_str(i + 1) for i in self.iter_set_bits())
+        return seperator.join(label for label in labels if label is not None)
+
+    def __len__(self) -> int:
+        return self.__nbits
+
+    def __or__(self, other: BitSet) -> BitSet:
+        return BitSet(self.__bits | other.bits, max(self.__nbits, len(other)))
+
+    def __and__(self, other: BitSet) -> BitSet:
+        return BitSet(self.__bits & other.bits, max(self.__nbits, len(other)))
+
+    def __repr__(self):
+        return f'BitSet({list(self.iter_set_bits())})'
 
     @classmethod
     def __read_vle(cls, ins):
@@ -271,40 +285,22 @@ class BitSet():
         else:
             return b | ((a & 0x7f) << 8)
 
+    @classmethod
+    def from_bytes(cls, buffer: bytes, nb_bits: int = None) -> BitSet:
+        nb_bits = len(buffer) * 8 if nb_bits is None else nb_bits
+        bits = int.from_bytes(buffer[:(nb_bits + 7) // 8], 'little')
+        return cls(bits & ((1 << nb_bits) - 1), nb_bits)
+
     @classmethod
     def from_stream(cls, ins: io.BytesIO, nb_bits: int = None) -> BitSet:
         num_bits = cls.__read_vle(ins) if nb_bits is None else nb_bits
-        num_bytes = num_bits // 8
-        if num_bits % 8 != 0:
-            num_bytes += 1
-        buffer = bytearray(ins.read(num_bytes))
-        bit_set = cls()
-        for i in range(num_bits):
-            byte_idx = i // 8
-            bit_idx = i % 8
-            set_bool = ((ord(buffer[byte_idx]) & 1 << bit_idx) != 0 )
-            if set_bool:
-                bit_set.set(bit_idx)
-        return bit_set
+        return cls.from_bytes(ins.read((num_bits + 7) // 8), num_bits)
 
     @classmethod
     def from_bytearray(cls, buffer: bytearray, nb_bits: int) -> BitSet:
-        bit_set = cls()
-        for i in range(nb_bits):
-            byte_idx = i // 8
-            bit_idx = i % 8
-            set_bool = ((ord(buffer[byte_idx]) & 1 << bit_idx) != 0 )
-            if set_bool:
-                bit_set.set(bit_idx)
-        return bit_set
+        return cls.from_bytes(buffer, nb_bits)
 
     @classmethod
     def from_flags(cls, bitset: int, is_long: bool = False) -> BitSet:
         length = 64 if is_long else 32
-        bit_set = cls(nbits = length)
-        mask = 1
-        for i in range(1, length+1):
-            if bitset & mask != 0:
-                bit_set.set(i - 1)
-            mask = mask << 1
-        return bit_set
+        return cls(bitset & ((1 << length) - 1), length)
@@ -1,22 +1,111 @@
-import threading
+from __future__ import annotations
+
 import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING
 
 from pymem.exception import MemoryReadError
 
 from backend.char_data import CharData
 from backend.common.config import GameConfig
 from backend.data_facade import DataFacade
+from backend.properties.properties_diff import (PropertiesDelta,
+                                                PropertiesSnapshot,
+                                                to_json_value)
+
+if TYPE_CHECKING:
+    from database.db_conn import UploadQueue
+
+
+class SyncStats():
+    def __init__(self) -> None:
+        self.__ticks: int = 0
+        self.__skipped_ticks: int = 0
+        self.__decodes: int = 0
+        self.__failures: int = 0
+        self.__last_decode_time: float = 0.0
+        self.__total_decode_time: float = 0.0
+        self.__max_decode_time: float = 0.0
+        self.__max_tick_delay: float = 0.0
+
+    @property
+    def ticks(self) -> int:
+        return self.__ticks
+    @property
+    def skipped_ticks(self) -> int:
+        return self.__skipped_ticks
+    @property
+    def decodes(self) -> int:
+        return self.__decodes
+    @property
+    def failures(self) -> int:
+        return self.__failures
+    @property
+    def last_decode_time(self) -> float:
+        return self.__last_decode_time
+    @property
+    def avg_decode_time(self) -> float:
+        return self.__total_decode_time / self.__decodes if self.__decodes else 0.0
+    @property
+    def max_decode_time(self) -> float:
+        return self.__max_decode_time
+    @property
+    def max_tick_delay(self) -> float:
+        return self.__max_tick_delay
+
+    def record_tick(self, delay: float) -> None:
+        self.__ticks += 1
+        self.__max_tick_delay = max(self.__max_tick_delay, delay)
+
+    def record_skip(self, nb_ticks: int = 1) -> None:
+        self.__skipped_ticks += nb_ticks
+
+    def record_decode(self, duration: float, success: bool) -> None:
+        if not success:
+            self.__failures += 1
+            return
+        self.__decodes += 1
+        self.__last_decode_time = duration
+        self.__total_decode_time += duration
+        self.__max_decode_time = max(self.__max_decode_time, duration)
+
+    def copy(self) -> 'SyncStats':
+        result = SyncStats()
+        result.__dict__.update(self.__dict__)
+        return result
 
+    def __repr__(self) -> str:
+        return (f'SyncStats(ticks={self.__ticks}, skipped={self.__skipped_ticks}, decodes={self.__decodes}, failures={self.__failures}, '
+                f'last={self.__last_decode_time:.3f}s, avg={self.avg_decode_time:.3f}s, max={self.__max_decode_time:.3f}s)')
 
 class DataExtractor():
-    def __init__(self, config: GameConfig, sync_time: int = 20) -> None:
+    """
+    Syncs the character data at a fixed rate: a scheduler thread ticks every sync_time seconds
+    and hands the decode to a worker. Ticks happening while a decode is still running are skipped.
+    """
+    UPDATES_QUEUE_SIZE = 4
+
+    def __init__(self, config: GameConfig, sync_time: int = 20, upload_queue: UploadQueue = None, data_facade: DataFacade = None) -> None:
         self.__config: GameConfig = config
-        self.__data_facade: DataFacade = DataFacade(config)
+        self.__data_facade: DataFacade = data_facade if data_facade else DataFacade(config)
         self.__character_data: dict[str, CharData] = {}
         self.__thread_event = threading.Event()
         self.__sync_time = sync_time
         self.__sync_thread = threading.Thread(target=self.__sync_char, name="Char Sync", args=[self.__sync_time, self.__thread_event])
         self.__sync_thread.daemon = True
+        # Latest decoded characters for the consumers, the oldest is dropped when they fall behind
+        self.__updates: queue.Queue = queue.Queue(maxsize=DataExtractor.UPDATES_QUEUE_SIZE)
+        self.__stats: SyncStats = SyncStats()
+        self.__stats_lock = threading.Lock()
+        # A character is uploaded when its properties changed: the whole document is built from the current
+        # values and sent by the background queue (the database replaces the content of an entry)
+        self.__upload_queue: UploadQueue = upload_queue
+        self.__upload_ids: dict[str, str] = {}
+        self.__snapshots: dict[str, PropertiesSnapshot] = {}
+        self.__deltas: dict[str, PropertiesDelta] = {}
 
     def sync(self) -> None:
         self.__sync_thread = threading.Thread(target=self.__sync_char, name="Char Sync", args=[self.__sync_time, self.__thread_event])
@@ -27,27 +116,113 @@ class DataExtractor():
     def stop_sync(self) -> None:
         self.__thread_event.set()
         self.__sync_thread.join()
+        # The labels of the enums decoded while syncing are saved once, not after every decode
+        self.__data_facade.get_enums_manager().save_cache()
 
     def sync_enabled(self) -> bool:
         return self.__sync_thread.is_alive()
 
+    def get_sync_stats(self) -> SyncStats:
+        with self.__stats_lock:
+            return self.__stats.copy()
+
+    def set_upload_id(self, char_name: str, json_id: str) -> None:
+        # The database entry of a character, its next upload is built from all the properties
+        self.__upload_ids[char_name] = json_id
+        self.__snapshots.pop(char_name, None)
+
+    def get_last_delta(self, char_name: str) -> PropertiesDelta:
+        return self.__deltas.get(char_name)
+
+    def get_update(self, timeout: float = None) -> CharData:
+        """
+        Get the next decoded character, waiting up to timeout seconds (None waits forever).
+        Returns None if no character was decoded in time.
+        """
+        try:
+            return self.__updates.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
     def __sync_char(self, sync_time: int, event: threading.Event) -> None:
-        while(True):
-            if event.is_set():
-                break
-            try:
-                curr_char_data: CharData = CharData(self.__config, self.__data_facade).parse_char()
-                if not curr_char_data.name: continue
+        next_tick = time.monotonic()
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="Char Decode") as worker:
+            pending: Future = None
+            while not event.is_set():
+                delay = time.monotonic() - next_tick
+                with self.__stats_lock:
+                    self.__stats.record_tick(delay)
+                    if pending is not None and not pending.done():
+                        self.__stats.record_skip()
+                    else:
+                        pending = worker.submit(self.__decode_char, event)
+                next_tick += sync_time
+                # Deadlines missed entirely, e.g. after the machine slept, are skipped rather than run late
+                late = time.monotonic() - next_tick
+                if late > 0:
+                    missed = int(late // sync_time) + 1
+                    next_tick += missed * sync_time
+                    with self.__stats_lock:
+                        self.__stats.record_skip(missed)
+                event.wait(next_tick - time.monotonic())
+
+    def __decode_char(self, event: threading.Event) -> None:
+        start = time.perf_counter()
+        success = False
+        try:
+            curr_char_data: CharData = CharData(self.__config, self.__data_facade).parse_char()
+            if curr_char_data.name:
                 self.__character_data[curr_char_data.name] = curr_char_data
-                logging.info(self.__character_data[curr_char_data.name].get_memory_extraction_session().get_memory_facade().get_client_data().account_data)
-                logging.info(self.__character_data[curr_char_data.name].get_memory_extraction_session().get_memory_facade().get_client_data().world_data)
-                logging.info(self.__character_data[curr_char_data.name].entity_data.properties)
-                event.wait(sync_time)
-            except MemoryReadError as mem_read_err:
-                if mem_read_err.args[0].startswith('Could not read memory at: 0') and not self.__character_data:
-                    event.wait(sync_time)
-                logging.error(mem_read_err)
-                raise mem_read_err
+                self.__publish(curr_char_data)
+                self.__upload_changes(curr_char_data)
+                success = True
+                if logging.getLogger().isEnabledFor(logging.DEBUG):
+                    memory_facade = curr_char_data.get_memory_extraction_session().get_memory_facade()
+                    logging.debug(memory_facade.get_client_data().account_data)
+                    logging.debug(memory_facade.get_client_data().world_data)
+                    logging.debug(curr_char_data.entity_data.properties)
+        except MemoryReadError as mem_read_err:
+            logging.error(mem_read_err)
+            # Reading at 0 before any character was synced means the client is not logged in yet, keep trying
+            if not (mem_read_err.args[0].startswith('Could not read memory at: 0') and not self.__character_data):
+                event.set()
+        except Exception: # pylint: disable=broad-except
+            # Nobody reads the result of the decode worker, the failure is reported here
+            logging.exception('Character sync failed')
+        finally:
+            duration = time.perf_counter() - start
+            with self.__stats_lock:
+                self.__stats.record_decode(duration, success)
+            logging.debug('Character sync took %.3fs', duration)
+
+    def __upload_changes(self, char_data: CharData) -> None:
+        name: str = char_data.name
+        properties = char_data.entity_data.properties
+        snapshot, delta = PropertiesSnapshot.diff(self.__snapshots.get(name), properties)
+        self.__deltas[name] = delta
+        json_id: str = self.__upload_ids.get(name)
+        if self.__upload_queue is not None and json_id is not None and not delta.is_empty():
+            document: dict[str, object] = {prop_name: to_json_value(prop_val.value) for prop_name, prop_val in properties.props.items()} if properties else {}
+            try:
+                # The queue retries the failed uploads, a newer document replaces the pending one
+                self.__upload_queue.update(document, json_id)
+            except RuntimeError as exp:
+                # The snapshot is not advanced, the next sync still sees these changes
+                logging.error('Could not upload %s: %s', name, exp)
+                return
+            logging.debug('Queued the upload of %d changed and %d removed properties of %s', len(delta.changed), len(delta.removed), name)
+        self.__snapshots[name] = snapshot
+
+    def __publish(self, char_data: CharData) -> None:
+        while True:
+            try:
+                self.__updates.put_nowait(char_data)
+                return
+            except queue.Full:
+                try:
+                    self.__updates.get_nowait()
+                except queue.Empty:
+                    pass
 
     def get_character_data(self) -> dict[str, CharData]:
         return self.__character_data
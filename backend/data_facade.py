@@ -1,33 +1,63 @@
+from __future__ import annotations
+
 import json
+import logging
 import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterable, Iterator
 
 from backend.classes.function_definition import (FunctionArgumentDefinition,
                                                  FunctionDefinition,
                                                  FunctionsRegistry)
 from backend.common.config import GameConfig
+from backend.common.dat_archive import DATArchive
+from backend.common.file_entry import FileEntry
 from backend.managers.datfiles_manager import DatFilesManager
+from backend.managers.didmappers_manager import DIDMapperManager
 from backend.managers.enums_manager import EnumManager
 from backend.managers.properties_manager import (PropertiesRegistry,
                                                  PropertyDefinitionsLoader)
 from backend.managers.strings_manager import StringsManager
+from backend.paths import DATA_PATH
 from backend.properties.dbprops_loader import DBPropertiesLoader
 from backend.properties.properties_set import Properties
-from backend.reference.reference_provider import WStateDataSetReferenceProvider
+from backend.reference.reference_provider import (
+    LazyWStateDataSetReferenceProvider, WStateDataSetReferenceProvider)
 from backend.reference.reference_resolver import ReferencesResolver
-from backend.wdata.wlib_data import WLibData
+from backend.wdata.wlib_data import WLibData, WLibDataCache
 from backend.wdata.wlib_loader import WLibLoader
-from backend.wdata.wstate import WStateDataSet
+from backend.wdata.wstate import LazyWStateDataSet, WStateDataSet
 from backend.wdata.wstate_loader import WStateLoader
 
 
+# Facade of a worker process of DataFacade.load_properties_many
+_worker_facade: DataFacade = None
+
+def _init_properties_worker(lotro_client_dir: str, properties_registry: PropertiesRegistry) -> None:
+    # Warm start: the registry comes from the parent, the enums from its saved labels cache
+    global _worker_facade
+    _worker_facade = DataFacade(None, client_dir=lotro_client_dir, properties_registry=properties_registry)
+
+def _load_properties_chunk(data_ids: list[int]) -> list[tuple[int, Properties]]:
+    return [(data_id, _worker_facade.load_properties(data_id)) for data_id in data_ids]
+
 class DataFacade():
-    def __init__(self, config: GameConfig, debug: bool = False) -> None:
-        self.__dat_manager = DatFilesManager(config)
-        self.__property_registry: PropertiesRegistry = None
+    WLIB_DATA_ID = 1442840576
+    PROPERTIES_PER_TASK = 256
+
+    def __init__(self, config: GameConfig, debug: bool = False, client_dir: str = None, properties_registry: PropertiesRegistry = None) -> None:
+        self.__dat_manager = DatFilesManager(config, lotro_client_dir=client_dir)
+        self.__property_registry: PropertiesRegistry = properties_registry
         self.__strings_manager: StringsManager = StringsManager(self)
         self.__enum_manager: EnumManager = EnumManager(self)
+        self.__did_mappers_manager: DIDMapperManager = DIDMapperManager(self)
+        self.__properties_loader: DBPropertiesLoader = DBPropertiesLoader(self)
         self.__wlib: WLibData = None
         self.__debug: bool = debug
+        # The archives are read with positional reads, only the lazy loads of the facade are guarded
+        self.__lazy_lock = threading.Lock()
 
     def load_data(self, data_id: int) -> bytearray:
         keys = self.__get_archives(data_id)
@@ -39,6 +69,17 @@ class DataFacade():
                 return archive.load_entry_by_id(data_id)
         return None
 
+    def get_archive(self, key: str) -> DATArchive:
+        return self.__dat_manager.get_archive(key)
+
+    def get_file_entry(self, data_id: int) -> FileEntry:
+        keys = self.__get_archives(data_id)
+        for key in keys:
+            archive = self.__dat_manager.get_archive(key)
+            if archive:
+                return archive.get_file_entry(data_id)
+        return None
+
     def __load_properties_registry(self) -> PropertiesRegistry:
         data = self.load_data(872415232)
         if data: 
@@ -49,30 +90,86 @@ class DataFacade():
         return_props: Properties = None
         property_raw_data: bytearray = self.load_data(data_id)
         if property_raw_data is not None:
-            loader: DBPropertiesLoader = DBPropertiesLoader(self)
-            return_props = loader.decode_properties_resource(property_raw_data)
+            return_props = self.__properties_loader.decode_properties_resource(property_raw_data)
         return return_props
 
+    def load_properties_many(self, data_ids: Iterable[int], workers: int = None) -> Iterator[tuple[int, Properties]]:
+        """
+        Load many properties resources with a pool of processes, each one with its own facade.
+        Results are (data_id, properties) pairs yielded as the tasks complete, not in the given order.
+        """
+        data_ids = list(data_ids)
+        start = time.perf_counter()
+        nb_loaded = 0
+        executor: ProcessPoolExecutor = None
+        try:
+            if workers is not None and workers <= 1:
+                for data_id in data_ids:
+                    properties = self.load_properties(data_id)
+                    nb_loaded += 1
+                    yield data_id, properties
+            else:
+                chunk_size = DataFacade.PROPERTIES_PER_TASK
+                chunks = [data_ids[i:i+chunk_size] for i in range(0, len(data_ids), chunk_size)]
+                self.__enum_manager.save_cache()
+                initargs = (self.__dat_manager.lotro_client_dir, self.get_properties_registry())
+                executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_properties_worker, initargs=initargs)
+                futures = [executor.submit(_load_properties_chunk, chunk) for chunk in chunks]
+                for future in as_completed(futures):
+                    for item in future.result():
+                        nb_loaded += 1
+                        yield item
+        finally:
+            # A caller stopping early must not wait for the remaining chunks
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+            elapsed = time.perf_counter() - start
+            rate = nb_loaded / elapsed if elapsed > 0 else 0
+            logging.info('Loaded %d/%d properties resources in %.1fs (%.0f/s)', nb_loaded, len(data_ids), elapsed, rate)
+
     def get_wlib_data(self) -> WLibData:
         if self.__wlib:
             return self.__wlib
-        data = self.load_data(1442840576)
+        with self.__lazy_lock:
+            if self.__wlib is None:
+                entry: FileEntry = self.get_file_entry(DataFacade.WLIB_DATA_ID)
+                if entry is None:
+                    # Without the entry there is no build to key the cache with, a shared key would outlive game updates
+                    print('WARNING: No WLib entry found, its data is not cached')
+                    self.__wlib = self.__load_wlib_data()
+                else:
+                    build_key = WLibDataCache.build_key(entry.version, entry.timestamp)
+                    self.__wlib = WLibDataCache.get(build_key, self.__load_wlib_data)
+        return self.__wlib
+
+    def __load_wlib_data(self) -> WLibData:
+        data = self.load_data(DataFacade.WLIB_DATA_ID)
         wlib_data = WLibData()
         wlib_loader = WLibLoader(wlib_data)
         wlib_loader.decode(data)
         self.__load_functions(wlib_data.functions_registry)
         return wlib_data
 
-    def load_wstate(self, data_id: int) -> WStateDataSet:
+    def load_wstate(self, data_id: int, lazy: bool = False) -> WStateDataSet:
         wstate_dataset: WStateDataSet = None
         data = self.load_data(data_id)
         if data:
-            wlib_data = WLibData()
+            wlib_data = self.get_wlib_data()
             wstate_loader = WStateLoader(self, wlib_data)
-            wstate_dataset = wstate_loader.decode_wstate(data)
-            self.__resolve_dataset(wstate_dataset)
+            wstate_dataset = wstate_loader.decode_wstate(data, lazy)
+            if isinstance(wstate_dataset, LazyWStateDataSet):
+                self.__bind_lazy_dataset(wstate_dataset)
+            else:
+                self.__resolve_dataset(wstate_dataset)
         return wstate_dataset
 
+    def __bind_lazy_dataset(self, dataset: LazyWStateDataSet) -> None:
+        # References are resolved value by value when they get decoded,
+        # orphan references are not computed as it would need every value
+        reference_provider = LazyWStateDataSetReferenceProvider(dataset)
+        resolver: ReferencesResolver = ReferencesResolver(reference_provider)
+        dataset.set_value_resolver(resolver.resolve_references_in_val)
+
     def __resolve_dataset(self, dataset: WStateDataSet) -> None:
         reference_provider: WStateDataSetReferenceProvider = WStateDataSetReferenceProvider(dataset)
         resolver: ReferencesResolver = ReferencesResolver(reference_provider)
@@ -81,13 +178,14 @@ class DataFacade():
             value = dataset.get_value(i)
             if value:
                 resolver.resolve_references_in_val(value)
-        orphan_references: list[int] = list(dataset.references)
-        orphan_references = [x for x in orphan_references if x not in reference_provider.get_unused_references()]
+        orphan_references: set[int] = set(dataset.references) - reference_provider.used_references
         dataset.set_orphan_references(orphan_references)
 
     def get_properties_registry(self) -> PropertiesRegistry:
         if self.__property_registry is None:
-            self.__property_registry = self.__load_properties_registry()
+            with self.__lazy_lock:
+                if self.__property_registry is None:
+                    self.__property_registry = self.__load_properties_registry()
         return self.__property_registry
 
     def get_strings_manager(self) -> StringsManager:
@@ -96,23 +194,34 @@ class DataFacade():
     def get_enums_manager(self) -> EnumManager:
         return self.__enum_manager
 
+    def get_did_mappers_manager(self) -> DIDMapperManager:
+        return self.__did_mappers_manager
+
+    def get_properties_loader(self) -> DBPropertiesLoader:
+        return self.__properties_loader
+
     def __load_functions(self, functions_registry: FunctionsRegistry) -> None:
-        with open(os.path.join('..', 'data', 'Functions.json'), 'r') as json_file:
+        functions_path = os.path.join(DATA_PATH, 'Functions.json')
+        if not os.path.exists(functions_path):
+            print('WARNING: No functions definitions found at:', functions_path)
+            return
+        # The whole set is registered, a plain JSON load is enough (the WLib data holding it is cached per build)
+        with open(functions_path, 'r', encoding='utf-8') as json_file:
             functions_list: list[dict] = json.load(json_file)
-            for function in functions_list:
-                code = int(function.get('code'))
-                function_name = function.get('name')
-                byte_code_offset = int(function.get('byteCodeOffset'))
-                func: FunctionDefinition = FunctionDefinition(code, function_name)
-                func.byte_code_offset = byte_code_offset
-                func_args = function.get('argument')
-                if func_args:
-                    for argument in func_args:
-                        arg_name = argument.get('name')
-                        arg_type = argument.get('type')
-                        func_arg: FunctionArgumentDefinition = FunctionArgumentDefinition(arg_name, arg_type)
-                        func.add_argument(func_arg)
-                functions_registry.register_function(func)
+        for function in functions_list:
+            code = int(function.get('code'))
+            function_name = function.get('name')
+            byte_code_offset = int(function.get('byteCodeOffset'))
+            func: FunctionDefinition = FunctionDefinition(code, function_name)
+            func.byte_code_offset = byte_code_offset
+            func_args = function.get('argument')
+            if func_args:
+                for argument in func_args:
+                    arg_name = argument.get('name')
+                    arg_type = argument.get('type')
+                    func_arg: FunctionArgumentDefinition = FunctionArgumentDefinition(arg_name, arg_type)
+                    func.add_argument(func_arg)
+            functions_registry.register_function(func)
 
     def __get_archives(self, data_id: int):
         if data_id >= 16777216 and data_id <= 33554431: return ["general"]
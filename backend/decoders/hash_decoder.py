@@ -1,129 +1,101 @@
-from backend.common.config import GameConfig
-from backend.reference.data_ref import DataReference
-from typing import TypeVar
-import abc
-
+from __future__ import annotations
 
-KT = TypeVar('KT')
-VT = TypeVar('VT')
+import struct
+from typing import Callable
 
-class HashtableDecoder(dict[KT, VT], abc.ABC):
-    def __init__(self, config: GameConfig, key_size: int, value_offset: int, value_size: int) -> None:
+from backend.common.config import GameConfig
+from backend.reference.data_ref import DataReference
+from backend.utils.common_utils import Utils
+
+# Container packages whose values are data references, and those holding 64-bit items
+REFERENCE_PACKAGES = (35, 37, 117, 176, 182)
+LONG_ITEMS_PACKAGES = (104, 111)
+
+class HashNodeLayout():
+    """
+    Layout of a hash table node: the key, the pointer to the next node of the bucket,
+    then an optional value. A node is decoded with one read and one unpack.
+    """
+    def __init__(self, config: GameConfig, key_format: str, next_offset: int, value_offset: int = None, value_format: str = None) -> None:
+        pointer_format: str = 'Q' if config.pointer_size == 8 else 'L'
+        fmt: str = '<' + key_format
+        fmt += f'{next_offset - struct.calcsize(fmt)}x{pointer_format}'
+        self.__has_value: bool = value_format is not None
+        if self.__has_value:
+            fmt += f'{value_offset - struct.calcsize(fmt)}x{value_format}'
+        self.__struct: struct.Struct = struct.Struct(fmt)
+
+    @property
+    def size(self) -> int:
+        return self.__struct.size
+    @property
+    def has_value(self) -> bool:
+        return self.__has_value
+
+    def unpack(self, buffer: bytes) -> tuple:
+        # (key, next node pointer) or (key, next node pointer, value)
+        return self.__struct.unpack(buffer)
+
+class HashtableDecoder():
+    """
+    Decoder of the native hash tables, driven by the layout of their nodes.
+    The value builder gets the raw value and the package id, multi-valued tables gather the values of a key in a list.
+    """
+    def __init__(self, config: GameConfig, layout: HashNodeLayout, value_builder: Callable[[object, int], object] = None, multi: bool = False) -> None:
         self.__config: GameConfig = config
-        self.__key_size: int = key_size
-        self.__value_offset: int = value_offset
-        self.__value_size: int = value_offset
-
-    def decode_hash_table(self, native_package_pointer: int, offset: int, package_id: int) -> dict[KT, VT]:
-        buckets_ptr_offset: int = offset + 2 * self.__config.pointer_size
-        buckets_ptr: int = self.__config.mem.read_uint(native_package_pointer+buckets_ptr_offset)
-        first_bucket_ptr_offset: int = offset + 3 * self.__config.pointer_size
-        first_bucket_ptr: int = self.__config.mem.read_uint(native_package_pointer+first_bucket_ptr_offset)
-        nb_buckets_offset: int = offset + 4 * self.__config.pointer_size
-        nb_buckets: int = self.__config.mem.read_uint(native_package_pointer+nb_buckets_offset)
-        nb_elements: int = self.__config.mem.read_uint(native_package_pointer+nb_buckets_offset+4)
-        result_map: dict[KT, VT] = {}
-        if buckets_ptr is not None:
-            for i in range(nb_buckets):
-                first_entry: int = self.__config.mem.read_uint(buckets_ptr+(i*self.__config.pointer_size))
-                if first_entry is not None:
-                    self.__handle_map_entry(result_map, first_entry, package_id)
-        assert len(result_map.keys()) == nb_elements
+        self.__layout: HashNodeLayout = layout
+        self.__value_builder: Callable[[object, int], object] = value_builder
+        self.__multi: bool = multi
+        self.__buckets_format: str = 'Q' if config.pointer_size == 8 else 'L'
+
+    def decode_hash_table(self, native_package_pointer: int, offset: int, package_id: int) -> dict[object, object]:
+        pointer_size: int = self.__config.pointer_size
+        mem = self.__config.mem
+        buckets_ptr: int = Utils.get_pointer(mem, native_package_pointer+offset+2*pointer_size, pointer_size)
+        nb_buckets_offset: int = offset + 4 * pointer_size
+        nb_buckets: int = mem.read_uint(native_package_pointer+nb_buckets_offset)
+        nb_elements: int = mem.read_uint(native_package_pointer+nb_buckets_offset+4)
+        result_map: dict[object, object] = {}
+        if buckets_ptr and nb_buckets:
+            buckets: tuple = struct.unpack(f'<{nb_buckets}{self.__buckets_format}', mem.read_bytes(buckets_ptr, nb_buckets*pointer_size))
+            for first_entry in buckets:
+                if first_entry: self.__handle_bucket(result_map, first_entry, package_id)
+        if not self.__multi: assert len(result_map) == nb_elements
         return result_map
 
-    def __handle_map_entry(self, result_map: dict[KT, VT], hash_table_data_ptr: int, package_id: int) -> None:
-        entry_size: int = self.__value_offset + self.__value_size
-        key: KT = self.parse_key(hash_table_data_ptr)
-        val: VT = self.parse_value(result_map, hash_table_data_ptr, self.__value_offset, package_id)
-        next: int = self.__config.mem.read_uint(hash_table_data_ptr+self.__key_size)
-        result_map[key] = val
-        if next: self.__handle_map_entry(result_map, next, package_id)
-
-    @abc.abstractmethod
-    def parse_key(self, hash_table_data_ptr: int) -> KT:
-        pass
-    @abc.abstractmethod
-    def parse_value(self, result_map: dict[KT, VT], hash_table_data_ptr: int, val_offset: int, package_id: int) -> VT:
-        pass
-
-class IntLongValDecoder(HashtableDecoder):
-    def __init__(self, config: GameConfig, key_size: int, value_offset: int, value_size: int) -> None:
-        super().__init__(config, key_size, value_offset, value_size)
-    
-    def parse_key(self, hash_table_data_ptr: int) -> int:
-        return self.__config.mem.read_uint(hash_table_data_ptr)
-
-    def parse_value(self, result_map: dict[int, object], hash_table_data_ptr: int, val_offset: int, package_id: int) -> object:
-        val = self.__config.mem.read_uint(hash_table_data_ptr+val_offset)
-        return DataReference(val) if (package_id in (35, 117)) else val
-
-class IntLongDecoder(HashtableDecoder):
-    def __init__(self, config: GameConfig, key_size: int, value_offset: int, value_size: int) -> None:
-        super().__init__(config, key_size, value_offset, value_size)
-    
-    def parse_key(self, hash_table_data_ptr: int) -> int:
-        return self.__config.mem.read_uint(hash_table_data_ptr)
-
-    def parse_value(self, result_map: dict[int, int], hash_table_data_ptr: int, val_offset: int, package_id: int) -> object:
-        return None
-
-class IntMultiHashDecoder(HashtableDecoder):
-    def __init__(self, config: GameConfig, key_size: int, value_offset: int, value_size: int) -> None:
-        super().__init__(config, key_size, value_offset, value_size)
-        self.__current_key = 0
-
-    def parse_key(self, hash_table_data_ptr: int) -> str:
-        self.__current_key = self.__config.mem.read_uint(hash_table_data_ptr)
-        return self.__current_key
-
-    def parse_value(self, result_map: dict[int, list[object]], hash_table_data_ptr: int, val_offset: int, package_id: int) -> list[object]:
-        key = self.__config.mem.read_uint(hash_table_data_ptr)
-        assert key == self.__current_key
-        val = self.__config.mem.read_uint(hash_table_data_ptr+ (self.__config.int_size + self.__config.pointer_size))
-        result: list[object] = result_map.get(key)
-        if result is None:
-            result = []
-        else:
-            result_map[key] = result
-        map_val = DataReference(val) if package_id == 37 else val
-        result.append(map_val)
-        return result
-
-class NRHashDecoder(HashtableDecoder):
-    def __init__(self, config: GameConfig, key_size: int, value_offset: int, value_size: int) -> None:
-        super().__init__(config, key_size, value_offset, value_size)
-    
-    def parse_key(self, hash_table_data_ptr: int) -> int:
-        return self.__config.mem.read_uint(hash_table_data_ptr)
-
-    def parse_value(self, result_map: dict[int, int], hash_table_data_ptr: int, val_offset: int, package_id: int) -> int:
-        return self.__config.mem.read_uint(hash_table_data_ptr+val_offset)
-
-class NHashSetDecoder(HashtableDecoder):
-    def __init__(self, config: GameConfig, key_size: int, value_offset: int, value_size: int) -> None:
-        super().__init__(config, key_size, value_offset, value_size)
-    
-    def parse_key(self, hash_table_data_ptr: int) -> int:
-        return self.__config.mem.read_uint(hash_table_data_ptr)
-
-    def parse_value(self, result_map: dict[int, None], hash_table_data_ptr: int, val_offset: int, package_id: int) -> None:
-        return None
+    def __handle_bucket(self, result_map: dict[object, object], node_ptr: int, package_id: int) -> None:
+        layout: HashNodeLayout = self.__layout
+        mem = self.__config.mem
+        while node_ptr:
+            fields: tuple = layout.unpack(mem.read_bytes(node_ptr, layout.size))
+            key, node_ptr = fields[0], fields[1]
+            val: object = None
+            if layout.has_value:
+                val = fields[2]
+                if self.__value_builder is not None: val = self.__value_builder(val, package_id)
+            if self.__multi: result_map.setdefault(key, []).append(val)
+            else: result_map[key] = val
+
+def _package_reference(val: int, package_id: int) -> object:
+    return DataReference(val) if package_id in REFERENCE_PACKAGES else val
 
 class ContainersDecoder():
     def __init__(self, config: GameConfig) -> None:
         self.__config: GameConfig = config
-        self.__intint_decoder: IntLongValDecoder = IntLongValDecoder(config, config.map_int_keysize, config.map_int_keysize+config.pointer_size, 4)
-        self.__intlong_decoder: IntLongValDecoder = IntLongValDecoder(config, config.map_int_keysize, config.map_int_keysize+config.pointer_size, 8)
-        longint_val_offset: int = 8+config.pointer_size if config.is_64bits else 8+config.pointer_size+4
-        self.__longint_decoder: IntLongValDecoder = IntLongValDecoder(config, 8, longint_val_offset, 4)
-        self.__int_decoder: IntLongDecoder = IntLongDecoder(config, config.map_int_keysize, config.map_int_keysize+config.pointer_size, 0)
-        self.__long_decoder: IntLongDecoder = IntLongDecoder(config, 8, 8+config.pointer_size, 0)
-        self.__intmulti_decoder: IntMultiHashDecoder = IntMultiHashDecoder(config, config.map_int_keysize, config.map_int_keysize+config.pointer_size, config.int_size+config.pointer_size+4)
+        int_keysize: int = config.map_int_keysize
+        pointer_size: int = config.pointer_size
+        self.__intint_decoder: HashtableDecoder = HashtableDecoder(config, HashNodeLayout(config, 'L', int_keysize, int_keysize+pointer_size, 'L'), _package_reference)
+        self.__intlong_decoder: HashtableDecoder = HashtableDecoder(config, HashNodeLayout(config, 'L', int_keysize, int_keysize+pointer_size, 'Q'), _package_reference)
+        longint_val_offset: int = 8+pointer_size if config.is_64bits else 8+pointer_size+4
+        self.__longint_decoder: HashtableDecoder = HashtableDecoder(config, HashNodeLayout(config, 'Q', 8, longint_val_offset, 'L'), _package_reference)
+        self.__int_decoder: HashtableDecoder = HashtableDecoder(config, HashNodeLayout(config, 'L', int_keysize))
+        self.__long_decoder: HashtableDecoder = HashtableDecoder(config, HashNodeLayout(config, 'Q', 8))
+        self.__intmulti_decoder: HashtableDecoder = HashtableDecoder(config, HashNodeLayout(config, 'L', int_keysize, config.int_size+pointer_size, 'L'), _package_reference, True)
         nr_keysize: int = 16 if config.is_64bits else 12
-        nr_valsize: int = 12 if config.is_64bits else 4
-        self.__nrhash_decoder: NRHashDecoder = NRHashDecoder(config, nr_keysize, nr_keysize+config.pointer_size, nr_valsize)
+        self.__nrhash_decoder: HashtableDecoder = HashtableDecoder(config, HashNodeLayout(config, 'L', nr_keysize, nr_keysize+pointer_size, 'L'))
         nhash_keysize: int = 16 if config.is_64bits else 8
-        self.__nhashset_decoder: NHashSetDecoder = NHashSetDecoder(config, nhash_keysize, nhash_keysize+config.pointer_size, 0)
+        self.__nhashset_decoder: HashtableDecoder = HashtableDecoder(config, HashNodeLayout(config, 'L', nhash_keysize))
+        self.__list_nodes: dict[bool, struct.Struct] = {}
 
     def handle_inint_hashtable(self, native_package_ptr: int, package_id: int) -> dict[int, object]:
         return self.__intint_decoder.decode_hash_table(native_package_ptr, 0, package_id)
@@ -164,27 +136,34 @@ class ContainersDecoder():
         return None
 
     def handle_array(self, native_package_ptr: int, package_id: int) -> list[object]:
-        array_ptr: int = self.__config.mem.read_uint(native_package_ptr)
+        array_ptr: int = Utils.get_pointer(self.__config.mem, native_package_ptr, self.__config.pointer_size)
         nb_items: int = self.__config.mem.read_uint(native_package_ptr+(self.__config.pointer_size+4))
-        result: list[object] = []
-        if nb_items == 0: return result
-        for i in range(nb_items):
-            if package_id == 104: result.append(self.__config.mem.read_long(array_ptr+(i*8)))
-            else:
-                val = self.__config.mem.read_uint(array_ptr+(i*4))
-                result.append(DataReference(val) if package_id == 176 else val)
-        return result
+        if nb_items == 0 or not array_ptr: return []
+        # The backing array is read at once and unpacked in one call
+        item_format: str = 'q' if package_id in LONG_ITEMS_PACKAGES else 'L'
+        buffer: bytes = self.__config.mem.read_bytes(array_ptr, nb_items * struct.calcsize('<' + item_format))
+        values: tuple = struct.unpack(f'<{nb_items}{item_format}', buffer)
+        if package_id in REFERENCE_PACKAGES: return [DataReference(val) for val in values]
+        return list(values)
 
     def handle_list(self, native_package_ptr: int, package_id: int) -> list[object]:
         nb_items: int = self.__config.mem.read_uint(native_package_ptr+(3*self.__config.pointer_size))
         result: list[object] = []
         if nb_items == 0: return result
-        list_item_ptr: int = self.__config.mem.read_uint(native_package_ptr+self.__config.pointer_size)
-        while list_item_ptr is not None:
-            if package_id == 111:
-                result.append(self.__config.mem.read_long(list_item_ptr))
-            else:
-                val = self.__config.mem.read_uint(list_item_ptr)
-                result.append(DataReference(val) if package_id == 182 else val)
-            list_item_ptr = self.__config.mem.read_uint(list_item_ptr+self.__config.int_size)
-        return result
\ No newline at end of file
+        # Each node is read at once: the value, then the next node pointer after an int
+        node: struct.Struct = self.__get_list_node(package_id in LONG_ITEMS_PACKAGES)
+        list_item_ptr: int = Utils.get_pointer(self.__config.mem, native_package_ptr+self.__config.pointer_size, self.__config.pointer_size)
+        while list_item_ptr and len(result) < nb_items:
+            val, list_item_ptr = node.unpack(self.__config.mem.read_bytes(list_item_ptr, node.size))
+            result.append(DataReference(val) if package_id in REFERENCE_PACKAGES else val)
+        return result
+
+    def __get_list_node(self, long_values: bool) -> struct.Struct:
+        node: struct.Struct = self.__list_nodes.get(long_values)
+        if node is None:
+            value_format: str = 'q' if long_values and self.__config.int_size >= 8 else ('l' if long_values else 'L')
+            gap: int = self.__config.int_size - struct.calcsize('<' + value_format)
+            pointer_format: str = 'Q' if self.__config.pointer_size == 8 else 'L'
+            node = struct.Struct(f'<{value_format}{gap}x{pointer_format}')
+            self.__list_nodes[long_values] = node
+        return node
@@ -5,7 +5,7 @@ from typing import TYPE_CHECKING
 from backend.common.config import GameConfig
 from backend.common.data_types import BitSet
 from backend.common.vault_data import VaultDescriptor, VaultItemDescriptor
-from backend.decoders.hash_decoder import HashtableDecoder
+from backend.decoders.hash_decoder import HashNodeLayout, HashtableDecoder
 from backend.decoders.properties_decoder import PropertiesDecoder
 from backend.managers.abstract_mappers import EnumMapper
 from backend.properties.properties_set import Properties
@@ -20,43 +20,26 @@ class MiscNativesDecoder():
         self.__config: GameConfig = config
         self.__data_facade = data_facade
         self.__props_decoder: PropertiesDecoder = PropertiesDecoder(config, data_facade)
+        int_keysize: int = config.map_int_keysize
+        value_offset: int = int_keysize + config.pointer_size
+        pointer_format: str = 'Q' if config.pointer_size == 8 else 'L'
+        # Chest id -> pointer to the UTF-16 chest name
+        self.__vault_decoder: HashtableDecoder = HashtableDecoder(config, HashNodeLayout(config, 'L', int_keysize, value_offset, pointer_format),
+                                                                  lambda str_ptr, package_id: Utils.retrieve_string(config.mem, str_ptr))
+        # Currency property id -> amount
+        self.__currency_decoder: HashtableDecoder = HashtableDecoder(config, HashNodeLayout(config, 'L', int_keysize, value_offset, 'L'))
         
-    class VaultDescriptorDecoder(HashtableDecoder):
-        def __init__(self, config: GameConfig) -> None:
-            super().__init__(config, config.map_int_keysize, config.map_int_keysize+config.pointer_size, config.pointer_size)
-
-        def parse_key(self, hash_table_data_ptr: int) -> int:
-            return self.__config.mem.read_uint(hash_table_data_ptr)
-
-        def parse_value(self, result_map: dict[int, str], hash_table_data_ptr: int, val_offset: int, package_id: int) -> str:
-            utf16_str_ptr = self.__config.mem.read_uint(hash_table_data_ptr+val_offset)
-            return Utils.retrieve_string(self.__config.mem, utf16_str_ptr)
-
-    class CurrencyRecordDecoder(HashtableDecoder):
-        def __init__(self, config: GameConfig) -> None:
-            super().__init__(config, config.map_int_keysize, config.map_int_keysize+config.pointer_size, 4)
-
-        def parse_key(self, hash_table_data_ptr: int) -> int:
-            return self.__config.mem.read_uint(hash_table_data_ptr)
-
-        def parse_value(self, result_map: dict[int, str], hash_table_data_ptr: int, val_offset: int, package_id: int) -> str:
-            return self.__config.mem.read_uint(hash_table_data_ptr+val_offset)
-
     def __decode_map_notes(self, buffer: bytearray) -> list[str]:
         enum_mapper: EnumMapper = self.__data_facade.get_enums_manager().get_enum_mapper(587202671)
         result: list[str] = []
-        nb_bits = len(buffer) * 8
-        bit_set: BitSet = BitSet.from_bytearray(buffer, nb_bits)
-        for i in range(len(bit_set)):
+        bit_set: BitSet = BitSet.from_bytes(buffer)
+        for i in bit_set.iter_set_bits():
             item_str: str = enum_mapper.get_str(i)
-            if item_str:
-                known: bool = bit_set.get(i)
-                if known: result.append(item_str)
+            if item_str: result.append(item_str)
         return result
 
     def handle_bank_repository_data(self, native_package_ptr: int, raw_size: int) -> VaultDescriptor:
-        decode: self.VaultDescriptorDecoder = self.VaultDescriptorDecoder(self.__config)
-        chests: dict[int, str] = decode.decode_hash_table(native_package_ptr, self.__config.pointer_size, 0)
+        chests: dict[int, str] = self.__vault_decoder.decode_hash_table(native_package_ptr, self.__config.pointer_size, 0)
         result: VaultDescriptor = VaultDescriptor()
         for chest_id in chests:
             result.add_chest(chest_id, chests.get(chest_id))
@@ -71,8 +54,7 @@ class MiscNativesDecoder():
         return VaultItemDescriptor(item_iid, props, prop_val)
 
     def handle_currency_record(self, native_package_ptr: int, raw_size: int) -> tuple[int]:
-        decoder: self.CurrencyRecordDecoder = self.CurrencyRecordDecoder(self.__config)
-        data: dict[int, int] = decoder.decode_hash_table(native_package_ptr, 0, 0)
+        data: dict[int, int] = self.__currency_decoder.decode_hash_table(native_package_ptr, 0, 0)
         copper: int = data.get(1879048730)
         copper = copper if copper else 0
         silver: int = data.get(1879048729)
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import struct
+import time
+from typing import TYPE_CHECKING, Callable
 
 from backend.common.config import GameConfig
 from backend.common.data_types import BitSet, Position
@@ -18,6 +20,9 @@ if TYPE_CHECKING:
     from backend.data_facade import DataFacade
 
 class NativePackagesDecoder():
+    # Header of a package factory: package id, raw size and flags
+    FACTORY_HEADER = struct.Struct('<3L')
+
     def __init__(self, config: GameConfig, data_facade: DataFacade) -> None:
         self.__config: GameConfig = config
         self.__data_facade: DataFacade = data_facade
@@ -26,44 +31,80 @@ class NativePackagesDecoder():
         self.__misc_decoder: MiscNativesDecoder = MiscNativesDecoder(config, data_facade)
         self.__friends_decoder: FriendAdaptorDecoder = FriendAdaptorDecoder(config, data_facade)
         self.__ignores_decoder: IgnoreAdaptorDecoder = IgnoreAdaptorDecoder(config, data_facade)
+        self.__decoders: dict[int, Callable[[int, int, int], object]] = self.__build_registry()
+        self.__headers: dict[int, tuple[int, int, int]] = {}
+        # package_id -> [number of decodes, total decode time in seconds]
+        self.__stats: dict[int, list] = {}
+
+    def __build_registry(self) -> dict[int, Callable[[int, int, int], object]]:
+        # Every decoder is called with the native package pointer, the package id and the raw size
+        containers: ContainersDecoder = self.__containers_decoder
+        misc: MiscNativesDecoder = self.__misc_decoder
+        registry: dict[int, Callable[[int, int, int], object]] = {}
+        def register(package_ids: tuple[int], decoder: Callable[[int, int, int], object]) -> None:
+            for package_id in package_ids: registry[package_id] = decoder
+        register((166,), lambda ptr, package_id, size: self.__handle_properties(ptr, size))
+        register((52,), lambda ptr, package_id, size: self.__handle_db_properties(ptr, size))
+        register((39,), lambda ptr, package_id, size: self.__handle_base_property(ptr, size))
+        register((199,), lambda ptr, package_id, size: self.__handle_string_info(ptr, size))
+        register((225,), lambda ptr, package_id, size: self.__handle_string(ptr, size))
+        register((160,), lambda ptr, package_id, size: self.__handle_position(ptr, size))
+        # Container variants, the package id selects the items width and the data references wrapping
+        register((17, 176, 104), lambda ptr, package_id, size: containers.handle_array(ptr, package_id))
+        register((25, 182, 111), lambda ptr, package_id, size: containers.handle_list(ptr, package_id))
+        register((11, 35), lambda ptr, package_id, size: containers.handle_inint_hashtable(ptr, package_id))
+        register((23,), lambda ptr, package_id, size: containers.handle_intlong_hashtable(ptr, package_id))
+        register((117, 97), lambda ptr, package_id, size: containers.handle_longint_hashtable(ptr, package_id))
+        register((18,), lambda ptr, package_id, size: containers.handle_int_set(ptr, package_id))
+        register((105,), lambda ptr, package_id, size: containers.handle_long_set(ptr, package_id))
+        register((13, 37), lambda ptr, package_id, size: containers.handle_intmulti_hashtable(ptr, package_id))
+        register((138,), lambda ptr, package_id, size: containers.handle_NRHash(ptr, package_id))
+        register((134,), lambda ptr, package_id, size: containers.handle_NHashSet(ptr, package_id))
+        register((57,), self.__handle_dynamic_bitset)
+        register((3103,), lambda ptr, package_id, size: misc.handle_bank_repository_data(ptr, size))
+        register((2567,), lambda ptr, package_id, size: misc.handle_bank_repository_data_adaptor(ptr, size))
+        register((403,), lambda ptr, package_id, size: misc.handle_currency_record(ptr, size))
+        register((407,), lambda ptr, package_id, size: misc.handle_discovered_mapnote_data(ptr, size))
+        register((414,), lambda ptr, package_id, size: self.__friends_decoder.handle_friend_adaptor(ptr, size))
+        register((433,), lambda ptr, package_id, size: self.__ignores_decoder.handle_ignore_adaptor(ptr, size))
+        return registry
+
+    def register_decoder(self, package_id: int, decoder: Callable[[int, int, int], object]) -> None:
+        self.__decoders[package_id] = decoder
+
+    @property
+    def stats(self) -> dict[int, tuple[int, float]]:
+        return {package_id: (count, seconds) for package_id, (count, seconds) in self.__stats.items()}
 
     def handle_native(self, package_factory_ptr: int, native_package_ptr: int) -> object:
-        props: Properties = None
-        package_id = self.__config.mem.read_uint(package_factory_ptr)
-        raw_size = self.__config.mem.read_uint(package_factory_ptr+4)
-        flags = self.__config.mem.read_uint(package_factory_ptr+8)
-
-        if package_id == 166: return self.__handle_properties(native_package_ptr, raw_size)
-        elif package_id == 52: return self.__handle_db_properties(native_package_ptr, raw_size)
-        elif package_id == 39: return self.__handle_base_property(native_package_ptr, raw_size)
-        elif package_id == 199: return self.__handle_string_info(native_package_ptr, raw_size)
-        elif package_id == 225: return self.__handle_string(native_package_ptr, raw_size)
-        elif package_id == 160: return self.__handle_position(native_package_ptr, raw_size)
-        elif package_id in (17, 176, 104): return self.__containers_decoder.handle_array(native_package_ptr, package_id)
-        elif package_id in (25, 182, 111): return self.__containers_decoder.handle_list(native_package_ptr, package_id)
-        elif package_id in (11, 35): return self.__containers_decoder.handle_inint_hashtable(native_package_ptr, package_id)
-        elif package_id == 23: return self.__containers_decoder.handle_intlong_hashtable(native_package_ptr, package_id)
-        elif package_id in (117, 97): return self.__containers_decoder.handle_longint_hashtable(native_package_ptr, package_id)
-        elif package_id == 18: return self.__containers_decoder.handle_int_set(native_package_ptr, package_id)
-        elif package_id == 105: return self.__containers_decoder.handle_long_set(native_package_ptr, package_id)
-        elif package_id in (13, 37): return self.__containers_decoder.handle_intmulti_hashtable(native_package_ptr, package_id)
-        elif package_id == 138: return self.__containers_decoder.handle_NRHash(native_package_ptr, package_id)
-        elif package_id == 134: return self.__containers_decoder.handle_NHashSet(native_package_ptr, package_id)
-        elif package_id == 57: return self.__handle_dynamic_bitset(native_package_ptr, package_id, raw_size)
-        elif package_id == 3103: return self.__misc_decoder.handle_bank_repository_data(native_package_ptr, raw_size)
-        elif package_id == 2567: return self.__misc_decoder.handle_bank_repository_data_adaptor(native_package_ptr, raw_size)
-        elif package_id == 403: return self.__misc_decoder.handle_currency_record(native_package_ptr, raw_size)
-        elif package_id == 407: return self.__misc_decoder.handle_discovered_mapnote_data(native_package_ptr, raw_size)
-        elif package_id == 414: return self.__friends_decoder.handle_friend_adaptor(native_package_ptr, raw_size)
-        elif package_id == 433: return self.__ignores_decoder.handle_ignore_adaptor(native_package_ptr, raw_size)
-        else:
+        package_id, raw_size, _ = self.__get_factory_header(package_factory_ptr)
+        decoder = self.__decoders.get(package_id)
+        if decoder is None:
             print('Unmanaged native: package_id=', package_id)
             return None
+        start = time.perf_counter()
+        try:
+            return decoder(native_package_ptr, package_id, raw_size)
+        finally:
+            stats = self.__stats.get(package_id)
+            if stats is None:
+                stats = self.__stats[package_id] = [0, 0.0]
+            stats[0] += 1
+            stats[1] += time.perf_counter() - start
+
+    def __get_factory_header(self, package_factory_ptr: int) -> tuple[int, int, int]:
+        # Factories are static data of the client, their header is read once
+        header = self.__headers.get(package_factory_ptr)
+        if header is None:
+            buffer = self.__config.mem.read_bytes(package_factory_ptr, NativePackagesDecoder.FACTORY_HEADER.size)
+            header = NativePackagesDecoder.FACTORY_HEADER.unpack(buffer)
+            self.__headers[package_factory_ptr] = header
+        return header
 
     def __handle_db_properties(self, native_package_ptr: int, size: int) -> Properties:
         ptr: int = self.__config.mem.read_uint(native_package_ptr)
         size: int = self.__config.pointer_size * 5 + 8
-        return self.__handle_db_properties(ptr, size)
+        return self.__handle_properties(ptr, size)
 
     def __handle_properties(self, properties_ptr: int, size: int) -> Properties:
         return self.__properties_decoder.handle_properties(properties_ptr, self.__config.pointer_size)
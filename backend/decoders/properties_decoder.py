@@ -116,17 +116,7 @@ class PropertiesDecoder():
         return prop_val
 
     def get_string_from_bit_field(self, bit_field: BitSet, enum_mapper: EnumMapper, seperator: str) -> str:
-        length = bit_field.count
-        if length > 0:
-            result_str = ""
-            for i in range(length):
-                if bit_field.get(i):
-                    item_str = enum_mapper.get_str(i+1)
-                    if item_str:
-                        if len(result_str) > 0: result_str += seperator
-                        result_str += item_str
-            return result_str
-        return None
+        return bit_field.get_string(enum_mapper, seperator)
 
     def handle_property(self, ptr: int, offset: int, property_def: PropertyDef) -> PropertyValue:
         if property_def and property_def.pid == 0: return PropertyValue(property_def, None, None)
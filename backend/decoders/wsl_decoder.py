@@ -1,52 +1,88 @@
 from __future__ import annotations
 
+import struct
 from typing import TYPE_CHECKING
 
-from backend.classes.class_definition import AttributeDefinition, ClassInstance
+from backend.classes.class_definition import (AttributeDefinition,
+                                              ClassDefinition, ClassInstance)
 from backend.common.config import GameConfig
 
 if TYPE_CHECKING:
     from backend.data_facade import DataFacade
 
+class WSLClassLayout():
+    # Every attribute is stored as its value followed by a 4 bytes type code.
+    # Long values are split in two words around an extra type code.
+    INT_TYPES = (AttributeDefinition.REFERENCE, AttributeDefinition.INTEGER)
+    LONG_TYPES = (AttributeDefinition.LONG, AttributeDefinition.UNUSED, AttributeDefinition.TIMESTAMP)
+
+    def __init__(self, class_def: ClassDefinition) -> None:
+        self.__class_index: int = class_def.class_index
+        self.__slots: list[tuple[int, int]] = []
+        fmt: str = '<'
+        slot: int = 0
+        for attribute in class_def.sorted_attributes:
+            attr_type: int = attribute.type
+            if attr_type in WSLClassLayout.INT_TYPES:
+                fmt += 'LL'
+                self.__slots.append((attr_type, slot))
+                slot += 2
+            elif attr_type == AttributeDefinition.FLOAT:
+                fmt += 'fL'
+                self.__slots.append((attr_type, slot))
+                slot += 2
+            elif attr_type in WSLClassLayout.LONG_TYPES:
+                fmt += 'LLLL'
+                self.__slots.append((attr_type, slot))
+                slot += 4
+            else:
+                print('Unsupported type:', attr_type)
+                fmt += '4x'
+                self.__slots.append((attr_type, -1))
+        padding: int = class_def.raw_size - struct.calcsize(fmt)
+        if padding > 0: fmt += f'{padding}x'
+        self.__struct: struct.Struct = struct.Struct(fmt)
+
+    @property
+    def class_index(self) -> int:
+        return self.__class_index
+    @property
+    def size(self) -> int:
+        return self.__struct.size
+
+    def decode(self, buffer: bytes) -> list[object]:
+        raw: tuple = self.__struct.unpack_from(buffer)
+        values: list[object] = []
+        for attr_type, slot in self.__slots:
+            if slot < 0:
+                values.append(None)
+            elif attr_type in WSLClassLayout.LONG_TYPES:
+                assert raw[slot+1] == attr_type
+                values.append((raw[slot+2] << 32) + raw[slot])
+            else:
+                values.append(raw[slot])
+        return values
+
 class WSLDecoder():
     def __init__(self, config: GameConfig, data_facade: DataFacade) -> None:
         self.__config = config
         self.__data_facade = data_facade
+        self.__layouts: dict[int, WSLClassLayout] = {}
 
     def handle_class_instance(self, package_factor_ptr: int, wsl_package_ptr: int) -> ClassInstance:
         package_id = self.__config.mem.read_uint(package_factor_ptr)
         if package_id == 0: return None
         class_def = self.__data_facade.get_wlib_data().get_class(package_id)
         if class_def is None: return None
+        layout: WSLClassLayout = self.__get_layout(class_def)
+        buffer: bytes = self.__config.mem.read_bytes(wsl_package_ptr, layout.size)
         class_instance: ClassInstance = ClassInstance(class_def)
-        attributes: list[AttributeDefinition] = class_def.sorted_attributes
-        offset = 0
-        for attribute in attributes:
-            value: object = self.__read_value(attribute, wsl_package_ptr, offset)
-            class_instance.set_attr_val(attribute, value)
+        class_instance.set_attr_vals(layout.decode(buffer))
         return class_instance
 
-    def __read_value(self, attribute: AttributeDefinition, wsl_package_ptr: int, offset: int) -> object:
-        type: int = attribute.type
-        result: object = None
-        if type in (1, 2): # REFERENCE, INTEGER
-            result = self.__config.mem.read_uint(wsl_package_ptr+offset)
-            offset += 4
-        elif type == 3: # FLOAT
-            result = self.__config.mem.read_float(wsl_package_ptr+offset)
-            offset += 4
-        elif type in (130, 131, 195): # LONG, SIGNED_DOUBLE, DOUBLE
-            v1 = self.__config.mem.read_uint(wsl_package_ptr+offset) & 0xFFFFFFFF
-            offset += 4
-            type_code = self.__config.mem.read_uint(wsl_package_ptr+offset)
-            assert type_code == attribute.type
-            offset += 4
-            v2 = self.__config.mem.read_uint(wsl_package_ptr+offset) & 0xFFFFFFFF
-            offset += 4
-            result = (v2 << 32) + v1
-        else:
-            print('Unsupported type:', type)
-        got_type_code = self.__config.mem.read_uint(wsl_package_ptr+offset)
-        print('Got type code:', got_type_code)
-        offset += 4
-        return result
\ No newline at end of file
+    def __get_layout(self, class_def: ClassDefinition) -> WSLClassLayout:
+        layout: WSLClassLayout = self.__layouts.get(class_def.class_index)
+        if layout is None:
+            layout = WSLClassLayout(class_def)
+            self.__layouts[class_def.class_index] = layout
+        return layout
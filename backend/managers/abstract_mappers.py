@@ -1,3 +1,9 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+
+
 class DidMapEntry():
     def __init__(self, key: int, did: int, label: str) -> None:
         self.__key: int = key
@@ -29,18 +35,30 @@ class DIDMapper(AbstractMapper):
     def __init__(self, data_id: int) -> None:
         super().__init__(data_id)
         self.__map: dict[int, DidMapEntry] = {}
+        # Exact label -> data id, and memoized results of the substring lookups without an exact match
+        self.__label_index: dict[str, int] = {}
+        self.__label_lookups: dict[str, int] = {}
 
     def add(self, key: int, data_id: int, label: str) -> None:
         entry: DidMapEntry = DidMapEntry(key, data_id, label)
         self.__map[key] = entry
+        self.__label_index.setdefault(label, data_id)
+        self.__label_lookups.clear()
 
     def get_entry(self, key: int) -> DidMapEntry:
         return self.__map.get(key)
 
+    def get_data_id_for_exact_label(self, label: str) -> int:
+        return self.__label_index.get(label)
+
     def get_data_id_for_label(self, label: str) -> int:
-        for entry in self.__map.values():
-            if label in entry.label: return entry.did
-        return None
+        # Exact labels are found in the index, else the first entry whose label contains the given one
+        data_id = self.__label_index.get(label)
+        if data_id is not None:
+            return data_id
+        if label not in self.__label_lookups:
+            self.__label_lookups[label] = next((entry.did for entry in self.__map.values() if label in entry.label), None)
+        return self.__label_lookups[label]
 
     def get_keys(self) -> list[int]:
         return sorted(list(self.__map.keys()))
@@ -53,28 +71,46 @@ class DIDMapper(AbstractMapper):
         return entry.label if entry else None
 
 class EnumMapper(AbstractMapper):
-    def __init__(self, data_id: int) -> None:
+    """
+    Immutable enum table stored as sorted tokens and their labels.
+    A derived enum keeps a reference to its base mapper instead of copying its entries:
+    lookups go through the flattened chain of mappers, the entries of the bases winning.
+    """
+    def __init__(self, data_id: int, entries: dict[int, str], base: EnumMapper = None, base_data_id: int = 0) -> None:
         super().__init__(data_id)
-        self.__base_data_id = 0
-        self.__tokens: dict[int, str] = {}
+        self.__base_data_id: int = base.data_id if base else base_data_id
+        tokens = sorted(entries.keys())
+        self.__tokens: array[int] = array('I', tokens)
+        self.__labels: tuple[str] = tuple(entries[token] for token in tokens)
+        self.__chain: tuple[EnumMapper] = (base.chain if base else ()) + (self,)
 
     @property
     def base_data_id(self) -> int:
         return self.__base_data_id
-    @base_data_id.setter
-    def base_data_id(self, base_data_id: int) -> None:
-        self.__base_data_id = base_data_id
+    @property
+    def chain(self) -> tuple[EnumMapper]:
+        return self.__chain
 
-    def get_tokens(self) -> list[int]:
-        token_list = list(self.__tokens.keys())
-        token_list.sort()
-        return token_list
+    def get_own_entries(self) -> tuple[list[int], tuple[str]]:
+        return self.__tokens.tolist(), self.__labels
 
-    def add_enum(self, token: int, value: str) -> None:
-        self.__tokens[token] = value
+    def get_tokens(self) -> list[int]:
+        tokens: set[int] = set()
+        for mapper in self.__chain:
+            tokens.update(mapper.get_own_entries()[0])
+        return sorted(tokens)
+
+    def get_own_str(self, token: int) -> str:
+        index = bisect_left(self.__tokens, token)
+        if index < len(self.__tokens) and self.__tokens[index] == token:
+            return self.__labels[index]
+        return None
 
     def get_str(self, token: int) -> str:
-        return self.__tokens.get(token)
+        for mapper in self.__chain:
+            value = mapper.get_own_str(token)
+            if value is not None: return value
+        return None
 
     def get_label(self, code: int) -> str:
-        return self.get_str(code)
\ No newline at end of file
+        return self.get_str(code)
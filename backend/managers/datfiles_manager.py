@@ -10,16 +10,21 @@ DAT_FILES = ("general", "anim", "gamelogic", "local_English",
         "map_1", "map_2", "map_3", "map_4", "map_14")
 
 class DatFilesManager():
-    def __init__(self, config: GameConfig, debug: bool = False) -> None:
+    def __init__(self, config: GameConfig, debug: bool = False, lotro_client_dir: str = None) -> None:
         self.__archives: dict[str, DATArchive] = {}
         self.__debug: bool = debug
+        self.__lotro_client_dir: str = lotro_client_dir if lotro_client_dir else config.lotro_client_dir
         for dat in DAT_FILES:
             aux = "x" if dat.find('aux') != -1 else ""
             if self.__debug: print('Opening and working with dat_file', f"client_{dat}.dat{aux}")
-            archive = DATArchive(os.path.join(config.lotro_client_dir, f"client_{dat}.dat{aux}"))
+            archive = DATArchive(os.path.join(self.__lotro_client_dir, f"client_{dat}.dat{aux}"))
             archive.open()
             self.__archives[dat] = archive
         
+    @property
+    def lotro_client_dir(self) -> str:
+        return self.__lotro_client_dir
+
     def get_archive(self, key: str) -> DATArchive:
         if self.__debug: print('File info:', self.__archives[key].file_input.name)
         return self.__archives[key]
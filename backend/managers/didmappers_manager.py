@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import io
+import struct
+import threading
+from typing import TYPE_CHECKING
+
+from backend.managers.abstract_mappers import DIDMapper
+from backend.utils.common_utils import Utils
+
+if TYPE_CHECKING:
+    from backend.data_facade import DataFacade
+
+class DIDMapperManager():
+    def __init__(self, facade: DataFacade) -> None:
+        self.__facade = facade
+        self.__data: dict[int, DIDMapper] = {}
+        # Guards the mappers, the resources are loaded outside of it
+        self.__lock = threading.Lock()
+
+    def get_did_mapper(self, data_id: int) -> DIDMapper:
+        # Resources which cannot be loaded are cached as None to avoid loading them again
+        with self.__lock:
+            if data_id in self.__data:
+                return self.__data[data_id]
+        mapper: DIDMapper = None
+        data: bytearray = self.__facade.load_data(data_id)
+        if data: mapper = self.__decode_did_mapper_resource(data)
+        with self.__lock:
+            return self.__data.setdefault(data_id, mapper)
+
+    def __decode_did_mapper_resource(self, data: bytearray) -> DIDMapper:
+        ins: io.BytesIO = io.BytesIO(data)
+        did: int = Utils.read_uint32(ins)
+        data_id_map: dict[int, int] = {}
+        labels_map: dict[int, str] = {}
+        while Utils.bytes_available(ins):
+            count = Utils.read_tsize(ins)
+            for _ in range(count):
+                key, val = struct.unpack('<2L', ins.read(8))
+                data_id_map[key] = val
+            assert count == Utils.read_tsize(ins)
+            for _ in range(count):
+                key = Utils.read_uint32(ins)
+                label = Utils.read_ascii_string(ins)
+                labels_map[key] = label
+        if Utils.bytes_available(ins): print('WARN: Expected 0 available bytes here. Got:', Utils.bytes_available(ins))
+        result: DIDMapper = DIDMapper(did)
+        for key in data_id_map:
+            id = data_id_map.get(key)
+            label = labels_map.get(key)
+            if label is not None:
+                result.add(key, id, label)
+                continue
+            else: print('WARN: Label not found for key:', key, ' and id:', id)
+        return result
@@ -1,10 +1,17 @@
 from __future__ import annotations
 
 import io
-from typing import TYPE_CHECKING
+import os
+import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Iterable
 
+from backend.common.file_entry import FileEntry
 from backend.managers.abstract_mappers import EnumMapper
 from backend.managers.strings_manager import StringsManager
+from backend.paths import CACHE_PATH
+from backend.strings.string_info import TableEntryStringInfo
 from backend.strings.string_info_utils import StringInfoUtils
 from backend.utils.common_utils import Utils
 from backend.utils.prop_utils import PropertiesUtils
@@ -13,9 +20,18 @@ if TYPE_CHECKING:
     from backend.data_facade import DataFacade
 
 class EnumManager():
+    CACHE_FILE = os.path.join(CACHE_PATH, 'enums.pickle')
+    PRELOAD_WORKERS = 4
+
     def __init__(self, facade: DataFacade) -> None:
         self.__facade = facade
         self.__data: dict[int, EnumMapper] = {}
+        # Rendered labels persisted on disk: data_id -> (build key, base data id, own entries, build keys of the string tables)
+        self.__labels_cache: dict[int, tuple[tuple[int, int], int, dict[int, str], dict[int, tuple[int, int]]]] = None
+        self.__labels_cache_dirty: bool = False
+        self.__table_keys: dict[int, tuple[int, int]] = {} # build keys of the string tables, by table id
+        # Guards the mappers and the labels cache, the DAT reads and the decoding are done outside of it
+        self.__lock = threading.RLock()
 
     def resolve_enum(self, data_id: int, token: int) -> str:
         table = self.get_enum_mapper(data_id)
@@ -24,37 +40,125 @@ class EnumManager():
         return None
 
     def get_enum_mapper(self, data_id: int) -> EnumMapper:
-        table = self.__data.get(data_id)
-        if table is None:
-            data: bytearray = self.__facade.load_data(data_id)
-            if data:
-                strings_manager = self.__facade.get_strings_manager()
-                table = self.__decode_enum_mapper_resource(strings_manager, data)
-                self.__data[data_id] = table
-                base_data_id = table.base_data_id
-                if base_data_id:
-                    base_enum = self.get_enum_mapper(base_data_id)
-                    if base_enum:
-                        for token in base_enum.get_tokens():
-                            table.add_enum(token, base_enum.get_str(token))
-        return table
-
-    def __decode_enum_mapper_resource(self, strings_manager: StringsManager, data: bytearray) -> EnumMapper:
+        with self.__lock:
+            if data_id in self.__data:
+                return self.__data[data_id]
+        # A mapper built by two threads at once is kept once
+        mapper = self.__build_mapper(data_id, self.__load_entries(data_id))
+        with self.__lock:
+            return self.__data.setdefault(data_id, mapper)
+
+    def preload(self, enum_ids: Iterable[int]) -> None:
+        """
+        Load many enums at once: the entries of the enums and of their bases are
+        loaded by a pool of threads, then the mappers are built and the labels cache saved.
+        """
+        pending: set[int] = set(enum_ids)
+        decoded: dict[int, tuple[int, dict[int, str]]] = {}
+        with ThreadPoolExecutor(max_workers=EnumManager.PRELOAD_WORKERS) as executor:
+            while pending:
+                with self.__lock:
+                    pending = {x for x in pending if x not in self.__data and x not in decoded}
+                batch = list(pending)
+                results = list(executor.map(self.__load_entries, batch))
+                decoded.update(zip(batch, results))
+                # Bases are loaded in the next round
+                pending = {x[0] for x in results if x and x[0]}
+        with self.__lock:
+            for data_id in decoded:
+                self.__resolve_mapper(data_id, decoded)
+        self.save_cache()
+
+    def save_cache(self) -> None:
+        with self.__lock:
+            if not self.__labels_cache_dirty: return
+            labels_cache = dict(self.__labels_cache)
+            self.__labels_cache_dirty = False
+        try:
+            os.makedirs(CACHE_PATH, exist_ok=True)
+            tmp_file = EnumManager.CACHE_FILE + '.tmp'
+            with open(tmp_file, 'wb') as outf:
+                pickle.dump(labels_cache, outf, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, EnumManager.CACHE_FILE)
+        except Exception as exp:
+            print('Could not write enums cache:', EnumManager.CACHE_FILE, exp)
+
+    def __resolve_mapper(self, data_id: int, decoded: dict[int, tuple[int, dict[int, str]]]) -> EnumMapper:
+        if data_id not in self.__data:
+            self.__data[data_id] = self.__build_mapper(data_id, decoded.get(data_id), decoded)
+        return self.__data[data_id]
+
+    def __build_mapper(self, data_id: int, entries: tuple[int, dict[int, str]], decoded: dict = None) -> EnumMapper:
+        if entries is None: return None
+        base_data_id, own_entries = entries
+        base: EnumMapper = None
+        if base_data_id:
+            if decoded is not None and base_data_id in decoded:
+                base = self.__resolve_mapper(base_data_id, decoded)
+            else:
+                base = self.get_enum_mapper(base_data_id)
+        return EnumMapper(data_id, own_entries, base, base_data_id)
+
+    def __load_entries(self, data_id: int) -> tuple[int, dict[int, str]]:
+        # Returns the base data id and the own entries of an enum, from the labels cache if it is up to date
+        build_key = self.__get_build_key(data_id)
+        with self.__lock:
+            cached = self.__get_labels_cache().get(data_id)
+        # The labels are rendered from string tables, a localization update makes them stale too.
+        # Entries written without the keys of the tables are decoded again
+        if cached and len(cached) == 4 and cached[0] == build_key \
+            and all(self.__get_table_key(table_id) == table_key for table_id, table_key in cached[3].items()):
+            return cached[1], cached[2]
+        data: bytearray = self.__facade.load_data(data_id)
+        if not data: return None
+        strings_manager = self.__facade.get_strings_manager()
+        base_data_id, own_entries, table_ids = self.__decode_enum_mapper_resource(strings_manager, data)
+        if build_key:
+            table_keys = {table_id: self.__get_table_key(table_id) for table_id in table_ids}
+            with self.__lock:
+                self.__labels_cache[data_id] = (build_key, base_data_id, own_entries, table_keys)
+                self.__labels_cache_dirty = True
+        return base_data_id, own_entries
+
+    def __get_build_key(self, data_id: int) -> tuple[int, int]:
+        # Version and timestamp of a DAT entry
+        entry: FileEntry = self.__facade.get_file_entry(data_id)
+        return (entry.version, entry.timestamp) if entry else None
+
+    def __get_table_key(self, table_id: int) -> tuple[int, int]:
+        # The string tables are shared by many enums, their build keys are looked up once
+        if table_id not in self.__table_keys:
+            self.__table_keys[table_id] = self.__get_build_key(table_id)
+        return self.__table_keys[table_id]
+
+    def __get_labels_cache(self) -> dict[int, tuple[tuple[int, int], int, dict[int, str], dict[int, tuple[int, int]]]]:
+        if self.__labels_cache is None:
+            self.__labels_cache = {}
+            if os.path.exists(EnumManager.CACHE_FILE):
+                try:
+                    with open(EnumManager.CACHE_FILE, 'rb') as inf:
+                        self.__labels_cache = pickle.load(inf)
+                except Exception as exp:
+                    print('Could not load enums cache:', EnumManager.CACHE_FILE, exp)
+        return self.__labels_cache
+
+    def __decode_enum_mapper_resource(self, strings_manager: StringsManager, data: bytearray) -> tuple[int, dict[int, str], set[int]]:
+        # Returns the base data id, the entries and the ids of the string tables the labels come from
         ins = io.BytesIO(data)
         did = Utils.read_uint32(ins)
-        enum_mapper = EnumMapper(did)
+        entries: dict[int, str] = {}
         base_did = Utils.read_uint32(ins)
-        if base_did: enum_mapper.base_data_id = base_did
         nb_raw_entries = Utils.read_tsize(ins)
         for i in range(nb_raw_entries):
             key = Utils.read_uint32(ins)
             value = Utils.read_pascal_string(ins)
-            enum_mapper.add_enum(key, value)
+            entries[key] = value
+        table_ids: set[int] = set()
         nb_string_info_entries = Utils.read_tsize(ins)
         for j in range(nb_string_info_entries):
             key = Utils.read_uint32(ins)
             string_info_value = PropertiesUtils.read_string_info(ins)
+            if isinstance(string_info_value, TableEntryStringInfo): table_ids.add(string_info_value.table_id)
             value = StringInfoUtils.build_string_format(strings_manager, string_info_value)
-            if value: enum_mapper.add_enum(key, value)
-        return enum_mapper
-    
\ No newline at end of file
+            if value: entries[key] = value
+        return base_did, entries, table_ids
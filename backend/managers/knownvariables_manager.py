@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-import json
 import os
 
+from backend.common.compiled_map import CompiledStringMap
 from backend.paths import DATA_PATH
 from backend.utils.common_utils import Utils
 
@@ -11,20 +11,18 @@ class KnownVariablesManager(object):
     _instance = None
 
     def __new__(cls) -> KnownVariablesManager:
-        if not hasattr(cls, 'instance'):
+        if cls._instance is None:
             cls._instance = super(KnownVariablesManager, cls).__new__(cls)
             cls.__cache: dict[int, str] = {}
+            cls.__known_variables: CompiledStringMap = None
             cls.__initialize()
         return cls._instance
 
     @classmethod
     def __load(cls) -> None:
-        # Load the known variables from the file in the data folder
-        with open(os.path.join(DATA_PATH, 'KnownVariables.json')) as inf:
-            known_variables: list[str] = json.load(inf)
-        for known_variable in known_variables:
-            var_hash = Utils.hash(known_variable)
-            cls.__cache[var_hash] = known_variable
+        # Load the known variables from the compiled form of the file in the data folder
+        cls.__known_variables = CompiledStringMap.load(os.path.join(DATA_PATH, 'KnownVariables.json'),
+                                                       lambda known_variables: ((Utils.hash(x), x) for x in known_variables))
 
     @classmethod
     def __initialize(cls) -> None:
@@ -37,6 +35,7 @@ class KnownVariablesManager(object):
 
     @classmethod
     def get_variable_from_hash(cls, var_hash: int) -> str:
-        if var_hash in cls.__cache:
-            return cls.__cache[var_hash]
-        return None
+        known_variable = cls.__known_variables.get(var_hash)
+        if known_variable is not None:
+            return known_variable
+        return cls.__cache.get(var_hash)
@@ -7,15 +7,16 @@ from backend.utils.prop_utils import PropertiesUtils
 
 
 class PropertiesRegistry():
-    properties: dict[int, PropertyDef] = {}
-    props_by_name: dict[str, PropertyDef] = {}
+    def __init__(self) -> None:
+        self.properties: dict[int, PropertyDef] = {}
+        self.props_by_name: dict[str, PropertyDef] = {}
 
     def register(self, prop_def: PropertyDef) -> None:
         self.properties[prop_def.pid] = prop_def
         self.props_by_name[prop_def.name] = prop_def
 
     def get_property_def(self, property_id: int) -> PropertyDef:
-        return self.properties[property_id]
+        return self.properties.get(property_id)
 
     def get_property_def_by_name(self, name: str) -> PropertyDef:
         return self.props_by_name[name]
@@ -1,13 +1,19 @@
 from __future__ import annotations
 
 import io
-from typing import TYPE_CHECKING
+import struct
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable
 
 from backend.utils.common_utils import Utils
 
 if TYPE_CHECKING:
     from backend.data_facade import DataFacade
 
+UINT32 = struct.Struct('<L')
+ENTRY_HEADER = struct.Struct('<2L')
+
 class StringTableEntry():
     def __init__(self, label_parts: list[str], variable_ids: list[int], variable_names: list[str]) -> None:
         self.__label_parts = label_parts
@@ -24,78 +30,152 @@ class StringTableEntry():
     def variable_names(self) -> list[str]:
         return self.__variable_names
 
+    @classmethod
+    def from_stream(cls, ins: io.BytesIO) -> StringTableEntry:
+        label_parts_count = Utils.read_uint32(ins)
+        label_parts: list[str] = []
+        for _ in range(label_parts_count):
+            label_parts.append(Utils.read_prefixed_utf16(ins))
+        nb_variables = Utils.read_uint32(ins)
+        variable_ids: list[int] = list(struct.unpack(f'<{nb_variables}L', ins.read(4 * nb_variables)))
+        assert nb_variables == (label_parts_count - 1)
+
+        variable_names: list[str] = []
+        has_variable_names = Utils.read_bool(ins)
+        if has_variable_names:
+            variable_names_cnt = Utils.read_uint32(ins)
+            assert variable_names_cnt == nb_variables
+            for _ in range(variable_names_cnt):
+                variable_names.append(Utils.read_prefixed_utf16(ins))
+        return cls(label_parts, variable_ids, variable_names)
+
+    @staticmethod
+    def skip(buffer: bytes, offset: int) -> int:
+        # Returns the offset following the entry which starts at the given offset
+        label_parts_count, = UINT32.unpack_from(buffer, offset)
+        offset += 4
+        for _ in range(label_parts_count):
+            offset = StringTableEntry.__skip_utf16(buffer, offset)
+        nb_variables, = UINT32.unpack_from(buffer, offset)
+        offset += 4 + 4 * nb_variables
+        has_variable_names = buffer[offset]
+        offset += 1
+        if has_variable_names:
+            variable_names_cnt, = UINT32.unpack_from(buffer, offset)
+            offset += 4
+            for _ in range(variable_names_cnt):
+                offset = StringTableEntry.__skip_utf16(buffer, offset)
+        return offset
+
+    @staticmethod
+    def __skip_utf16(buffer: bytes, offset: int) -> int:
+        length = buffer[offset]
+        # Short strings have a single byte length
+        if length < 0x80: return offset + 1 + length * 2
+        length, offset = Utils.read_vle_from(buffer, offset)
+        return offset + length * 2
+
 class StringTable():
-    def __init__(self, data_id: int) -> None:
+    """
+    Table of strings. Entries can be added decoded, or as offsets in the table buffer:
+    those are decoded on their first access.
+    """
+    def __init__(self, data_id: int, buffer: bytes = None) -> None:
         self.__data_id = data_id
+        self.__buffer = buffer
         self.__entries: dict[int, StringTableEntry] = {}
+        self.__offsets: dict[int, int] = {}
 
     @property
     def data_id(self) -> int:
         return self.__data_id
     
     def get_tokens(self) -> list[int]:
-        tokens = list(self.__entries.keys())
+        tokens = list(self.__entries.keys() | self.__offsets.keys())
         tokens.sort()
         return tokens
 
     def add_entry(self, token: int, entry: StringTableEntry) -> None:
         self.__entries[token] = entry
 
+    def add_entry_offset(self, token: int, offset: int) -> None:
+        self.__offsets[token] = offset
+
     def get_string(self, token: int) -> list[str]:
         entry = self.get_entry(token)
         if entry is not None: return entry.label_strings
         return None
 
     def get_entry(self, token: int) -> StringTableEntry:
-        return self.__entries[token]
+        entry = self.__entries.get(token)
+        if entry is None:
+            offset = self.__offsets.get(token)
+            if offset is None: return None
+            ins = io.BytesIO(self.__buffer)
+            ins.seek(offset)
+            entry = StringTableEntry.from_stream(ins)
+            self.__entries[token] = entry
+        return entry
 
 class StringsManager():
+    # Number of string formats kept, the least recently used ones are dropped first
+    FORMATS_CACHE_SIZE = 4096
+
     def __init__(self, facade: DataFacade) -> None:
         self.__facade = facade
         self.__data: dict[int, StringTable] = {}
+        self.__formats: OrderedDict[tuple[int, int], str] = OrderedDict()
+        # Guards the caches, the tables are loaded outside of it
+        self.__lock = threading.Lock()
+
+    def get_table(self, table_id: int) -> StringTable:
+        # Tables which cannot be loaded are cached as None to avoid loading them again
+        with self.__lock:
+            if table_id in self.__data:
+                return self.__data[table_id]
+        table: StringTable = None
+        data = self.__facade.load_data(table_id)
+        if data:
+            table = StringsManager.decode_string_table(data)
+        with self.__lock:
+            return self.__data.setdefault(table_id, table)
 
     def get_entry(self, table_id: int, token_id: int) -> StringTableEntry:
-        table = self.__data.get(table_id)
-        if not table:
-            data = self.__facade.load_data(table_id)
-            if data:
-                table = self.__decode_string_table_resource(data)
-                self.__data[table_id] = table
-                return table.get_entry(token_id)
-        return None
+        table = self.get_table(table_id)
+        if table is None: return None
+        return table.get_entry(token_id)
+
+    def get_string_format(self, table_id: int, token_id: int, format_builder: Callable[[StringTableEntry], str]) -> str:
+        key = (table_id, token_id)
+        with self.__lock:
+            string_format = self.__formats.get(key)
+            if string_format is not None:
+                self.__formats.move_to_end(key)
+                return string_format
+        entry = self.get_entry(table_id, token_id)
+        if entry is None: return None
+        string_format = format_builder(entry)
+        with self.__lock:
+            self.__formats[key] = string_format
+            if len(self.__formats) > StringsManager.FORMATS_CACHE_SIZE:
+                self.__formats.popitem(last=False)
+        return string_format
 
-    def __decode_string_table_resource(self, buffer: bytearray) -> StringTable:
+    @staticmethod
+    def decode_string_table(buffer: bytearray) -> StringTable:
+        # Only the offsets of the entries are read here, their strings are decoded on access
+        buffer = bytes(buffer)
         ins = io.BytesIO(buffer)
         did = Utils.read_uint32(ins)
-        str_table = StringTable(did)
+        str_table = StringTable(did, buffer)
         unknown = Utils.read_uint32(ins)
         assert unknown == 1 or unknown == 0
         nb_entries = Utils.read_tsize(ins)
+        offset = ins.tell()
         for _ in range(nb_entries):
-            self.__decode_string_sublist(ins, str_table)
+            token, unknown = ENTRY_HEADER.unpack_from(buffer, offset)
+            assert unknown == 0
+            offset += ENTRY_HEADER.size
+            str_table.add_entry_offset(token, offset)
+            offset = StringTableEntry.skip(buffer, offset)
         return str_table
-
-    def __decode_string_sublist(self, ins: io.BytesIO, str_table: StringTable) -> None:
-        token = Utils.read_uint32(ins)
-        unknown = Utils.read_uint32(ins)
-        assert unknown == 0
-        
-        label_parts_count = Utils.read_uint32(ins)
-        label_parts: list[str] = []
-        for _ in range(label_parts_count):
-            label_parts.append(Utils.read_prefixed_utf16(ins))
-        nb_variables = Utils.read_uint32(ins)
-        variable_ids: list[int] = []
-        for _ in range(nb_variables):
-            variable_ids.append(Utils.read_uint32(ins))
-        assert nb_variables == (label_parts_count - 1)
-        
-        variable_names: list[str] = []
-        has_variable_names = Utils.read_bool(ins)
-        if has_variable_names:
-            variable_names_cnt = Utils.read_uint32(ins)
-            assert variable_names_cnt == nb_variables
-            for _ in range(variable_names_cnt):
-                variable_names.append(Utils.read_prefixed_utf16(ins))
-        entry = StringTableEntry(label_parts, variable_ids, variable_names)
-        str_table.add_entry(token, entry)
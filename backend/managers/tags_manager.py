@@ -43,7 +43,7 @@ class TagsManager():
         self.__load_tags()
 
     def get_tag(self, code: str) -> TagDefinition:
-        return self.__tags[code]
+        return self.__tags.get(code)
 
     def __register_tag(self, code: str, meaning: str) -> None:
         tag_definition = TagDefinition(code, meaning)
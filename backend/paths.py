@@ -2,3 +2,5 @@ import os
 
 # Make constant paths for all directories in the project
 DATA_PATH = os.path.join(os.path.dirname(__file__), 'data')
+# Binary caches built from the game files and the data folder
+CACHE_PATH = os.path.join(os.getenv('APPDATA', os.path.expanduser('~')), 'LoDE', 'cache')
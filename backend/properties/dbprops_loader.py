@@ -2,11 +2,10 @@ from __future__ import annotations
 
 import io
 import struct
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable
 
 from backend.common.data_types import BitSet
-from backend.managers.abstract_mappers import (AbstractMapper, DIDMapper,
-                                               EnumMapper)
+from backend.managers.abstract_mappers import AbstractMapper
 from backend.managers.properties_manager import PropertiesRegistry
 from backend.properties.properties_def import PropertyDef
 from backend.properties.properties_set import Properties
@@ -14,14 +13,32 @@ from backend.properties.properties_type import PropertyType
 from backend.properties.properties_val import ArrayPropertyValue, PropertyValue
 from backend.strings.string_info_utils import StringInfoUtils
 from backend.utils.common_utils import Utils
-from backend.utils.prop_utils import PropertiesUtils
+from backend.utils.prop_utils import FixedSizeReader, PropertiesUtils
 
 if TYPE_CHECKING:
     from backend.data_facade import DataFacade
 
+UINT32 = struct.Struct('<L')
+
 class DBPropertiesLoader():
+    """
+    Long-lived decoder of the DB properties, one per facade. The definition, value reader,
+    type handler and enum mapper of a property are resolved once per property id.
+    """
     def __init__(self, facade: DataFacade) -> None:
         self.__facade: DataFacade = facade
+        self.__registry: PropertiesRegistry = None
+        self.__decoders: dict[int, tuple[PropertyDef, Callable, Callable, AbstractMapper]] = {}
+        self.__handlers: dict[int, Callable] = {
+            PropertyType.Array: self.__handle_array,
+            PropertyType.Struct: self.__handle_struct,
+            PropertyType.StringInfo: self.__handle_string_info,
+            PropertyType.EnumMapper: self.__handle_enum_mapper,
+            PropertyType.PropertyID: self.__handle_property_id,
+            PropertyType.Bitfield32: self.__handle_bitfield_32,
+            PropertyType.Bitfield: self.__handle_bitfield,
+            PropertyType.Bitfield64: self.__handle_bitfield_64,
+        }
 
     def decode_properties_resource(self, buffer: bytearray) -> Properties:
         ins: io.BytesIO = io.BytesIO(buffer)
@@ -48,89 +65,97 @@ class DBPropertiesLoader():
         return self.decode_property_value(ins, property_id)
 
     def decode_property_value(self, ins: io.BytesIO, property_id: int) -> PropertyValue:
-        array_property_val: ArrayPropertyValue = None
-        registry: PropertiesRegistry = self.__facade.get_properties_registry()
-        definition: PropertyDef = registry.get_property_def(property_id)
+        decoder = self.__decoders.get(property_id)
+        if decoder is None: decoder = self.__build_decoder(property_id)
+        definition, reader, handler, mapper = decoder
+        value: object = reader(ins)
+        if handler is None: return PropertyValue(definition, value, None)
+        return handler(ins, definition, value, mapper)
+
+    def __build_decoder(self, property_id: int) -> tuple[PropertyDef, Callable, Callable, AbstractMapper]:
+        if self.__registry is None: self.__registry = self.__facade.get_properties_registry()
+        definition: PropertyDef = self.__registry.get_property_def(property_id)
         if definition is None: raise Exception('Property definition not found:', property_id)
-        type: PropertyType = definition.ptype
-        value: object = PropertiesUtils.read_property_value(ins, type)
-        result: PropertyValue = None
+        type: int = definition.ptype.val
+        reader: Callable = PropertiesUtils.get_value_reader(type)
+        if reader is None: raise Exception('Unmanaged property type:', type)
+        mapper: AbstractMapper = None
+        if type == PropertyType.EnumMapper:
+            mapper = self.__get_enum(definition.data)
+            if mapper is None: print('WARN: Unsupported enum identifier:', definition.data)
+        elif type in (PropertyType.Bitfield32, PropertyType.Bitfield, PropertyType.Bitfield64):
+            mapper = self.__facade.get_enums_manager().get_enum_mapper(definition.data)
+        decoder = (definition, reader, self.__handlers.get(type), mapper)
+        self.__decoders[property_id] = decoder
+        return decoder
+
+    def __handle_array(self, ins: io.BytesIO, definition: PropertyDef, value: object, mapper: AbstractMapper) -> PropertyValue:
+        nb_items: int = int(value)
+        values: list[PropertyValue] = self.__decode_fixed_size_items(ins, nb_items) if nb_items > 1 else None
+        if values is None:
+            values = [self.decode_property(ins, False) for _ in range(nb_items)]
+        return ArrayPropertyValue(definition, values)
+
+    def __decode_fixed_size_items(self, ins: io.BytesIO, nb_items: int) -> list[PropertyValue]:
+        # Fast path for the arrays of one fixed-size property, None if the items are not like that
+        start = ins.tell()
+        head = ins.read(4)
+        ins.seek(start)
+        if len(head) < 4: return None
+        property_id = UINT32.unpack(head)[0]
+        if property_id == 0: return None
+        definition, _, handler, mapper = self.__decoders.get(property_id) or self.__build_decoder(property_id)
+        reader: FixedSizeReader = PropertiesUtils.get_fixed_size_reader(definition.ptype.val)
+        if reader is None: return None
+        values = PropertiesUtils.read_fixed_size_items(ins, property_id, reader, nb_items)
+        if values is None: return None
+        # The handlers of fixed-size types only use the value
+        if handler is None: return [PropertyValue(definition, value, None) for value in values]
+        return [handler(ins, definition, value, mapper) for value in values]
+
+    def __handle_struct(self, ins: io.BytesIO, definition: PropertyDef, value: object, mapper: AbstractMapper) -> PropertyValue:
+        set: Properties = Properties()
+        for _ in range(int(value)):
+            set.set_property(self.decode_property(ins, True))
+        return PropertyValue(definition, set, None)
+
+    def __handle_string_info(self, ins: io.BytesIO, definition: PropertyDef, value: object, mapper: AbstractMapper) -> PropertyValue:
+        value = StringInfoUtils.build_string_format(self.__facade.get_strings_manager(), value)
+        return PropertyValue(definition, value, None)
+
+    def __handle_enum_mapper(self, ins: io.BytesIO, definition: PropertyDef, value: object, mapper: AbstractMapper) -> PropertyValue:
+        complement = mapper.get_label(int(value)) if mapper is not None else None
+        return PropertyValue(definition, value, complement)
+
+    def __handle_property_id(self, ins: io.BytesIO, definition: PropertyDef, value: object, mapper: AbstractMapper) -> PropertyValue:
+        complement: object = None
+        if isinstance(value, int):
+            property_def: PropertyDef = self.__registry.get_property_def(value)
+            if property_def is not None: complement = property_def.name
+        return PropertyValue(definition, value, complement)
+
+    def __handle_bitfield_32(self, ins: io.BytesIO, definition: PropertyDef, value: object, mapper: AbstractMapper) -> PropertyValue:
+        complement: object = None
+        if isinstance(value, int) and mapper is not None:
+            complement = BitSet.from_flags(value).get_string(mapper, ',')
+        return PropertyValue(definition, value, complement)
+
+    def __handle_bitfield(self, ins: io.BytesIO, definition: PropertyDef, value: object, mapper: AbstractMapper) -> PropertyValue:
+        complement: object = None
+        if isinstance(value, BitSet) and mapper is not None:
+            complement = value.get_string(mapper, ',')
+        return PropertyValue(definition, value, complement)
+
+    def __handle_bitfield_64(self, ins: io.BytesIO, definition: PropertyDef, value: object, mapper: AbstractMapper) -> PropertyValue:
         complement: object = None
-        if type == PropertyType.Array:
-            nb_items: int = int(value)
-            values: list[PropertyValue] = [None] * nb_items
-            for i in range(nb_items):
-                values[i] = self.decode_property(ins, False)
-            array_property_val = ArrayPropertyValue(definition, values)
-            value = values
-        elif type == PropertyType.Struct:
-            set: Properties = Properties()
-            nb_items: int = int(value)
-            for _ in range(nb_items):
-                set.set_property(self.decode_property(ins, True))
-            value = set
-        elif type == PropertyType.StringInfo:
-            value = StringInfoUtils.build_string_format(self.__facade.get_strings_manager(), value)
-        elif type == PropertyType.EnumMapper:
-            enum_id = definition.data
-            mapper: AbstractMapper = self.__get_enum(enum_id)
-            if mapper is not None: complement = mapper.get_label(int(value))
-            else: print('WARN: Unsupported enum identifier:', enum_id)
-        elif type == PropertyType.PropertyID:
-            if isinstance(value, int):
-                property_def: PropertyDef = self.__facade.get_properties_registry().get_property_def(int(value))
-                if property_def is not None: complement = property_def.name
-        elif type == PropertyType.Bitfield32:
-            if isinstance(value, int):
-                enum_id = definition.data
-                enum_mapper: EnumMapper = self.__facade.get_enums_manager().get_enum_mapper(enum_id)
-                bitset: BitSet = BitSet.from_flags(int(value))
-                complement = bitset.get_string(enum_mapper, ',')
-        elif type == PropertyType.Bitfield:
-             if isinstance(value, BitSet):
-                bitset: BitSet = value
-                enum_id = definition.data
-                enum_mapper: EnumMapper = self.__facade.get_enums_manager().get_enum_mapper(enum_id)
-                complement = bitset.get_string(enum_mapper, ',')
-        elif type == PropertyType.Bitfield64:
-            if isinstance(value, int):
-                enum_id = definition.data
-                enum_mapper: EnumMapper = self.__facade.get_enums_manager().get_enum_mapper(enum_id)
-                bitset: BitSet = BitSet.from_flags(int(value), True)
-                complement = bitset.get_string(enum_mapper, ',')
-        if array_property_val is None:
-            return PropertyValue(definition, value, complement)
-        return None
+        if isinstance(value, int) and mapper is not None:
+            complement = BitSet.from_flags(value, True).get_string(mapper, ',')
+        return PropertyValue(definition, value, complement)
 
     def __get_enum(self, enum_id: int) -> AbstractMapper:
-        mapper: AbstractMapper = None
-        if enum_id >= 587202560 and enum_id <= 603979775: 
+        if enum_id >= 587202560 and enum_id <= 603979775:
             return self.__facade.get_enums_manager().get_enum_mapper(enum_id)
         elif enum_id >= 671088640 and enum_id <= 687865855:
-            data: bytearray = self.__facade.load_data(enum_id)
-            ins: io.BytesIO = io.BytesIO(data)
-            did: int = Utils.read_uint32(ins)
-            data_id_map: dict[int, int] = {}
-            labels_map: dict[int, str] = {}
-            while Utils.bytes_available(ins):
-                count = Utils.read_tsize(ins)
-                for _ in range(count):
-                    key, val = struct.unpack('<2L', ins.read(8))
-                    data_id_map[key] = val
-                assert count == Utils.read_tsize(ins)
-                for _ in range(count):
-                    key = Utils.read_uint32(ins)
-                    label = Utils.read_ascii_string(ins)
-                    labels_map[key] = label
-            if Utils.bytes_available(ins): print('WARN: Expected 0 available bytes here. Got:', Utils.bytes_available(ins))
-            result: DIDMapper = DIDMapper(did)
-            for key in data_id_map:
-                id = data_id_map.get(key)
-                label = labels_map.get(key)
-                if label is not None:
-                    result.add(key, id, label)
-                    continue
-                else: print('WARN: Label not found for key:', key, ' and id:', id)
-            return result
+            return self.__facade.get_did_mappers_manager().get_did_mapper(enum_id)
         else:
             return None
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import json
+import zlib
+
+from backend.properties.properties_set import Properties
+from backend.properties.properties_val import PropertyValue
+
+
+def to_json_value(value: object) -> object:
+    # JSON form of a property value, nested property sets become objects
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, PropertyValue):
+        return to_json_value(value.value)
+    if isinstance(value, Properties):
+        return {name: to_json_value(prop_val) for name, prop_val in value.props.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [to_json_value(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): to_json_value(item) for key, item in value.items()}
+    return str(value)
+
+class PropertiesDelta():
+    """
+    Changes between two snapshots of a properties set: the new values of the changed
+    or added properties, and the names of the removed ones. A nested properties set
+    present in both snapshots is changed by its own delta.
+    """
+    def __init__(self, changed: dict[str, object], removed: list[str]) -> None:
+        self.__changed = changed
+        self.__removed = removed
+
+    @property
+    def changed(self) -> dict[str, object]:
+        return self.__changed
+    @property
+    def removed(self) -> list[str]:
+        return self.__removed
+
+    def is_empty(self) -> bool:
+        return not self.__changed and not self.__removed
+
+    def __repr__(self) -> str:
+        return f'PropertiesDelta(changed={sorted(self.__changed)}, removed={self.__removed})'
+
+class PropertiesSnapshot():
+    """
+    Hashes of the values of a properties set, per property id, to detect what changed between syncs.
+    Object values (nested properties sets) have their own snapshot, keyed by name.
+    """
+    def __init__(self, hashes: dict[object, tuple[str, int]], children: dict[object, PropertiesSnapshot]) -> None:
+        self.__hashes = hashes
+        self.__children = children
+
+    @classmethod
+    def __take(cls, entries: list[tuple[object, str, object]]) -> tuple[PropertiesSnapshot, dict[object, object]]:
+        # Entries are (key, name, JSON value)
+        hashes: dict[object, tuple[str, int]] = {}
+        children: dict[object, PropertiesSnapshot] = {}
+        values: dict[object, object] = {}
+        for key, name, value in entries:
+            encoded = json.dumps(value, sort_keys=True, separators=(',', ':')).encode('utf-8')
+            hashes[key] = (name, zlib.crc32(encoded))
+            values[key] = value
+            if isinstance(value, dict):
+                children[key] = cls.__take([(sub_name, sub_name, sub_value) for sub_name, sub_value in value.items()])[0]
+        return cls(hashes, children), values
+
+    @classmethod
+    def diff(cls, previous: PropertiesSnapshot, properties: Properties) -> tuple[PropertiesSnapshot, PropertiesDelta]:
+        """
+        Take the snapshot of a properties set and compute its delta from a previous snapshot.
+        Everything is changed when there is no previous snapshot.
+        """
+        entries = [(prop_val.prop_definition.pid, name, to_json_value(prop_val.value)) for name, prop_val in properties.props.items()] if properties else []
+        snapshot, values = cls.__take(entries)
+        return snapshot, cls.__delta(previous, snapshot, values)
+
+    @classmethod
+    def __delta(cls, previous: PropertiesSnapshot, snapshot: PropertiesSnapshot, values: dict[object, object]) -> PropertiesDelta:
+        previous_hashes = previous.__hashes if previous else {}
+        changed: dict[str, object] = {}
+        for key, (name, value_hash) in snapshot.__hashes.items():
+            previous_entry = previous_hashes.get(key)
+            if previous_entry is not None and previous_entry[1] == value_hash:
+                continue
+            previous_child = previous.__children.get(key) if previous_entry is not None else None
+            child = snapshot.__children.get(key)
+            if previous_child is not None and child is not None:
+                # An object is changed by its own delta, which tells its changed and removed members
+                changed[name] = cls.__delta(previous_child, child, values[key])
+            else:
+                changed[name] = values[key]
+        removed: list[str] = [name for key, (name, _) in previous_hashes.items() if key not in snapshot.__hashes]
+        return PropertiesDelta(changed, removed)
+
+    def __len__(self) -> int:
+        return len(self.__hashes)
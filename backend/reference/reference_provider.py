@@ -1,6 +1,6 @@
 from backend.reference.reference_table_controller import \
     ReferencesTableController
-from backend.wdata.wstate import WStateDataSet
+from backend.wdata.wstate import LazyWStateDataSet, WStateDataSet
 
 
 class ReferenceProvider():
@@ -31,8 +31,19 @@ class WStateDataSetReferenceProvider(ReferenceProvider):
             return self.__index.get(param_int)
         return None
 
-    def get_unused_references(self) -> set[int]:
-        return set(self.__used_references)
+    @property
+    def used_references(self) -> set[int]:
+        return self.__used_references
+
+class LazyWStateDataSetReferenceProvider(ReferenceProvider):
+    def __init__(self, dataset: LazyWStateDataSet) -> None:
+        super().__init__()
+        self.__dataset: LazyWStateDataSet = dataset
+
+    def get_reference(self, param_int: int) -> object:
+        if self.__dataset.has_reference(param_int):
+            return self.__dataset.get_value_for_reference(param_int)
+        return None
 
 class ReferencesTableReferenceProvider(ReferenceProvider):
     def __init__(self, table_controller: ReferencesTableController) -> None:
@@ -23,27 +23,26 @@ class StringFormatBuilder():
     @staticmethod
     def __render_entry_with_variables(entry: StringTableEntry, decoded_parts: list[list[StringPart]]) -> str:
         variables_index: dict[int, str] = StringFormatBuilder.__build_index(entry, decoded_parts)
-        result_str = ''
+        output: list[str] = []
         for parts in decoded_parts:
             for part in parts:
                 if isinstance(part, VariablePart):
                     variable_part: VariablePart = part
-                    StringFormatBuilder.__render_variable_part(variables_index, variable_part, result_str)
+                    StringFormatBuilder.__render_variable_part(variables_index, variable_part, output)
                 elif isinstance(part, LiteralPart):
                     literal_part: LiteralPart = part
-                    result_str += literal_part.value
-        return result_str
+                    output.append(literal_part.value)
+        return ''.join(output)
 
     @staticmethod
     def __render_entry_without_variables(entry: StringTableEntry) -> str:
         variable_ids = entry.variable_ids
         variables_manager = KnownVariablesManager()
-        result_str = ''
         parts = entry.label_strings
-        result_str += parts[0]
+        output: list[str] = [parts[0]]
         for i in range(1, len(parts)):
-            result_str = result_str.join(['${', variables_manager.get_variable_from_hash(variable_ids[i-1]), '}', parts[i]])
-        return result_str
+            output.extend(['${', str(variables_manager.get_variable_from_hash(variable_ids[i-1])), '}', parts[i]])
+        return ''.join(output)
 
     @staticmethod
     def __build_index(entry: StringTableEntry, decoded_parts: list[list[StringPart]]) -> dict[int, str]:
@@ -64,27 +63,25 @@ class StringFormatBuilder():
         return map
 
     @staticmethod
-    def __render_variable_part(variables_index: dict[int, str], variable_part: VariablePart, output: str) -> None:
+    def __render_variable_part(variables_index: dict[int, str], variable_part: VariablePart, output: list[str]) -> None:
         idx = variable_part.index
         variable_name = variables_index.get(idx)
         options = variable_part.options
         if options:
             StringFormatBuilder.__render_options_format(variable_name, options, output)
         else:
-            if idx > 0: ouput = output.join(['${', variable_name, '}'])
+            if idx > 0: output.extend(['${', str(variable_name), '}'])
 
     @staticmethod
-    def __render_options_format(variable_name: str, options: list[OptionItem], output: str) -> None:
-        output = output.join(['${', variable_name, ':'])
+    def __render_options_format(variable_name: str, options: list[OptionItem], output: list[str]) -> None:
+        output.extend(['${', str(variable_name), ':'])
         for i in range(len(options)):
             text = options[i].text
-            if i > 0: output += '|'
-            output += text
+            if i > 0: output.append('|')
+            output.append(text)
             tags: list[Tag] = options[i].tags
             if tags:
-                output += '['
-                for j in range(len(tags)):
-                    if j > 0: output += ','
-                    output += tags[j].name
-                output += ']'
-        output += '}'
\ No newline at end of file
+                output.append('[')
+                output.append(','.join(tag.name for tag in tags))
+                output.append(']')
+        output.append('}')
\ No newline at end of file
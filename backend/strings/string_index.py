@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+from backend.common.dat_archive import DATArchive
+from backend.managers.strings_manager import StringsManager, StringTable
+from backend.paths import CACHE_PATH
+from backend.strings.string_format_builder import StringFormatBuilder
+
+if TYPE_CHECKING:
+    from backend.data_facade import DataFacade
+
+INDEX_FILE = os.path.join(CACHE_PATH, 'strings_index.sqlite')
+STRINGS_ARCHIVE = 'local_English'
+# DID range of the string tables in the language archive
+STRING_TABLES_MIN_ID = 620756992
+STRING_TABLES_MAX_ID = 654311423
+TABLES_PER_TASK = 64
+# Longer strings (descriptions, dialogs) get no trigrams, substring lookups scan them instead
+MAX_TRIGRAM_TEXT = 100
+# Literal condition of the partial index on the long strings, the query must repeat it to use the index
+LONG_KEY_CONDITION = f'length(key) > {MAX_TRIGRAM_TEXT}'
+
+def _normalize(text: str) -> str:
+    return text.casefold()
+
+def _trigrams(key: str) -> set[str]:
+    return {key[i:i+3] for i in range(len(key) - 2)}
+
+def _decode_tables(dat_path: str, data_ids: list[int]) -> list[tuple[int, int, str]]:
+    # Runs in a worker process, which opens its own handle on the archive
+    archive = DATArchive(dat_path)
+    archive.open()
+    result: list[tuple[int, int, str]] = []
+    try:
+        for data_id in data_ids:
+            data = archive.load_entry_by_id(data_id)
+            if not data: continue
+            table: StringTable = StringsManager.decode_string_table(data)
+            for token in table.get_tokens():
+                try:
+                    text = StringFormatBuilder.format(table.get_entry(token))
+                except Exception:
+                    continue
+                if text: result.append((data_id, token, text))
+    finally:
+        archive.close()
+    return result
+
+class StringIndexBuilder():
+    """
+    Batch job exporting every string table of the language archive into a SQLite
+    file: (table, token) -> string, with a prefix index and a trigram index for text search.
+    """
+    def __init__(self, facade: DataFacade) -> None:
+        self.__facade = facade
+
+    def build(self, index_path: str = INDEX_FILE, max_workers: int = None) -> int:
+        archive: DATArchive = self.__facade.get_archive(STRINGS_ARCHIVE)
+        data_ids = [entry.file_id for entry in archive.iter_file_entries(STRING_TABLES_MIN_ID, STRING_TABLES_MAX_ID)]
+        chunks = [data_ids[i:i+TABLES_PER_TASK] for i in range(0, len(data_ids), TABLES_PER_TASK)]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            nb_strings = self.write(executor.map(_decode_tables, [archive.path] * len(chunks), chunks), index_path)
+        print('Indexed', nb_strings, 'strings from', len(data_ids), 'tables into', index_path)
+        return nb_strings
+
+    def write(self, row_batches: Iterable[list[tuple[int, int, str]]], index_path: str = INDEX_FILE) -> int:
+        """
+        Write the index file from batches of (table_id, token, text) rows, the file is replaced once complete.
+        """
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        tmp_path = index_path + '.tmp'
+        if os.path.exists(tmp_path): os.remove(tmp_path)
+        connection = sqlite3.connect(tmp_path)
+        nb_strings = 0
+        try:
+            self.__create_schema(connection)
+            for rows in row_batches:
+                nb_strings += self.__insert(connection, nb_strings, rows)
+            connection.execute('CREATE INDEX strings_token ON strings(table_id, token)')
+            connection.execute('CREATE INDEX strings_key ON strings(key)')
+            connection.execute(f'CREATE INDEX strings_long ON strings(id) WHERE {LONG_KEY_CONDITION}')
+            connection.commit()
+        finally:
+            connection.close()
+        os.replace(tmp_path, index_path)
+        return nb_strings
+
+    def __create_schema(self, connection: sqlite3.Connection) -> None:
+        connection.execute('CREATE TABLE strings (id INTEGER PRIMARY KEY, table_id INTEGER, token INTEGER, text TEXT, key TEXT)')
+        connection.execute('CREATE TABLE trigrams (gram TEXT, string_id INTEGER, PRIMARY KEY (gram, string_id)) WITHOUT ROWID')
+
+    def __insert(self, connection: sqlite3.Connection, first_id: int, rows: list[tuple[int, int, str]]) -> int:
+        strings: list[tuple] = []
+        trigrams: list[tuple[str, int]] = []
+        for offset, (table_id, token, text) in enumerate(rows):
+            string_id = first_id + offset
+            key = _normalize(text)
+            strings.append((string_id, table_id, token, text, key))
+            if len(key) <= MAX_TRIGRAM_TEXT: # the longer keys are scanned by find_substring
+                trigrams.extend((gram, string_id) for gram in _trigrams(key))
+        connection.executemany('INSERT INTO strings VALUES (?, ?, ?, ?, ?)', strings)
+        connection.executemany('INSERT INTO trigrams VALUES (?, ?)', trigrams)
+        return len(rows)
+
+class StringIndex():
+    """
+    Read access to the strings index, name lookups don't touch the DAT files.
+    Results are (table_id, token, text) tuples.
+    """
+    def __init__(self, index_path: str = INDEX_FILE) -> None:
+        self.__connection = sqlite3.connect(f'file:{index_path}?mode=ro', uri=True, check_same_thread=False)
+
+    def close(self) -> None:
+        self.__connection.close()
+
+    def get_string(self, table_id: int, token: int) -> str:
+        row = self.__connection.execute('SELECT text FROM strings WHERE table_id = ? AND token = ?', (table_id, token)).fetchone()
+        return row[0] if row else None
+
+    def find_exact(self, text: str, limit: int = 50) -> list[tuple[int, int, str]]:
+        return self.__query('SELECT table_id, token, text FROM strings WHERE key = ? LIMIT ?', (_normalize(text), limit))
+
+    def find_prefix(self, prefix: str, limit: int = 50) -> list[tuple[int, int, str]]:
+        key = _normalize(prefix)
+        # Range scan on the key index: every key starting with the prefix sorts in [key, key + U+10FFFF)
+        return self.__query('SELECT table_id, token, text FROM strings WHERE key >= ? AND key < ? ORDER BY key LIMIT ?',
+                            (key, key + '\U0010ffff', limit))
+
+    def find_substring(self, text: str, limit: int = 50) -> list[tuple[int, int, str]]:
+        """
+        Find the strings containing the text. Texts of 3 characters or more use the trigram index, which
+        only holds the keys of up to MAX_TRIGRAM_TEXT characters: the longer ones are scanned and come last.
+        """
+        key = _normalize(text)
+        grams = _trigrams(key)
+        if not grams:
+            return self.__query('SELECT table_id, token, text FROM strings WHERE instr(key, ?) > 0 LIMIT ?', (key, limit))
+        # Candidates hold every trigram of the searched text, the substring test removes false positives
+        placeholders = ','.join('?' * len(grams))
+        query = ('SELECT table_id, token, text FROM strings WHERE id IN '
+                 f'(SELECT string_id FROM trigrams WHERE gram IN ({placeholders}) GROUP BY string_id HAVING COUNT(*) = ?) '
+                 'AND instr(key, ?) > 0 LIMIT ?')
+        result = self.__query(query, (*grams, len(grams), key, limit))
+        if len(result) < limit:
+            query = f'SELECT table_id, token, text FROM strings WHERE {LONG_KEY_CONDITION} AND instr(key, ?) > 0 LIMIT ?'
+            result.extend(self.__query(query, (key, limit - len(result))))
+        return result
+
+    def iter_strings(self) -> Iterator[tuple[int, int, str]]:
+        return self.__connection.execute('SELECT table_id, token, text FROM strings ORDER BY table_id, token')
+
+    def __query(self, query: str, params: tuple) -> list[tuple[int, int, str]]:
+        return self.__connection.execute(query, params).fetchall()
@@ -9,7 +9,7 @@ class TableEntryStringInfo(StringInfo):
         self.__variable_value: dict[str, object] = {}
     
     def add_variable_value(self, variable_name: str, value: object) -> None:
-        self.__variable_value[str] = value
+        self.__variable_value[variable_name] = value
 
     def get_variables_count(self) -> int:
         return len(self.__variable_value.keys())
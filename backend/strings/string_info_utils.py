@@ -19,8 +19,8 @@ class VariableValueProvider():
         self.__variables_map = variables_map
 
     def get_variable(self, variable_name: str) -> str:
-        value = self.__variables_map[variable_name]
-        if value: return value
+        value = self.__variables_map.get(variable_name)
+        if value is not None: return value
         return variable_name
 
 class StringInfoUtils():
@@ -39,7 +39,7 @@ class StringInfoUtils():
 
     @staticmethod
     def build_variables_map(strings_manager: StringsManager, values: dict[str, object]) -> dict[str, str]:
-        return_map = dict[str, str]
+        return_map: dict[str, str] = {}
         if values:
             for entry in values:
                 variable_name = entry
@@ -61,9 +61,7 @@ class StringInfoUtils():
             table_entry_str_info: TableEntryStringInfo = string_info
             table_id = table_entry_str_info.table_id
             token_id = table_entry_str_info.token_id
-            entry = strings_manager.get_entry(table_id, token_id)
-            if entry is None: return None
-            return StringFormatBuilder.format(entry)
+            return strings_manager.get_string_format(table_id, token_id, StringFormatBuilder.format)
         return None     
 
     @staticmethod
@@ -83,13 +83,13 @@ class StringParser():
         option_item_strs = options_str.split('|')
         for option_item_str in option_item_strs:
             tags = None
+            text = option_item_str
             tag_str = StringParser.extract_tags_str(option_item_str)
             if tag_str is not None:
                 tags = StringParser.parse_tags(tag_str)
                 open_bracket = option_item_str.find(StringParser.OPEN_BRACKET)
                 text = option_item_str[0:open_bracket]
-            option_item = OptionItem(text, tags)
-            if option_item: option_items.append(option_item)
+            option_items.append(OptionItem(text, tags))
         return option_items
     
     @staticmethod
@@ -97,8 +97,8 @@ class StringParser():
         open_bracket = option_item_str.find(StringParser.OPEN_BRACKET)
         if open_bracket != -1:
             close_bracket = option_item_str.find(StringParser.CLOSE_BRACKET, open_bracket+1)
-            if close_bracket != -1:
-                close_bracket = len(option_item_str)-1
+            if close_bracket == -1:
+                close_bracket = len(option_item_str)
             return option_item_str[open_bracket+1:close_bracket]
         return None
 
@@ -1,76 +1,143 @@
 from __future__ import annotations
 
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
 from backend.managers.tags_manager import OptionItem
 from backend.strings.string_parser import StringParser
 
-from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from backend.strings.string_info_utils import VariableValueProvider
 
-class StringRenderer():
-    def __init__(self, provider: VariableValueProvider) -> None:
-        self.__provider = provider
-        self.__open_variable = "${"
-        self.__end_variable = "}"
+class TemplateOption():
+    def __init__(self, option: OptionItem) -> None:
+        self.__text: str = option.text
+        self.__is_default: bool = option.tags is None
+        # Tags are stored as bitmasks of their character codes
+        self.__positive_mask: int = 0
+        self.__negative_mask: int = 0
+        self.__empty_tags: int = 0
+        for tag in option.tags or []:
+            code = tag.tag_definition.code
+            if code == 'E': self.__empty_tags += 1
+            elif tag.is_negative: self.__negative_mask |= 1 << ord(code)
+            else: self.__positive_mask |= 1 << ord(code)
 
-    def render(self, format: str) -> str:
-        result_str = ""
+    @property
+    def text(self) -> str:
+        return self.__text
+    @property
+    def is_default(self) -> bool:
+        return self.__is_default
+
+    def count_common_tags(self, value: str, value_mask: int) -> int:
+        if self.__is_default: return 0
+        nb_matches = bin(self.__positive_mask & value_mask).count('1')
+        nb_matches += bin(self.__negative_mask & ~value_mask).count('1')
+        if len(value) > 0: nb_matches += self.__empty_tags
+        return nb_matches
+
+class StringTemplate():
+    """
+    Format string compiled once into literal, variable and option nodes.
+    """
+    LITERAL = 0
+    VARIABLE = 1
+    OPTIONS = 2
+    OPEN_VARIABLE = '${'
+    END_VARIABLE = '}'
+    CACHE_SIZE = 4096
+    _templates: OrderedDict[str, StringTemplate] = OrderedDict()
+    _lock = threading.Lock()
+
+    def __init__(self, format: str) -> None:
+        self.__nodes: list[tuple] = []
+        self.__compile(format)
+
+    @classmethod
+    def get(cls, format: str) -> StringTemplate:
+        with cls._lock:
+            template = cls._templates.get(format)
+            if template is not None:
+                cls._templates.move_to_end(format)
+                return template
+        template = cls(format)
+        with cls._lock:
+            cls._templates[format] = template
+            if len(cls._templates) > StringTemplate.CACHE_SIZE:
+                cls._templates.popitem(last=False)
+        return template
+
+    @property
+    def nodes(self) -> list[tuple]:
+        return self.__nodes
+
+    def __compile(self, format: str) -> None:
         index = 0
-        while(True):
-            variable_start_index = format.find(self.__open_variable, index)
-            if variable_start_index == -1: return format[index:len(format)]
-            result_str += format[index:variable_start_index]
-            variable_end_index = format.find(self.__end_variable, index+len(self.__open_variable))
-            if variable_end_index != -1:
-                variable_part = format[variable_start_index+len(self.__open_variable): variable_end_index]
-                self.__render_variable(result_str, variable_part)
-                index = variable_end_index + len(self.__end_variable)
-                continue
-
-    def __render_variable(self, result_str: str, variable_part: str) -> None:
+        while index < len(format):
+            variable_start_index = format.find(StringTemplate.OPEN_VARIABLE, index)
+            variable_end_index = -1
+            if variable_start_index != -1:
+                variable_end_index = format.find(StringTemplate.END_VARIABLE, variable_start_index+len(StringTemplate.OPEN_VARIABLE))
+            if variable_end_index == -1:
+                self.__nodes.append((StringTemplate.LITERAL, format[index:]))
+                return
+            if variable_start_index > index:
+                self.__nodes.append((StringTemplate.LITERAL, format[index:variable_start_index]))
+            self.__compile_variable(format[variable_start_index+len(StringTemplate.OPEN_VARIABLE):variable_end_index])
+            index = variable_end_index + len(StringTemplate.END_VARIABLE)
+
+    def __compile_variable(self, variable_part: str) -> None:
         index = variable_part.find(':')
         if index == -1:
-            str1 = variable_part
-            str2 = self.__provider.get_variable(str1)
-            result_str += str2
+            self.__nodes.append((StringTemplate.VARIABLE, variable_part))
             return
-        variable_name = variable_part[0, index]
-        value = self.__provider.get_variable(variable_name)
-        options_str = variable_part[index+1:]
-        options = StringParser.parse_options(options_str)
-        option: OptionItem = self.__choose_option(options, value)
-        if option: result_str += option.text
-
-    def __choose_option(self, options: list[OptionItem], value: str) -> OptionItem:
+        options = tuple(TemplateOption(option) for option in StringParser.parse_options(variable_part[index+1:]))
+        self.__nodes.append((StringTemplate.OPTIONS, variable_part[:index], options))
+
+    @staticmethod
+    def tags_mask(value: str) -> int:
+        mask = 0
         tags_str = StringParser.extract_tags_str(value)
+        if tags_str:
+            for ch in tags_str:
+                mask |= 1 << ord(ch)
+        return mask
+
+    @staticmethod
+    def choose_option(options: tuple[TemplateOption], value: str) -> TemplateOption:
+        value_mask = StringTemplate.tags_mask(value)
         max = 0
         chosen = None
         default_option = None
         for option in options:
-            nb_matches = self.__count_common_tags(option, value, tags_str)
+            nb_matches = option.count_common_tags(value, value_mask)
             if nb_matches >= max:
                 chosen = option
                 max = nb_matches
-            tags = option.tags
-            if tags is None: default_option = option
+            if option.is_default: default_option = option
         if max == 0:
             chosen = default_option
         return chosen
 
-    def __count_common_tags(self, option: OptionItem, value: str, tags_str: str) -> int:
-        tags = option.tags
-        if tags is None: return 0
-        nb_matches = 0
-        for tag in tags:
-            char_code = tag.tag_definition.code
-            if char_code == 'E':
-                if len(value) > 0:
-                    nb_matches += 1
+    def render(self, provider: VariableValueProvider) -> str:
+        output: list[str] = []
+        for node in self.__nodes:
+            node_type = node[0]
+            if node_type == StringTemplate.LITERAL:
+                output.append(node[1])
+            elif node_type == StringTemplate.VARIABLE:
+                output.append(str(provider.get_variable(node[1])))
             else:
-                tag_index = tags_str.find(char_code) if (tags_str is not None) else -1
-                if tag.is_negative:
-                    if tag_index == -1:
-                        nb_matches += 1
-                elif tag_index != -1:
-                    nb_matches += 1
-        return nb_matches
\ No newline at end of file
+                value = str(provider.get_variable(node[1]))
+                option = StringTemplate.choose_option(node[2], value)
+                if option: output.append(option.text)
+        return ''.join(output)
+
+class StringRenderer():
+    def __init__(self, provider: VariableValueProvider) -> None:
+        self.__provider = provider
+
+    def render(self, format: str) -> str:
+        return StringTemplate.get(format).render(self.__provider)
@@ -72,19 +72,8 @@ class Utils():
         bits_ptr = Utils.get_pointer(config.mem, bit_field_ptr+offset, config.pointer_size)
         bit_count = config.mem.read_uint(bit_field_ptr+offset+config.pointer_size)
         if bit_count == 0: return BitSet()
-        print('Nb bits:', bit_count)
-        byte_count = bit_count // 8 + (bit_count % 8 != 0)
-        ret = BitSet(nbits=bit_count)
-        bit_index = 0
-        for i in range(byte_count):
-            value = ord(config.mem.read_bytes(bits_ptr+i, 1))
-            local_bit_flag = 1
-            while bit_index < bit_count and local_bit_flag < 256:
-                if (value & local_bit_flag) != 0:
-                    ret.set(bit_index)
-                local_bit_flag *= 2
-                bit_index += 1
-        return ret
+        byte_count = (bit_count + 7) // 8
+        return BitSet.from_bytes(config.mem.read_bytes(bits_ptr, byte_count), bit_count)
 
     @staticmethod
     def read_arb_bitfield_stream(ins: io.BytesIO) -> BitSet:
@@ -95,20 +84,7 @@ class Utils():
         returns: BitSet
         rtype: BitSet
         """
-        bit_count = Utils.read_vle(ins)
-        if bit_count == 0: return BitSet()
-        byte_count = bit_count // 8 + (bit_count % 8 != 0)
-        ret = BitSet(nbits=bit_count)
-        bit_index = 0
-        for _ in range(byte_count):
-            value = Utils.read_uint8(ins)
-            local_bit_flag = 1
-            while bit_index < bit_count and local_bit_flag < 256:
-                if (value & local_bit_flag) != 0:
-                    ret.set(bit_index)
-                local_bit_flag *= 2
-                bit_index += 1
-        return ret
+        return BitSet.from_stream(ins)
 
     @staticmethod
     def get_string_property(propeties: Properties, property_name: str) -> str:
@@ -182,6 +158,28 @@ class Utils():
             return (a & 0x3f) << 24 | b << 16 | c
         return b | ((a & 0x7f) << 8)
           
+    @staticmethod
+    def read_vle_from(buffer: bytes, offset: int) -> tuple[int, int]:
+        """
+        Function to read a VLE (new version) from a buffer, without a stream.
+        param buffer: input buffer
+        type buffer: bytes
+        param offset: offset of the VLE in the buffer
+        type offset: int
+        returns: the value and the offset following it
+        rtype: tuple[int, int]
+        """
+        a = buffer[offset]
+        if a & 0x80 == 0:
+            return a, offset + 1
+        if a == 0xe0:
+            return int.from_bytes(buffer[offset+1:offset+5], 'little'), offset + 5
+        b = buffer[offset+1]
+        if a & 0x40 == 0x40:
+            c = int.from_bytes(buffer[offset+2:offset+4], 'little')
+            return (a & 0x3f) << 24 | b << 16 | c, offset + 4
+        return b | ((a & 0x7f) << 8), offset + 2
+
     @staticmethod
     def read_tsize(ins: io.BytesIO) -> int:
         """
@@ -326,7 +324,7 @@ class Utils():
         returns: str
         rtype: str
         """
-        length = ins.read(1)
+        length = Utils.read_uint8(ins)
         return ins.read(length).decode('ascii')
 
     @staticmethod
@@ -1,6 +1,8 @@
 import io
+import struct
+from typing import Callable
 
-from backend.common.data_types import Position
+from backend.common.data_types import Position, Vector3D
 from backend.managers.knownvariables_manager import KnownVariablesManager
 from backend.properties.properties_type import PropertyType
 from backend.strings.string_info import (LiteralStringInfo, StringInfo,
@@ -8,34 +10,109 @@ from backend.strings.string_info import (LiteralStringInfo, StringInfo,
 from backend.utils.common_utils import Utils
 
 
+class FixedSizeReader():
+    """
+    Reader of the values of a fixed-size property type, with a precompiled struct.
+    The builder turns the unpacked fields into the value, it gets the fields as arguments.
+    """
+    def __init__(self, fmt: str, builder: Callable[..., object] = None) -> None:
+        self.__format = fmt
+        self.__struct = struct.Struct('<' + fmt)
+        # An array item: the property ID followed by the value
+        self.__item_struct = struct.Struct('<L' + fmt)
+        self.__nb_fields = len(self.__struct.unpack(bytes(self.__struct.size)))
+        self.__builder = builder
+        self.read: Callable[[io.BytesIO], object] = self.__make_read()
+
+    @property
+    def format(self) -> str:
+        return self.__format
+
+    @property
+    def size(self) -> int:
+        return self.__struct.size
+
+    @property
+    def item_struct(self) -> struct.Struct:
+        return self.__item_struct
+
+    def __make_read(self) -> Callable[[io.BytesIO], object]:
+        # Closures over the bound struct method, cheaper than a method call per value
+        unpack, size, builder = self.__struct.unpack, self.__struct.size, self.__builder
+        if builder is None:
+            return lambda ins: unpack(ins.read(size))[0]
+        return lambda ins: builder(*unpack(ins.read(size)))
+
+    def build_values(self, items: list[tuple]) -> list[object]:
+        """
+        Build the values of array items unpacked with the item struct.
+        param items: unpacked fields of each item, the property ID first
+        type items: list[tuple]
+        returns: values of the items
+        rtype: list
+        """
+        builder = self.__builder
+        if self.__nb_fields == 1:
+            if builder is None: return [item[1] for item in items]
+            return [builder(item[1]) for item in items]
+        return [builder(*item[1:]) for item in items]
+
 class PropertiesUtils():
+    # Property type code -> value reader, filled once the readers are defined
+    VALUE_READERS: dict[int, Callable[[io.BytesIO], object]] = {}
+    # Readers of the fixed-size types, which arrays of such properties can read in bulk
+    FIXED_SIZE_READERS: dict[int, FixedSizeReader] = {}
+
     @staticmethod
-    def read_property_value(ins: io.BytesIO, property_type: PropertyType) -> object:
-        # property_type = property_type.val
-        if (property_type == PropertyType.String): return PropertiesUtils.read_string(ins)
-        if (property_type == PropertyType.StringToken): return PropertiesUtils.read_string_token(ins) 
-        if (property_type == PropertyType.Waveform): return PropertiesUtils.read_waveform(ins) 
-        if (property_type == PropertyType.TimeStamp): return PropertiesUtils.read_time_stamp(ins) 
-        if (property_type == PropertyType.TriState): return PropertiesUtils.read_tristate(ins) 
-        if (property_type == PropertyType.Vector): return PropertiesUtils.read_vector(ins) 
-        if (property_type == PropertyType.InstanceID): return PropertiesUtils.read_instance_id(ins) 
-        if (property_type == PropertyType.EnumMapper): return PropertiesUtils.read_enum_mapper(ins) 
-        if (property_type == PropertyType.Float): return PropertiesUtils.read_float_value(ins) 
-        if (property_type == PropertyType.PropertyID): return PropertiesUtils.read_property_id(ins)
-        if (property_type == PropertyType.Struct): return PropertiesUtils.read_struct(ins) 
-        if (property_type == PropertyType.Array): return PropertiesUtils.read_array(ins) 
-        if (property_type == PropertyType.StringInfo): return PropertiesUtils.read_string_info(ins) 
-        if (property_type == PropertyType.Bitfield64): return PropertiesUtils.read_bitfield_64(ins) 
-        if (property_type == PropertyType.Int): return PropertiesUtils.read_int(ins) 
-        if (property_type == PropertyType.Color): return PropertiesUtils.read_color(ins) 
-        if (property_type == PropertyType.Position): return PropertiesUtils.read_position(ins) 
-        if (property_type == PropertyType.Bitfield32): return PropertiesUtils.read_bitfield_32(ins) 
-        if (property_type == PropertyType.Int64): return PropertiesUtils.read_int64(ins) 
-        if (property_type == PropertyType.DataFile): return PropertiesUtils.read_datafile(ins) 
-        if (property_type == PropertyType.Bool): return PropertiesUtils.read_bool(ins) 
-        if (property_type == PropertyType.Bitfield): return PropertiesUtils.read_arbitrary_bitfield(ins) 
-        print("Unmanaged property type: ", property_type)
-        return None
+    def read_property_value(ins: io.BytesIO, property_type: int) -> object:
+        reader = PropertiesUtils.get_value_reader(property_type)
+        if reader is None:
+            print("Unmanaged property type: ", property_type)
+            return None
+        return reader(ins)
+
+    @staticmethod
+    def get_value_reader(property_type: int) -> Callable[[io.BytesIO], object]:
+        """
+        Get the function reading the values of a property type.
+        param property_type: property type code
+        type property_type: int
+        returns: the reader, None for unmanaged types
+        rtype: Callable
+        """
+        return PropertiesUtils.VALUE_READERS.get(property_type)
+
+    @staticmethod
+    def get_fixed_size_reader(property_type: int) -> FixedSizeReader:
+        return PropertiesUtils.FIXED_SIZE_READERS.get(property_type)
+
+    @staticmethod
+    def read_fixed_size_items(ins: io.BytesIO, property_id: int, reader: FixedSizeReader, nb_items: int) -> list[object]:
+        """
+        Read the values of array items which are all the same fixed-size property,
+        each item being the property ID followed by the value, unpacked in place from the stream buffer.
+        param ins: input stream
+        type ins: io.BytesIO
+        param property_id: expected property ID of every item
+        type property_id: int
+        param reader: reader of the property type
+        type reader: FixedSizeReader
+        param nb_items: number of items
+        type nb_items: int
+        returns: the values, None if the items don't match (the stream is left unchanged)
+        rtype: list
+        """
+        start = ins.tell()
+        item_struct = reader.item_struct
+        end = start + item_struct.size * nb_items
+        with ins.getbuffer() as buffer:
+            if len(buffer) < end: return None
+            with buffer[start:end] as items_view:
+                items = list(item_struct.iter_unpack(items_view))
+        for item in items:
+            if item[0] != property_id: return None
+        ins.seek(end)
+        return reader.build_values(items)
 
     @staticmethod
     def read_string(ins):
@@ -161,3 +238,31 @@ class PropertiesUtils():
     @staticmethod
     def read_arbitrary_bitfield(ins):
         return Utils.read_arb_bitfield_stream(ins)
+
+PropertiesUtils.FIXED_SIZE_READERS.update({
+    PropertyType.StringToken: FixedSizeReader('L'),
+    PropertyType.TimeStamp: FixedSizeReader('d'),
+    PropertyType.TriState: FixedSizeReader('B'),
+    PropertyType.Vector: FixedSizeReader('3f', Vector3D),
+    PropertyType.InstanceID: FixedSizeReader('Q'),
+    PropertyType.EnumMapper: FixedSizeReader('L'),
+    PropertyType.Float: FixedSizeReader('f'),
+    PropertyType.PropertyID: FixedSizeReader('L'),
+    PropertyType.Bitfield64: FixedSizeReader('Q'),
+    PropertyType.Int: FixedSizeReader('L'),
+    PropertyType.Color: FixedSizeReader('4B', lambda *color: list(color)),
+    PropertyType.Bitfield32: FixedSizeReader('L'),
+    PropertyType.Int64: FixedSizeReader('q'),
+    PropertyType.DataFile: FixedSizeReader('L'),
+    PropertyType.Bool: FixedSizeReader('B', lambda value: value == 1),
+})
+PropertiesUtils.VALUE_READERS.update({reader_type: reader.read for reader_type, reader in PropertiesUtils.FIXED_SIZE_READERS.items()})
+PropertiesUtils.VALUE_READERS.update({
+    PropertyType.String: PropertiesUtils.read_string,
+    PropertyType.Waveform: PropertiesUtils.read_waveform,
+    PropertyType.Struct: PropertiesUtils.read_struct,
+    PropertyType.Array: PropertiesUtils.read_array,
+    PropertyType.StringInfo: PropertiesUtils.read_string_info,
+    PropertyType.Position: PropertiesUtils.read_position,
+    PropertyType.Bitfield: PropertiesUtils.read_arbitrary_bitfield,
+})
@@ -1,14 +1,18 @@
-import json
 import os
+import pickle
+import threading
+from typing import Callable
 
 from backend.classes.class_definition import ClassDefinition
 from backend.classes.function_definition import FunctionsRegistry
+from backend.common.compiled_map import CompiledStringMap
+from backend.paths import CACHE_PATH, DATA_PATH
 
 
 class WLibData():
     def __init__(self) -> None:
         self.__classes: dict[int, ClassDefinition] = {}
-        self.__labels: dict[int, str] = self.__load_hashed_strings()
+        self.__labels: CompiledStringMap = self.__load_hashed_strings()
         self.__functions_registry = FunctionsRegistry()
 
     def get_class(self, class_index: int) -> ClassDefinition:
@@ -28,7 +32,84 @@ class WLibData():
     def get_label(self, hash: int) -> str:
         return self.__labels.get(hash)
 
-    def __load_hashed_strings(self) -> dict[int, str]:
-        with open(os.path.join('..', 'data', 'StringHashMap.json')) as inf:
-            temp_hash_names = json.load(inf)
-        return {int(k): v for (k, v) in temp_hash_names.items()}
+    def __load_hashed_strings(self) -> CompiledStringMap:
+        return CompiledStringMap.load(os.path.join(DATA_PATH, 'StringHashMap.json'),
+                                      lambda hash_names: ((int(k), v) for (k, v) in hash_names.items()))
+
+    def __getstate__(self) -> dict:
+        # The labels are memory-mapped, they are reloaded instead of being pickled
+        state = self.__dict__.copy()
+        del state['_WLibData__labels']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.__labels = self.__load_hashed_strings()
+
+class WLibDataCache():
+    """
+    Process-wide store of WLibData, built once per client build.
+    The build key identifies the WLib entry in the DAT files (version and timestamp)
+    and the JSON side-data baked into the model, so a game update or new data files
+    produce a new model. Models can also be persisted on disk.
+    """
+    SIDE_DATA_FILES = ('Functions.json', 'PackageNames.json') # Data files read when the model is built
+    _instances: dict[str, WLibData] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def build_key(cls, version: int, timestamp: int) -> str:
+        # Same freshness check as the compiled maps: modification time and size of the sources
+        stamps = []
+        for file_name in cls.SIDE_DATA_FILES:
+            try:
+                stat = os.stat(os.path.join(DATA_PATH, file_name))
+                stamps.append(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+            except OSError:
+                stamps.append('none')
+        return f'{version}_{timestamp}_' + '_'.join(stamps)
+
+    @classmethod
+    def get(cls, build_key: str, loader: Callable[[], WLibData], persist: bool = True) -> WLibData:
+        with cls._lock:
+            wlib_data = cls._instances.get(build_key)
+            if wlib_data is None:
+                wlib_data = cls.__load_persisted(build_key) if persist else None
+                if wlib_data is None:
+                    wlib_data = loader()
+                    if persist: cls.__persist(build_key, wlib_data)
+                cls._instances[build_key] = wlib_data
+            return wlib_data
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._instances.clear()
+
+    @staticmethod
+    def __cache_file(build_key: str) -> str:
+        return os.path.join(CACHE_PATH, f'wlib_{build_key}.pickle')
+
+    @classmethod
+    def __load_persisted(cls, build_key: str) -> WLibData:
+        cache_file = cls.__cache_file(build_key)
+        if not os.path.exists(cache_file): return None
+        try:
+            with open(cache_file, 'rb') as inf:
+                wlib_data = pickle.load(inf)
+            return wlib_data if isinstance(wlib_data, WLibData) else None
+        except Exception as exp:
+            print('Could not load WLib cache:', cache_file, exp)
+            return None
+
+    @classmethod
+    def __persist(cls, build_key: str, wlib_data: WLibData) -> None:
+        cache_file = cls.__cache_file(build_key)
+        try:
+            os.makedirs(CACHE_PATH, exist_ok=True)
+            tmp_file = cache_file + '.tmp'
+            with open(tmp_file, 'wb') as outf:
+                pickle.dump(wlib_data, outf, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, cache_file)
+        except Exception as exp:
+            print('Could not write WLib cache:', cache_file, exp)
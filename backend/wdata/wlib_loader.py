@@ -1,9 +1,10 @@
 import io
-import json
 import os
 
 from backend.classes.class_definition import (AttributeDefinition,
                                               ClassDefinition)
+from backend.common.compiled_map import CompiledStringMap
+from backend.paths import DATA_PATH
 from backend.utils.common_utils import Utils
 from backend.wdata.wlib_data import WLibData
 
@@ -20,13 +21,9 @@ class WLibLoader():
         self.__classes_list: list[ClassDefinition] = []
         self.__class_names = self.__load_class_names()
 
-    def __load_class_names(self) -> dict[int, str]:
-        read_class_names: dict[int, str] = {}
-        with open(os.path.join('..', 'data', 'PackageNames.json'), 'r') as json_file:
-            class_names_list = json.load(json_file)
-            for class_info in class_names_list:
-                read_class_names[int(class_info['index'])] = class_info['name']
-        return read_class_names
+    def __load_class_names(self) -> CompiledStringMap:
+        return CompiledStringMap.load(os.path.join(DATA_PATH, 'PackageNames.json'),
+                                      lambda class_names_list: ((int(x['index']), x['name']) for x in class_names_list))
 
     def decode(self, buffer: bytearray) -> None:
         ins: io.BytesIO = io.BytesIO(buffer)
@@ -1,19 +1,26 @@
+from typing import Callable, Iterable
+
+
 class WStateDataSet():
     def __init__(self) -> None:
         self.__references: list[int] = []
+        self.__reference_indices: dict[int, int] = {}
         self.__values: list[object] = []
         self.__orphan_references: list[int] = []
 
     def add_reference(self, reference: int) -> None:
+        # Keeps the first index of a reference, as a lookup in the list would
+        self.__reference_indices.setdefault(reference, len(self.__references))
         self.__references.append(reference)
 
+    def has_reference(self, reference: int) -> bool:
+        return reference in self.__reference_indices
+
     def get_value_for_reference(self, reference: int) -> object:
-        index = -1
-        try:
-            index = self.__references.index(reference)
-            return self.__values[index]
-        except:
+        index = self.__reference_indices.get(reference)
+        if index is None or index >= self.size():
             return None
+        return self.get_value(index)
 
     @property
     def references(self) -> list[int]:
@@ -31,7 +38,50 @@ class WStateDataSet():
     def size(self) -> int:
         return len(self.__values)
 
-    def set_orphan_references(self, references: list[int]) -> None:
+    def set_orphan_references(self, references: Iterable[int]) -> None:
         self.__orphan_references.clear()
         self.__orphan_references.extend(references)
-        self.__orphan_references.sort()
\ No newline at end of file
+        self.__orphan_references.sort()
+
+class LazyWStateDataSet(WStateDataSet):
+    """
+    WState data set built from the byte range and class index of each value.
+    A value is only decoded, and its references resolved, when it is requested.
+    """
+    def __init__(self, value_decoder: Callable[[int, int], object]) -> None:
+        super().__init__()
+        self.__value_decoder = value_decoder
+        self.__ranges: list[tuple[int, int]] = []
+        self.__class_indices: list[int] = []
+        self.__values: dict[int, object] = {}
+        self.__value_resolver: Callable[[object], None] = None
+
+    def add_value_range(self, start: int, end: int, class_index: int) -> None:
+        self.__ranges.append((start, end))
+        self.__class_indices.append(class_index)
+
+    def set_value_resolver(self, value_resolver: Callable[[object], None]) -> None:
+        self.__value_resolver = value_resolver
+
+    def get_class_index(self, index: int) -> int:
+        return self.__class_indices[index]
+
+    def get_indices_for_class(self, class_index: int) -> list[int]:
+        return [i for i, value_class in enumerate(self.__class_indices) if value_class == class_index]
+
+    def is_loaded(self, index: int) -> bool:
+        return index in self.__values
+
+    def get_value(self, index: int) -> object:
+        if index in self.__values:
+            return self.__values[index]
+        start, end = self.__ranges[index]
+        value = self.__value_decoder(start, end)
+        # Stored before resolving so that cyclic references get this instance
+        self.__values[index] = value
+        if value and self.__value_resolver:
+            self.__value_resolver(value)
+        return value
+
+    def size(self) -> int:
+        return len(self.__ranges)
@@ -2,10 +2,11 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from backend.classes.class_definition import AttributeDefinition, ClassInstance
+from backend.classes.class_definition import (AttributeDefinition,
+                                              ClassDefinition, ClassInstance)
 from backend.classes.class_loader import *
 from backend.wdata.wlib_data import WLibData
-from backend.wdata.wstate import WStateDataSet
+from backend.wdata.wstate import LazyWStateDataSet, WStateDataSet
 
 if TYPE_CHECKING:
     from backend.data_facade import DataFacade
@@ -15,6 +16,13 @@ class WStateLoader():
     def __init__(self, facade: DataFacade, wlib_data: WLibData) -> None:
         self.__facade: DataFacade = facade
         self.__wlib_data = wlib_data
+        self.__loaders: dict[int, WStateClassLoader] = {}
+        self.__embedded_sizes: dict[int, int] = {}
+
+    def __get_loader(self, class_index: int) -> WStateClassLoader:
+        if class_index not in self.__loaders:
+            self.__loaders[class_index] = self.__get_loader_for_class(class_index)
+        return self.__loaders[class_index]
 
     def __get_loader_for_class(self, class_index: int) -> WStateClassLoader:
         if class_index in (11, 35): return AAHashLoader(class_index==35)
@@ -46,16 +54,22 @@ class WStateLoader():
         if class_index == 3740: return BankTypeLoader()
         return None
 
-    def decode_wstate(self, buffer: bytearray) -> WStateDataSet:
+    def decode_wstate(self, buffer: bytearray, lazy: bool = False) -> WStateDataSet:
+        """
+        Decode a WState. In lazy mode, the class bundle is only indexed: the result
+        is a LazyWStateDataSet which decodes a value when it is requested.
+        """
         ins: io.BytesIO = io.BytesIO(buffer)
         idx, class_def_idx = struct.unpack('<2L', ins.read(8))
-        result: WStateDataSet = WStateDataSet()
+        result: WStateDataSet = LazyWStateDataSet(None) if lazy else WStateDataSet()
         self.__read_imports(ins)
         always_0_v1 = Utils.read_vle(ins)
         always_0_v2 = Utils.read_vle(ins)
         unknown_bool = Utils.read_bool(ins)
         class_chunk_sz = Utils.read_uint32(ins)
-        if class_chunk_sz > 0: self.__read_class_bundle(bytearray(ins.read(class_chunk_sz)), result)
+        if class_chunk_sz > 0:
+            if lazy: result = self.__index_class_bundle(ins.read(class_chunk_sz))
+            else: self.__read_class_bundle(bytearray(ins.read(class_chunk_sz)), result)
         links_present = Utils.read_bool(ins)
         if links_present: self.__read_links(ins)
         last_pids_present = Utils.read_bool(ins)
@@ -99,6 +113,31 @@ class WStateLoader():
 
     def __read_class_bundle(self, buffer: bytearray, result: WStateDataSet) -> None:
         ins: io.BytesIO = io.BytesIO(buffer)
+        refs_count = self.__read_class_bundle_header(ins, result)
+        for _ in range(refs_count):
+            value = self.__read_data_item(ins)
+            result.add_value(value)
+        available = Utils.bytes_available(ins)
+        if available > 0:
+            print('End of WSL data. Available bytes:', available)
+            remaining = ins.read(available)
+            print(remaining)
+
+    def __index_class_bundle(self, buffer: bytes) -> LazyWStateDataSet:
+        bundle = memoryview(buffer)
+        result: LazyWStateDataSet = LazyWStateDataSet(lambda start, end: self.__read_data_item(io.BytesIO(bundle[start:end])))
+        ins: io.BytesIO = io.BytesIO(buffer)
+        refs_count = self.__read_class_bundle_header(ins, result)
+        for _ in range(refs_count):
+            start = ins.tell()
+            class_idx = self.__skip_data_item(ins)
+            result.add_value_range(start, ins.tell(), class_idx)
+        available = Utils.bytes_available(ins)
+        if available > 0:
+            print('End of WSL data. Available bytes:', available)
+        return result
+
+    def __read_class_bundle_header(self, ins: io.BytesIO, result: WStateDataSet) -> int:
         refs_count = Utils.read_vle(ins)
         for _ in range(refs_count):
             reference = Utils.read_uint32(ins)
@@ -111,15 +150,44 @@ class WStateLoader():
                 name: str = self.__wlib_data.get_label(name_hash)
                 if name is None: name = name_hash
                 value_type: int = Utils.read_uint8(ins)
-        for _ in range(refs_count):
-            value = self.__read_data_item(ins)
-            result.add_value(value)
+        return refs_count
+
+    def __skip_data_item(self, ins: io.BytesIO) -> int:
+        # Returns the class index of the skipped value, None for plain values
         available = Utils.bytes_available(ins)
-        if available > 0:
-            print('End of WSL data. Available bytes:', available)
-            remaining = ins.read(available)
-            print(remaining)
-        
+        if available < 4: raise Exception('Cannot read a marker. Available bytes=', available)
+        marker = Utils.read_uint32(ins)
+        if marker == 134217728:
+            Utils.skip(ins, 8)
+            return None
+        if marker == 536870912:
+            Utils.skip(ins, 4)
+            return None
+        if marker not in (0, 268435456): raise Exception('Unmanaged marker value:', marker)
+        class_idx = Utils.read_uint16(ins)
+        class_def = self.__wlib_data.get_class(class_idx)
+        if class_def is not None:
+            Utils.skip(ins, self.__get_embedded_size(class_def))
+            return class_idx
+        wstate_class_loader: WStateClassLoader = self.__get_loader(class_idx)
+        if wstate_class_loader is None:
+            raise Exception('No wstate class loader found for class idx:', class_idx)
+        try:
+            wstate_class_loader.skip_data(ins)
+        except Exception:
+            raise Exception('Caught exception when skipping an attribute. Class idx:', class_idx)
+        return class_idx
+
+    def __get_embedded_size(self, class_def: ClassDefinition) -> int:
+        size = self.__embedded_sizes.get(class_def.class_index)
+        if size is None:
+            size = 0
+            for attribute in class_def.attributes:
+                if attribute.type in (1, 2, 3): size += 4
+                elif attribute.type in (130, 131, 195): size += 8
+            self.__embedded_sizes[class_def.class_index] = size
+        return size
+
     def __read_data_item(self, ins: io.BytesIO) -> object:
         available = Utils.bytes_available(ins)
         if available < 4: raise Exception('Cannot read a marker. Available bytes=', available)
@@ -148,7 +216,7 @@ class WStateLoader():
             return result
         else:
             result: object = None
-            wstate_class_loader: WStateClassLoader = self.__get_loader_for_class(class_idx)
+            wstate_class_loader: WStateClassLoader = self.__get_loader(class_idx)
             if wstate_class_loader is not None:
                 try:
                     result = wstate_class_loader.decode_data(ins)
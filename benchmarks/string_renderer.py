@@ -0,0 +1,62 @@
+"""
+Benchmark of the compiled string templates against a scan-and-parse renderer.
+Run from the root folder: python -m benchmarks.string_renderer
+"""
+import timeit
+
+from backend.strings.string_info_utils import VariableValueProvider
+from backend.strings.string_parser import StringParser
+from backend.strings.string_renderer import StringRenderer
+
+NB_RENDERS = 20000
+FORMATS = [
+    'Defeat ${NUMBER} ${TARGET:creature|creatures[p]} in ${AREA}',
+    '${PLAYER} has completed ${QUEST}.',
+    '${CLASS:Burglar[G]|Captain[C]|Champion[H]|Guardian[U]|Hunter[T]|Minstrel[I]|Warden[W]} level ${LEVEL}',
+    'A plain label without any variable',
+]
+VARIABLES = {'NUMBER': '12', 'TARGET': 'Goblins[p]', 'AREA': 'Moria', 'PLAYER': 'Frodo[m,O]',
+             'QUEST': 'The Ring', 'CLASS': 'Hunter[T]', 'LEVEL': '150'}
+
+
+def scan_and_parse_render(provider: VariableValueProvider, format: str) -> str:
+    # Former rendering strategy: the format is scanned and its options parsed on every call
+    output: list[str] = []
+    index = 0
+    while True:
+        variable_start_index = format.find('${', index)
+        if variable_start_index == -1:
+            output.append(format[index:])
+            return ''.join(output)
+        output.append(format[index:variable_start_index])
+        variable_end_index = format.find('}', variable_start_index+2)
+        variable_part = format[variable_start_index+2:variable_end_index]
+        colon_index = variable_part.find(':')
+        if colon_index == -1:
+            output.append(provider.get_variable(variable_part))
+        else:
+            value = provider.get_variable(variable_part[:colon_index])
+            options = StringParser.parse_options(variable_part[colon_index+1:])
+            tags_str = StringParser.extract_tags_str(value) or ''
+            chosen, default_option, max = None, None, 0
+            for option in options:
+                nb_matches = 0
+                for tag in option.tags or []:
+                    found = tags_str.find(tag.tag_definition.code) != -1
+                    if found != tag.is_negative: nb_matches += 1
+                if nb_matches >= max: chosen, max = option, nb_matches
+                if option.tags is None: default_option = option
+            chosen = chosen if max > 0 else default_option
+            if chosen: output.append(chosen.text)
+        index = variable_end_index + 1
+
+if __name__ == '__main__':
+    provider = VariableValueProvider(VARIABLES)
+    renderer = StringRenderer(provider)
+    for format in FORMATS:
+        assert renderer.render(format) == scan_and_parse_render(provider, format), format
+        print(renderer.render(format))
+    compiled = timeit.timeit(lambda: [renderer.render(x) for x in FORMATS], number=NB_RENDERS // len(FORMATS))
+    legacy = timeit.timeit(lambda: [scan_and_parse_render(provider, x) for x in FORMATS], number=NB_RENDERS // len(FORMATS))
+    print(f'compiled templates: {compiled / NB_RENDERS * 1e6:.2f} us per render')
+    print(f'scan and parse: {legacy / NB_RENDERS * 1e6:.2f} us per render')
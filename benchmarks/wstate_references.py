@@ -0,0 +1,56 @@
+"""
+Benchmark of the reference lookups and the orphan computation of a WState data set.
+Run from the root folder: python -m benchmarks.wstate_references
+"""
+import random
+import time
+
+from backend.reference.reference_provider import WStateDataSetReferenceProvider
+from backend.wdata.wstate import WStateDataSet
+
+NB_REFERENCES = 100000
+NB_LEGACY_REFERENCES = 5000
+
+
+def build_dataset(nb_references: int) -> WStateDataSet:
+    dataset = WStateDataSet()
+    references = random.sample(range(1, 1879048192), nb_references)
+    for reference in references:
+        dataset.add_reference(reference)
+        dataset.add_value(reference)
+    return dataset
+
+def run_lookups(dataset: WStateDataSet) -> WStateDataSetReferenceProvider:
+    provider = WStateDataSetReferenceProvider(dataset)
+    # Half of the references are used, the other half end up orphans
+    for reference in dataset.references[::2]:
+        provider.get_reference(reference)
+        dataset.get_value_for_reference(reference)
+    return provider
+
+def current(dataset: WStateDataSet) -> None:
+    provider = run_lookups(dataset)
+    dataset.set_orphan_references(set(dataset.references) - provider.used_references)
+
+def legacy(dataset: WStateDataSet) -> None:
+    # Former implementation: list scans and a copy of the used references for each test
+    provider = run_lookups(dataset)
+    references = dataset.references
+    for reference in references[::2]:
+        references.index(reference)
+    orphans = [x for x in references if x not in set(provider.used_references)]
+    dataset.set_orphan_references(orphans)
+
+def measure(func, dataset: WStateDataSet) -> float:
+    start = time.perf_counter()
+    func(dataset)
+    return time.perf_counter() - start
+
+if __name__ == '__main__':
+    random.seed(0)
+    elapsed = measure(current, build_dataset(NB_REFERENCES))
+    print(f'dict index, {NB_REFERENCES} references: {elapsed*1000:.1f} ms')
+    elapsed = measure(current, build_dataset(NB_LEGACY_REFERENCES))
+    print(f'dict index, {NB_LEGACY_REFERENCES} references: {elapsed*1000:.1f} ms')
+    elapsed = measure(legacy, build_dataset(NB_LEGACY_REFERENCES))
+    print(f'list scans, {NB_LEGACY_REFERENCES} references: {elapsed*1000:.1f} ms')
@@ -1,19 +1,83 @@
 """ Module for database connection. """
-import os
+import gzip
 import json
+import logging
+import os
+import threading
+from urllib.parse import urlencode
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 class DBConnection():
     """ Database connection class. """
-    def __init__(self) -> None:
+    RETRIES = 3
+    BACKOFF_FACTOR = 0.5
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, gzip_requests: bool = False) -> None:
         """
         Initialize the database connection.
+
+        Parameters
+        ----------
+        gzip_requests : bool, optional
+            Whether the request bodies should be gzip compressed, by default False
         """
         self.__db_master_key = os.getenv('DB_MASTERKEY')
         self.__db_create_path = os.getenv('DB_CREATEPATH')
         self.__db_update_path = os.getenv('DB_UPDATEPATH')
         self.__db_read_path = os.getenv('DB_READPATH')
         self.__db_delete_path = os.getenv('DB_DELETEPATH')
+        self.__gzip_requests = gzip_requests
+        self.__session = self.__create_session()
+
+    def __create_session(self) -> requests.Session:
+        """
+        Create the session used by all the requests, which keeps the connections alive
+        and retries the failed requests with an exponential backoff. Creations are not retried.
+        """
+        retry = Retry(total=DBConnection.RETRIES,
+                      backoff_factor=DBConnection.BACKOFF_FACTOR,
+                      status_forcelist=DBConnection.RETRY_STATUSES,
+                      allowed_methods=frozenset(('GET', 'PUT', 'DELETE')),
+                      raise_on_status=False)
+        adapter = HTTPAdapter(max_retries=retry)
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update({'x-gist-master-key': self.__db_master_key})
+        return session
+
+    def __encode_form(self, form: dict) -> dict:
+        """
+        Build the body arguments of a request sending a form, compressed if enabled.
+
+        Parameters
+        ----------
+        form : dict
+            The form fields.
+
+        Returns
+        -------
+        dict
+            The keyword arguments of the request for the body.
+        """
+        if not self.__gzip_requests:
+            return {'data': form}
+        return {'data': gzip.compress(urlencode(form).encode('utf-8')),
+                'headers': {'Content-Type': 'application/x-www-form-urlencoded', 'Content-Encoding': 'gzip'}}
+
+    @staticmethod
+    def __dumps(data: dict) -> str:
+        return json.dumps(data, separators=(',', ':'))
+
+    def close(self) -> None:
+        """
+        Close the connections of the session.
+        """
+        self.__session.close()
 
     def create(self, data: dict, file_name: str, private: bool = True) -> dict:
         """
@@ -33,15 +97,15 @@ class DBConnection():
         dict
             The response from the database.
         """
-        response = requests.post(
+        response = self.__session.post(
             url = self.__db_create_path,
-            data={
+            **self.__encode_form({
                 'private': private,
-                'content': json.dumps(data, indent=4),
+                'content': self.__dumps(data),
                 'fileName': file_name
-            },
-            headers={'x-gist-master-key': self.__db_master_key},
+            }),
             timeout=30)
+        response.raise_for_status()
         return response.json()
 
     def update(self, data: dict, json_id: str) -> dict:
@@ -60,14 +124,14 @@ class DBConnection():
         dict
             The response from the database.
         """
-        response = requests.put(
+        response = self.__session.put(
             url = self.__db_update_path,
             params={'jsonId': json_id},
-            data={
-                'content': json.dumps(data, indent=4),
-            },
-            headers={'x-gist-master-key': self.__db_master_key},
+            **self.__encode_form({
+                'content': self.__dumps(data),
+            }),
             timeout=30)
+        response.raise_for_status()
         return response.json()
 
     def read(self, json_id: str) -> dict:
@@ -84,11 +148,11 @@ class DBConnection():
         dict
             The data in the database of the given entry.
         """
-        response = requests.get(
+        response = self.__session.get(
             url = self.__db_read_path,
             params={'jsonId': json_id},
-            headers={'x-gist-master-key': self.__db_master_key},
             timeout=30)
+        response.raise_for_status()
         return response.json()
 
     def delete(self, json_id: str) -> dict:
@@ -105,10 +169,113 @@ class DBConnection():
         dict
             The response from the database.
         """
-        response = requests.delete(
+        response = self.__session.delete(
             url = self.__db_delete_path,
             params={'jsonId': json_id},
-            headers={'x-gist-master-key': self.__db_master_key},
             timeout=30)
+        response.raise_for_status()
         return response.json()
-        
\ No newline at end of file
+
+class UploadQueue():
+    """
+    Uploads the updates in the background. An update replaces the whole content of an entry,
+    so only the latest pending content of an entry is sent: an entry updated several times
+    while an upload is in progress is sent once.
+
+    Callers queue the whole content of the entry, e.g. DataExtractor(config, upload_queue=queue)
+    queues all the properties of a character once some of them changed.
+    """
+    RETRY_DELAY = 5
+
+    def __init__(self, db_connection: DBConnection) -> None:
+        """
+        Initialize the upload queue and start its thread.
+
+        Parameters
+        ----------
+        db_connection : DBConnection
+            The connection used to send the updates.
+        """
+        self.__db_connection = db_connection
+        self.__pending: dict[str, dict] = {}
+        self.__condition = threading.Condition()
+        self.__in_progress: int = 0
+        self.__closed = False
+        self.__thread = threading.Thread(target=self.__run, name="DB Upload")
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def update(self, data: dict, json_id: str) -> None:
+        """
+        Queue an update of an entry, replacing its pending update if any.
+
+        Parameters
+        ----------
+        data : dict
+            The new content of the entry.
+        json_id : str
+            The json id of the entry to be updated.
+        """
+        with self.__condition:
+            if self.__closed: raise RuntimeError('Upload queue is closed')
+            self.__pending[json_id] = data
+            self.__condition.notify_all()
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Wait until every queued update is sent.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            The maximum time to wait in seconds, by default None to wait forever
+
+        Returns
+        -------
+        bool
+            Whether the queue was emptied in time.
+        """
+        with self.__condition:
+            return self.__condition.wait_for(lambda: not self.__pending and not self.__in_progress, timeout)
+
+    def close(self) -> None:
+        """
+        Send the queued updates and stop the upload thread.
+        """
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify_all()
+        self.__thread.join()
+
+    def __run(self) -> None:
+        while True:
+            with self.__condition:
+                self.__condition.wait_for(lambda: self.__pending or self.__closed)
+                if not self.__pending: return
+                json_id, data = next(iter(self.__pending.items()))
+                del self.__pending[json_id]
+                self.__in_progress += 1
+            try:
+                self.__db_connection.update(data, json_id)
+            except requests.HTTPError as exp:
+                status = exp.response.status_code if exp.response is not None else None
+                if status is not None and 400 <= status < 500 and status != 429:
+                    # Sending the same content again would be refused again
+                    logging.error('Upload of entry %s refused: %s', json_id, exp)
+                else:
+                    self.__retry_later(json_id, data, exp)
+            except Exception as exp: # pylint: disable=broad-except
+                # Connection errors and anything else: the thread must keep serving the queue
+                self.__retry_later(json_id, data, exp)
+            finally:
+                with self.__condition:
+                    self.__in_progress -= 1
+                    self.__condition.notify_all()
+
+    def __retry_later(self, json_id: str, data: dict, exp: Exception) -> None:
+        logging.error('Could not upload entry %s: %s', json_id, exp)
+        # Put the update back unless a newer one is pending or the queue is closing
+        with self.__condition:
+            if not self.__closed:
+                self.__pending.setdefault(json_id, data)
+                self.__condition.wait_for(lambda: self.__closed, UploadQueue.RETRY_DELAY)
@@ -0,0 +1,105 @@
+"""
+Tests of the attach and detach bookkeeping of the client manager, without game clients.
+Run from the root folder: python -m unittest tests.test_client_manager
+"""
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import psutil
+
+from backend import client_manager
+from backend.client_manager import ClientManager
+from backend.client_watcher import ClientWatcher
+from backend.common.config import Client_Status, GameConfig
+
+
+class StandInAppConfig():
+    """ Application config returning the same value for every setting. """
+
+    def get_config(self, key: str, subkey: str = None) -> object:
+        return 60 if subkey == 'interval' else ''
+
+
+class ClientManagerTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.running: list[int] = [] # process ids of the running clients
+        self.statuses: dict[int, Client_Status] = {} # status given to the config of a client, running by default
+        self.exes: dict[int, str] = {} # executable path of each client
+        self.closed: list[int] = []
+        config_pids: dict[GameConfig, int] = {}
+        test = self
+
+        def set_address(config, name_match, pid):
+            config_pids[config] = pid
+            config.client_status = test.statuses.get(pid, Client_Status.RUNNING)
+
+        def close_mem(config):
+            test.closed.append(config_pids[config])
+
+        def iter_clients():
+            return ((SimpleNamespace(pid=pid), ClientWatcher.CLIENT_PATTERN.search('lotroclient64.exe')) for pid in self.running)
+
+        def process(pid):
+            if pid not in self.exes: raise psutil.AccessDenied(pid)
+            return SimpleNamespace(exe=lambda: self.exes[pid])
+
+        for patcher in (mock.patch.object(GameConfig, 'set_address', set_address),
+                        mock.patch.object(GameConfig, 'close_mem', close_mem),
+                        mock.patch.object(ClientWatcher, 'iter_clients', iter_clients),
+                        mock.patch.object(client_manager.psutil, 'Process', process),
+                        mock.patch.object(client_manager, 'DataFacade', lambda config, client_dir: SimpleNamespace(client_dir=client_dir))):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.manager = ClientManager(StandInAppConfig())
+
+    def test_attach_and_detach(self):
+        self.assertEqual(self.manager.discover(), ([], []))
+        self.assertEqual(self.manager.client_status, Client_Status.NOT_FOUND)
+        self.running = [10, 11]
+        self.assertEqual(self.manager.discover(), ([10, 11], []))
+        self.assertEqual(self.manager.pids, [10, 11])
+        self.assertEqual(self.manager.client_status, Client_Status.RUNNING)
+        self.assertIsInstance(self.manager.get_config(10), GameConfig)
+        # Known clients are not attached again
+        self.assertEqual(self.manager.discover(), ([], []))
+        self.running = [11, 12]
+        self.assertEqual(self.manager.discover(), ([12], [10]))
+        self.assertEqual(self.manager.pids, [11, 12])
+        self.assertIsNone(self.manager.get_config(10))
+        self.assertIsNone(self.manager.get_extractor(10))
+        self.assertEqual(self.closed, [10])
+        self.manager.close()
+        self.assertEqual(self.manager.pids, [])
+        self.assertEqual(sorted(self.closed), [10, 11, 12])
+
+    def test_failed_client_is_not_retried(self):
+        self.running = [10]
+        self.statuses[10] = Client_Status.MISSING_ADMIN
+        with mock.patch.object(GameConfig, 'set_address', autospec=True, side_effect=lambda config, name_match, pid: setattr(config, 'client_status', self.statuses[pid])) as set_address:
+            self.assertEqual(self.manager.discover(), ([], []))
+            self.assertEqual(self.manager.discover(), ([], []))
+            self.assertEqual(set_address.call_count, 1)
+        self.assertEqual(self.manager.pids, [])
+        self.assertEqual(self.manager.client_status, Client_Status.MISSING_ADMIN)
+        # Once the process exited, the same process id is tried again
+        self.running = []
+        self.manager.discover()
+        self.assertEqual(self.manager.client_status, Client_Status.NOT_FOUND)
+        del self.statuses[10]
+        self.running = [10]
+        self.assertEqual(self.manager.discover(), ([10], []))
+
+    def test_clients_of_an_install_share_a_facade(self):
+        self.exes = {10: '/lotro/x64/lotroclient64.exe', 11: '/lotro/lotroclient.exe', 12: '/other/lotroclient.exe'}
+        self.running = [10, 11, 12]
+        self.manager.discover()
+        facades = {pid: self.manager.get_extractor(pid).get_data_facade() for pid in self.manager.pids}
+        self.assertIs(facades[10], facades[11])
+        self.assertIsNot(facades[10], facades[12])
+        self.assertEqual(facades[12].client_dir, client_manager.os.path.normcase('/other'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+"""
+Tests of the database connection and of the upload queue against a local stand-in server.
+Run from the root folder: python -m unittest tests.test_db_conn
+"""
+import gzip
+import json
+import os
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from database.db_conn import DBConnection, UploadQueue
+
+
+class StandInServer():
+    """ Local HTTP server recording the requests and answering with scripted statuses. """
+
+    def __init__(self) -> None:
+        self.requests: list[dict] = []
+        self.statuses: list[int] = [] # statuses of the next responses, 200 once empty
+        self.gate = threading.Event() # the requests wait for it before being answered
+        self.gate.set()
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1' # keep-alive
+
+            def do_GET(self):
+                self.__answer()
+
+            def do_PUT(self):
+                self.__answer()
+
+            def do_POST(self):
+                self.__answer()
+
+            def do_DELETE(self):
+                self.__answer()
+
+            def __answer(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if self.headers.get('Content-Encoding') == 'gzip':
+                    body = gzip.decompress(body)
+                server.gate.wait()
+                with server.lock:
+                    server.requests.append({'method': self.command, 'port': self.client_address[1],
+                                            'query': parse_qs(urlparse(self.path).query), 'headers': dict(self.headers),
+                                            'form': parse_qs(body.decode('utf-8'))})
+                    status = server.statuses.pop(0) if server.statuses else 200
+                payload = json.dumps({'status': status}).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}'
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def contents(self) -> list[dict]:
+        with self.lock:
+            return [json.loads(x['form']['content'][0]) for x in self.requests if 'content' in x['form']]
+
+    def close(self) -> None:
+        self.gate.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class DBConnectionTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.server = StandInServer()
+        environ = {'DB_MASTERKEY': 'key', 'DB_CREATEPATH': self.server.url + '/create', 'DB_UPDATEPATH': self.server.url + '/update',
+                   'DB_READPATH': self.server.url + '/read', 'DB_DELETEPATH': self.server.url + '/delete'}
+        patcher = mock.patch.dict(os.environ, environ)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # No backoff between the retries
+        patcher = mock.patch.object(DBConnection, 'BACKOFF_FACTOR', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.server.close)
+
+    def test_session_reuses_connection(self):
+        db_connection = DBConnection()
+        self.addCleanup(db_connection.close)
+        db_connection.read('a')
+        db_connection.update({'x': 1}, 'a')
+        db_connection.delete('a')
+        self.assertEqual(len({x['port'] for x in self.server.requests}), 1)
+        self.assertEqual(self.server.requests[0]['headers'].get('x-gist-master-key'), 'key')
+
+    def test_gzip_body(self):
+        db_connection = DBConnection(gzip_requests=True)
+        self.addCleanup(db_connection.close)
+        db_connection.update({'name': 'Frodo', 'level': 150}, 'a')
+        request = self.server.requests[0]
+        self.assertEqual(request['headers'].get('Content-Encoding'), 'gzip')
+        self.assertEqual(request['query'], {'jsonId': ['a']})
+        self.assertEqual(self.server.contents(), [{'name': 'Frodo', 'level': 150}])
+
+    def test_retries_server_errors(self):
+        db_connection = DBConnection()
+        self.addCleanup(db_connection.close)
+        self.server.statuses = [503, 502]
+        self.assertEqual(db_connection.update({'x': 1}, 'a'), {'status': 200})
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_raises_on_error_status(self):
+        db_connection = DBConnection()
+        self.addCleanup(db_connection.close)
+        self.server.statuses = [404]
+        with self.assertRaises(requests.HTTPError):
+            db_connection.read('a')
+        # Retries exhausted
+        self.server.statuses = [500] * (DBConnection.RETRIES + 1)
+        with self.assertRaises(requests.HTTPError):
+            db_connection.update({'x': 1}, 'a')
+
+    def test_upload_queue_sends_latest_content(self):
+        db_connection = DBConnection()
+        self.addCleanup(db_connection.close)
+        upload_queue = UploadQueue(db_connection)
+        self.server.gate.clear()
+        upload_queue.update({'v': 1}, 'a')
+        # Queued while the first upload is in progress: only the latest one is sent
+        upload_queue.update({'v': 2, 'removed': True}, 'a')
+        upload_queue.update({'v': 3}, 'a')
+        self.server.gate.set()
+        self.assertTrue(upload_queue.flush(timeout=10))
+        upload_queue.close()
+        self.assertEqual(self.server.contents()[-1], {'v': 3})
+        self.assertLessEqual(len(self.server.requests), 2)
+
+    def test_upload_queue_retries_failed_upload(self):
+        db_connection = DBConnection()
+        self.addCleanup(db_connection.close)
+        self.server.statuses = [500] * (DBConnection.RETRIES + 1)
+        with mock.patch.object(UploadQueue, 'RETRY_DELAY', 0.05):
+            upload_queue = UploadQueue(db_connection)
+            with self.assertLogs(level='ERROR'):
+                upload_queue.update({'v': 1}, 'a')
+                self.assertTrue(upload_queue.flush(timeout=10))
+            upload_queue.close()
+        self.assertEqual(len(self.server.requests), DBConnection.RETRIES + 2)
+        self.assertEqual(self.server.contents()[-1], {'v': 1})
+
+    def test_upload_queue_drops_refused_upload(self):
+        db_connection = DBConnection()
+        self.addCleanup(db_connection.close)
+        self.server.statuses = [403]
+        upload_queue = UploadQueue(db_connection)
+        with self.assertLogs(level='ERROR'):
+            upload_queue.update({'v': 1}, 'a')
+            self.assertTrue(upload_queue.flush(timeout=10))
+        upload_queue.close()
+        self.assertEqual(len(self.server.requests), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Tests of the snapshots and deltas of properties sets.
+Run from the root folder: python -m unittest tests.test_properties_diff
+"""
+import unittest
+
+from backend.properties.properties_def import PropertyDef
+from backend.properties.properties_diff import PropertiesDelta, PropertiesSnapshot, to_json_value
+from backend.properties.properties_set import Properties
+from backend.properties.properties_val import PropertyValue
+
+PIDS = {'Name': 1, 'Level': 2, 'Class': 3, 'Virtues': 4, 'Title': 5}
+
+
+def build_properties(values: dict) -> Properties:
+    # Dict values become nested properties sets
+    properties = Properties()
+    for name, value in values.items():
+        if isinstance(value, dict):
+            value = build_properties(value)
+        prop_def = PropertyDef(PIDS.get(name, 100 + len(properties.props)), name, None)
+        properties.set_property(PropertyValue(prop_def, value, None))
+    return properties
+
+
+class PropertiesDiffTest(unittest.TestCase):
+
+    def diff(self, previous: PropertiesSnapshot, values: dict) -> tuple[PropertiesSnapshot, PropertiesDelta]:
+        return PropertiesSnapshot.diff(previous, build_properties(values))
+
+    def test_first_snapshot_changes_everything(self):
+        snapshot, delta = self.diff(None, {'Name': 'Frodo', 'Level': 150})
+        self.assertEqual(len(snapshot), 2)
+        self.assertEqual(delta.changed, {'Name': 'Frodo', 'Level': 150})
+        self.assertEqual(delta.removed, [])
+
+    def test_unchanged(self):
+        snapshot, _ = self.diff(None, {'Name': 'Frodo', 'Level': 150})
+        _, delta = self.diff(snapshot, {'Name': 'Frodo', 'Level': 150})
+        self.assertTrue(delta.is_empty())
+
+    def test_add_change_remove(self):
+        snapshot, _ = self.diff(None, {'Name': 'Frodo', 'Level': 149, 'Class': 'Burglar'})
+        _, delta = self.diff(snapshot, {'Name': 'Frodo', 'Level': 150, 'Title': 'Ring-bearer'})
+        self.assertFalse(delta.is_empty())
+        self.assertEqual(delta.changed, {'Level': 150, 'Title': 'Ring-bearer'})
+        self.assertEqual(delta.removed, ['Class'])
+
+    def test_nested_removal(self):
+        snapshot, _ = self.diff(None, {'Name': 'Frodo', 'Virtues': {'Charity': 3, 'Zeal': 5}})
+        _, delta = self.diff(snapshot, {'Name': 'Frodo', 'Virtues': {'Charity': 4}})
+        self.assertEqual(list(delta.changed), ['Virtues'])
+        virtues = delta.changed['Virtues']
+        self.assertIsInstance(virtues, PropertiesDelta)
+        self.assertEqual(virtues.changed, {'Charity': 4})
+        self.assertEqual(virtues.removed, ['Zeal'])
+
+    def test_nested_type_change(self):
+        snapshot, _ = self.diff(None, {'Virtues': {'Charity': 3}})
+        _, delta = self.diff(snapshot, {'Virtues': 'none'})
+        self.assertEqual(delta.changed, {'Virtues': 'none'})
+        snapshot, _ = self.diff(None, {'Virtues': 'none'})
+        _, delta = self.diff(snapshot, {'Virtues': {'Charity': 3}})
+        self.assertEqual(delta.changed, {'Virtues': {'Charity': 3}})
+
+    def test_none_values(self):
+        # A property with a None value exists, it is changed rather than removed
+        snapshot, delta = self.diff(None, {'Name': None, 'Level': 150})
+        self.assertEqual(delta.changed, {'Name': None, 'Level': 150})
+        snapshot, delta = self.diff(snapshot, {'Name': 'Frodo', 'Level': None})
+        self.assertEqual(delta.changed, {'Name': 'Frodo', 'Level': None})
+        self.assertEqual(delta.removed, [])
+        snapshot, delta = self.diff(snapshot, {'Name': 'Frodo', 'Level': None, 'Virtues': {'Charity': None}})
+        self.assertEqual(delta.changed, {'Virtues': {'Charity': None}})
+        _, delta = self.diff(snapshot, {'Name': 'Frodo', 'Level': None, 'Virtues': {'Charity': 3}})
+        self.assertEqual(delta.changed['Virtues'].changed, {'Charity': 3})
+        self.assertEqual(delta.changed['Virtues'].removed, [])
+
+    def test_empty_properties(self):
+        snapshot, _ = self.diff(None, {'Name': 'Frodo'})
+        _, delta = PropertiesSnapshot.diff(snapshot, None)
+        self.assertEqual(delta.changed, {})
+        self.assertEqual(delta.removed, ['Name'])
+
+    def test_to_json_value(self):
+        properties = build_properties({'Name': None, 'Virtues': {'Charity': 3, 'Zeal': None}})
+        self.assertEqual(to_json_value(properties), {'Name': None, 'Virtues': {'Charity': 3, 'Zeal': None}})
+        self.assertEqual(to_json_value((1, 'a', {2: [None]})), [1, 'a', {'2': [None]}])
+
+
+if __name__ == '__main__':
+    unittest.main()
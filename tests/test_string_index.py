@@ -0,0 +1,59 @@
+"""
+Tests of the strings index, built from in-memory rows instead of the DAT files.
+Run from the root folder: python -m unittest tests.test_string_index
+"""
+import os
+import tempfile
+import unittest
+
+from backend.strings.string_index import MAX_TRIGRAM_TEXT, StringIndex, StringIndexBuilder
+
+LONG_TEXT = 'The Shire is ' + 'a quiet land of rolling hills, ' * 5 + 'home of the Hobbits.'
+
+ROWS = [
+    [(1, 1, 'Bilbo Baggins'), (1, 2, 'Frodo Baggins'), (1, 3, 'Bag End')],
+    [(2, 7, 'Samwise Gamgee'), (2, 8, LONG_TEXT), (2, 9, 'Hobbiton')],
+]
+
+
+class StringIndexTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        index_path = os.path.join(tmp_dir.name, 'strings_index.sqlite')
+        self.assertEqual(StringIndexBuilder(None).write(ROWS, index_path), 6)
+        self.index = StringIndex(index_path)
+        self.addCleanup(self.index.close)
+
+    def test_get_string(self):
+        self.assertEqual(self.index.get_string(2, 7), 'Samwise Gamgee')
+        self.assertIsNone(self.index.get_string(3, 1))
+
+    def test_find_exact(self):
+        self.assertEqual(self.index.find_exact('frodo BAGGINS'), [(1, 2, 'Frodo Baggins')])
+        self.assertEqual(self.index.find_exact('Frodo'), [])
+
+    def test_find_prefix(self):
+        self.assertEqual(self.index.find_prefix('ba'), [(1, 3, 'Bag End')])
+        self.assertEqual(self.index.find_prefix('the shire'), [(2, 8, LONG_TEXT)])
+        self.assertEqual(self.index.find_prefix('gandalf'), [])
+
+    def test_find_substring(self):
+        self.assertEqual(sorted(self.index.find_substring('baggins')), [(1, 1, 'Bilbo Baggins'), (1, 2, 'Frodo Baggins')])
+        self.assertEqual(self.index.find_substring('gam'), [(2, 7, 'Samwise Gamgee')])
+        # Shorter than a trigram: scan of every key
+        self.assertEqual(len(self.index.find_substring('g')), 5)
+        self.assertEqual(self.index.find_substring('xyz'), [])
+
+    def test_find_substring_in_long_text(self):
+        self.assertGreater(len(LONG_TEXT), MAX_TRIGRAM_TEXT)
+        self.assertEqual(self.index.find_substring('hobbits'), [(2, 8, LONG_TEXT)])
+        self.assertEqual(self.index.find_substring('of'), [(2, 8, LONG_TEXT)])
+        # The indexed strings come first, the long ones fill the remaining results
+        self.assertEqual(self.index.find_substring('hobbit'), [(2, 9, 'Hobbiton'), (2, 8, LONG_TEXT)])
+        self.assertEqual(self.index.find_substring('hobbit', limit=1), [(2, 9, 'Hobbiton')])
+
+
+if __name__ == '__main__':
+    unittest.main()